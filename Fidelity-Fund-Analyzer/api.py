@@ -0,0 +1,214 @@
+"""
+Recommendation API
+Asyncio HTTP service for quiz scoring, strategy detail and catalog lookups
+"""
+
+import asyncio
+import hashlib
+import json
+from itertools import product
+from urllib.parse import parse_qs
+
+import report
+
+QUIZ_QUESTIONS = (
+    ('When the market drops 30%, you...',
+     ('Panic and sell everything', 'Hold on nervously', "Stay calm — I've planned for this", "Buy more — it's on sale")),
+    ('When will you need this money?',
+     ('Less than 2 years', '2–5 years', '5–10 years', '10+ years / retirement')),
+    ('What matters most to you?',
+     ('Preserve capital, steady income', 'Balanced growth with some protection',
+      'Maximize growth, I can handle volatility', 'Global exposure and diversification')),
+)
+
+QUIZ_REASONS = {
+    1: 'You prefer stability and income over growth. Conservative bonds + dividend funds are your match.',
+    2: 'You want balanced growth with protection. A 60/40 blend gives you upside with a safety net.',
+    3: 'You can handle volatility and have time on your side. A growth-focused strategy fits your profile.',
+    4: 'High risk tolerance and a long time horizon — an aggressive concentrated portfolio maximizes your potential.',
+    5: "You're swinging for the fences. Moonshot strategy for maximum upside — understand you can lose 50%+.",
+    6: 'You value global diversification and want exposure beyond US markets.',
+}
+
+REASONS = {200: 'OK', 304: 'Not Modified', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def quiz_strategy(answers):
+    """Strategy number (1-6) for three answers of 1-4, same rules as the dashboard quiz"""
+    r1, r2, r3 = answers
+    score = r1 + r2 + r3
+    if score <= 4:
+        return 1
+    if score <= 6:
+        return 2
+    if score <= 8:
+        return 3
+    if score <= 10:
+        return 4
+    return 6 if r3 == 4 else 5
+
+
+class Response:
+    """Fully encoded 200 / 304 / HEAD responses for one resource"""
+
+    def __init__(self, payload, status=200):
+        body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nETag: {self.etag}\r\n"
+                f"Cache-Control: no-cache\r\n\r\n").encode()
+        self.head = head
+        self.full = head + body
+        self.not_modified = (f"HTTP/1.1 304 Not Modified\r\nETag: {self.etag}\r\n"
+                             f"Cache-Control: no-cache\r\n\r\n").encode()
+
+
+class ApiServer:
+    """Every response is encoded up front; serving a request is a dict lookup and a write"""
+
+    def __init__(self, analyzer, host='127.0.0.1', port=8080):
+        self.analyzer = analyzer
+        self.host = host
+        self.port = port
+        self.routes = {}
+        self.requests = 0
+        self._server = None
+        self.not_found = Response({'error': 'not found'}, 404)
+        self.not_allowed = Response({'error': 'only GET and HEAD are supported'}, 405)
+        self.refresh()
+
+    def refresh(self):
+        """Recompute every response (call after the analyzer's data changes)"""
+        analyzer = self.analyzer
+        store, strategies = analyzer.store, analyzer.strategies
+        keys = list(strategies)
+        routes = {}
+
+        comparison = report.build_comparison(store, strategies)
+        metrics = analyzer.evaluate_strategies()
+        summaries = {}
+        for key, row in zip(keys, comparison):
+            summaries[key] = {**row, 'key': key, **{k: v for k, v in metrics[key].items() if k != 'key'}}
+            detail = report.build_strategy(store, key, strategies[key])
+            detail['description'] = strategies[key]['description']
+            detail['metrics'] = summaries[key]
+            routes[f'/strategies/{key}'] = Response(detail)
+        routes['/strategies'] = Response(list(summaries.values()))
+
+        for answers in product(range(1, 5), repeat=3):
+            sid = quiz_strategy(answers)
+            key = keys[sid - 1] if sid <= len(keys) else keys[-1]
+            routes['/quiz/' + '/'.join(map(str, answers))] = Response({
+                'answers': answers,
+                'strategy': key,
+                'why': QUIZ_REASONS[sid],
+                'summary': summaries[key],
+            })
+        routes['/quiz'] = Response([
+            {'question': q, 'options': options} for q, options in QUIZ_QUESTIONS
+        ])
+
+        funds = []
+        categories = []
+        for category_key, label, rows in store.iter_categories():
+            members = []
+            for row in rows:
+                record = {'symbol': store.symbols[row], 'category': category_key, **store.record(row)}
+                routes[f'/funds/{store.symbols[row]}'] = Response(record)
+                members.append(record)
+            funds.extend(members)
+            categories.append({'key': category_key, 'label': label, 'symbols': [f['symbol'] for f in members]})
+            routes[f'/categories/{category_key}'] = Response({'key': category_key, 'label': label, 'funds': members})
+        routes['/funds'] = Response(funds)
+        routes['/categories'] = Response(categories)
+
+        routes['/'] = Response({'endpoints': [
+            '/quiz', '/quiz/{1-4}/{1-4}/{1-4}', '/strategies', '/strategies/{key}',
+            '/funds', '/funds/{symbol}', '/categories', '/categories/{key}',
+        ]})
+        self.routes = routes
+
+    def lookup(self, target):
+        path, _, query = target.partition('?')
+        if path == '/quiz' and query:
+            # /quiz?answers=3,2,4 is an alias for /quiz/3/2/4
+            answers = parse_qs(query).get('answers', [''])[0].replace(',', '/')
+            path = f'/quiz/{answers}'
+        return self.routes.get(path.rstrip('/') or '/', self.not_found)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                self.requests += 1
+                request_line, _, header_block = request.decode('latin-1').partition('\r\n')
+                method, target, _ = request_line.split(' ', 2)
+                headers = header_block.lower()
+
+                if method not in ('GET', 'HEAD'):
+                    writer.write(self.not_allowed.full)
+                else:
+                    response = self.lookup(target)
+                    if response.etag in _header(headers, 'if-none-match', header_block):
+                        writer.write(response.not_modified)
+                    else:
+                        writer.write(response.full if method == 'GET' else response.head)
+
+                if 'connection: close' in headers:
+                    break
+                await writer.drain()
+        except (ConnectionResetError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def _header(lowered, name, original):
+    """Value of a header (original case), or '' when absent"""
+    start = lowered.find(name + ':')
+    if start < 0:
+        return ''
+    end = lowered.find('\r\n', start)
+    return original[start + len(name) + 1:end if end >= 0 else None].strip()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from portfolio_analyzer import PortfolioAnalyzer
+
+    parser = argparse.ArgumentParser(description="Portfolio recommendation API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    server = ApiServer(PortfolioAnalyzer(), args.host, args.port)
+    print(f"Serving {len(server.routes)} precomputed resources on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Synthetic catalogs (30 → 100k funds) timing the analyzer hot paths, with JSON baselines
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import report
+from fund_store import RISK_LEVELS, FundStore
+from incremental import IncrementalEvaluator
+from portfolio_analyzer import PortfolioAnalyzer
+from projections import ProjectionGrid
+from risk_metrics import RiskMonitor
+from screening import Query, ScreenIndex
+from strategy_engine import WeightMatrix, evaluate
+from strategy_library import evaluate_all
+from tax_lots import LotStore, rebalance
+
+SIZES = (30, 1_000, 10_000, 100_000)
+STRATEGY_COUNTS = (6, 100, 1_000)
+HOLDINGS = 10
+LOOKUPS = 10_000
+MAX_LOTS = 50_000
+DEFAULT_THRESHOLD = 0.25
+SAMPLE_TIME = 0.01  # seconds per timing sample
+MIN_TIME = 1.0      # seconds of samples per case, however few repeats are asked for
+RECHECKS = 2        # extra timing passes a suspected regression must survive
+
+
+# ── Synthetic data ─────────────────────────────────────────────────
+
+
+def synthetic_catalog(n_funds, seed=0, funds_per_category=250):
+    """Nested {category: {'category', 'funds'}} catalog with n_funds random funds"""
+    rng = random.Random(seed)
+    catalog = {}
+    for i in range(n_funds):
+        category = f"category_{i // funds_per_category}"
+        funds = catalog.setdefault(category, {'category': category.upper(), 'funds': {}})['funds']
+        funds[f"F{i:06d}"] = {
+            'name': f"Synthetic Fund {i}",
+            'type': rng.choice(('ETF', 'Fidelity Mutual Fund')),
+            'ytd': rng.uniform(-0.1, 0.4),
+            'one_yr': rng.uniform(-0.2, 0.8),
+            'three_yr': rng.uniform(-0.1, 0.5),
+            'dividend': rng.uniform(0, 0.05),
+            'expense_ratio': rng.uniform(0, 0.01),
+            'risk': rng.choice(RISK_LEVELS),
+        }
+    return catalog
+
+
+def synthetic_strategies(symbols, n_strategies, holdings=HOLDINGS, seed=1):
+    """Strategies shaped like PortfolioAnalyzer.strategies over random holdings"""
+    rng = random.Random(seed)
+    strategies = {}
+    for i in range(n_strategies):
+        picks = rng.sample(symbols, min(holdings, len(symbols)))
+        raw = [rng.random() + 0.1 for _ in picks]
+        total = sum(raw)
+        strategies[f"strategy_{i + 1}"] = {
+            'name': f"📈 SYNTHETIC {i + 1}",
+            'subtitle': 'Synthetic benchmark strategy',
+            'description': 'Random weights',
+            'allocation': {s: w / total for s, w in zip(picks, raw)},
+            'expected_return': '8-12% annual',
+            'max_drawdown': '-25% worst case',
+            'time_horizon': '2-5 years',
+            'best_for': 'Benchmarks',
+        }
+    return strategies
+
+
+def synthetic_lots(allocation, n_lots, seed=3, today=740_000):
+    """(LotStore, prices) for an account holding an allocation's funds, drifted off target"""
+    rng = random.Random(seed)
+    symbols = list(allocation)
+    prices = {s: rng.uniform(10, 500) for s in symbols}
+    lots = LotStore()
+    for symbol in rng.choices(symbols, [w * rng.uniform(0.8, 1.2) for w in allocation.values()], k=n_lots):
+        lots.add(symbol, rng.uniform(0.1, 20), prices[symbol] * rng.uniform(0.6, 1.4), today - rng.randint(0, 2000))
+    return lots, prices
+
+
+def synthetic_analyzer(n_funds, n_strategies):
+    analyzer = PortfolioAnalyzer()
+    analyzer.store = FundStore.from_nested(synthetic_catalog(n_funds))
+    analyzer.strategies = synthetic_strategies(analyzer.store.symbols, n_strategies)
+    return analyzer
+
+
+# ── Cases ──────────────────────────────────────────────────────────
+
+
+class NullStream:
+    """Discards writes, so render timings and peaks exclude the output buffer"""
+
+    def write(self, text):
+        return len(text)
+
+
+def cases(n_funds, n_strategies):
+    """[(name, zero-argument callable)] for one catalog size and strategy count"""
+    analyzer = synthetic_analyzer(n_funds, n_strategies)
+    store, strategies = analyzer.store, analyzer.strategies
+    catalog = synthetic_catalog(n_funds)
+    probes = random.Random(2).choices(store.symbols, k=LOOKUPS)
+    first = next(iter(strategies))
+    allocations = {key: s['allocation'] for key, s in strategies.items()}
+    model = analyzer.build_report()
+    index = ScreenIndex(store)
+    query = Query.parse(['risk=Moderate', 'dividend>3%'], sort_by='expense_ratio', limit=10)
+    live = IncrementalEvaluator(store, allocations)
+    monitor = RiskMonitor(store, allocations)
+    closes = {symbol: 100.0 for symbol in store.symbols}
+    monitor.update_day(closes)
+    moves = [{symbol: 100.0 * (1 + random.Random(day).gauss(0, 0.01)) for symbol in store.symbols} for day in range(2)]
+    days = itertools.cycle(moves)
+    lots, prices = synthetic_lots(allocations[first], min(n_funds * 10, MAX_LOTS))
+
+    def update_one():
+        symbol = probes[0]
+        live.update(symbol, one_yr=store.columns['one_yr'][store.row(symbol)])
+        live.refresh()
+
+    def silent(fn):
+        def run():
+            with contextlib.redirect_stdout(NullStream()):
+                fn()
+        return run
+
+    def render(fmt):
+        return lambda: report.render(model, fmt, NullStream())
+
+    return [
+        ('build_store', lambda: FundStore.from_nested(catalog)),
+        ('lookup', lambda: [store.row(s) for s in probes]),
+        ('screen_index', lambda: ScreenIndex(store)),
+        ('screen', lambda: index.query(query)),
+        ('evaluate', lambda: evaluate(store, WeightMatrix.from_allocations(store, allocations))),
+        ('incremental_update', update_one),
+        ('risk_update', lambda: monitor.update_day(next(days))),
+        ('rank_strategies', lambda: evaluate_all(store, strategies, workers=1)),
+        ('projection_grid', lambda: ProjectionGrid(store, allocations)),
+        ('rebalance_lots', lambda: rebalance(lots, allocations[first], prices, 740_000)),
+        ('strategy_detail', silent(lambda: analyzer.print_strategy_detail(first))),
+        ('build_report', analyzer.build_report),
+        ('render_text', render('text')),
+        ('render_markdown', render('markdown')),
+        ('render_json', render('json')),
+        ('generate_report', lambda: analyzer.generate_report(stream=NullStream())),
+    ]
+
+
+def measure(fn, repeat=5, min_time=MIN_TIME, sample_time=SAMPLE_TIME):
+    """Median / min seconds per call and tracemalloc peak bytes of one call.
+
+    Takes at least `repeat` samples and keeps sampling for min_time: many
+    short samples spread over a second find the quiet stretches of a busy
+    machine, which a few long ones (the median in particular) do not.
+    """
+    fn()    # warm-up
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= sample_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < repeat or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - started) / loops)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'median_s': statistics.median(timings), 'min_s': min(timings), 'peak_bytes': peak}
+
+
+def run(sizes=SIZES, strategy_counts=STRATEGY_COUNTS, only=None, repeat=5, log=sys.stderr):
+    """{'<case>/<funds>f/<strategies>s': measurement} for every combination"""
+    results = {}
+    for n_funds in sizes:
+        for n_strategies in strategy_counts:
+            for name, fn in cases(n_funds, n_strategies):
+                if only and name not in only:
+                    continue
+                key = f"{name}/{n_funds}f/{n_strategies}s"
+                results[key] = measure(fn, repeat=repeat)
+                if log:
+                    r = results[key]
+                    print(f"{key:<40} {r['median_s'] * 1000:>10.3f} ms  {r['peak_bytes'] / 1024:>10.0f} KiB",
+                          file=log)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=None):
+    """[(key, metric, baseline, current, ratio)] for every measurement past the threshold.
+
+    Time is compared on the fastest sample: noise only ever adds time, so the
+    minimum is far steadier between runs of unchanged code than the median.
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, limit in (('min_s', threshold), ('peak_bytes', memory_threshold)):
+            if base[metric] > 0 and current[metric] > base[metric] * (1 + limit):
+                regressions.append((key, metric, base[metric], current[metric], current[metric] / base[metric]))
+    return regressions
+
+
+def remeasure(results, keys, repeat=5):
+    """Time the given result keys again in a fresh interpreter, keeping each one's fastest sample.
+
+    A new process, not just new samples: on shared machines the same code
+    can run consistently faster or slower in one process than in the next.
+    """
+    groups = {}
+    for key in keys:
+        name, funds, strategies = key.split('/')
+        groups.setdefault((int(funds[:-1]), int(strategies[:-1])), set()).add(name)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        passes = [pool.submit(run, [n_funds], [n_strategies], names, repeat, None)
+                  for (n_funds, n_strategies), names in groups.items()]
+        for future in passes:
+            for key, fresh in future.result().items():
+                fresh['min_s'] = min(fresh['min_s'], results[key]['min_s'])
+                results[key] = fresh
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer hot paths")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help="fund counts, comma separated")
+    parser.add_argument('--strategies', default=','.join(map(str, STRATEGY_COUNTS)),
+                        help="strategy counts, comma separated")
+    parser.add_argument('--only', help="comma separated case names")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help="write results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown ratio before failing (default 0.25 = +25%%)")
+    parser.add_argument('--memory-threshold', type=float, help="allowed peak-memory growth (default: --threshold)")
+    args = parser.parse_args()
+
+    results = run(
+        sizes=[int(s) for s in args.sizes.split(',')],
+        strategy_counts=[int(s) for s in args.strategies.split(',')],
+        only=set(args.only.split(',')) if args.only else None,
+        repeat=args.repeat,
+    )
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f, indent=2)
+        print(f"Saved {len(results)} measurements to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        # A slow process on a busy machine rarely repeats; a real slowdown does
+        for _ in range(RECHECKS):
+            if not regressions:
+                break
+            remeasure(results, {key for key, *_ in regressions}, repeat=args.repeat)
+            regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for key, metric, base, current, ratio in regressions:
+            print(f"[REGRESSION] {key} {metric}: {base:.6g} -> {current:.6g} ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions past +{args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,205 @@
+"""
+Client Portfolio Scoring
+Stream client holdings → blended metrics, nearest archetype and drift, as JSONL
+"""
+
+import csv
+import json
+import math
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice
+
+from strategy_engine import WeightMatrix, evaluate
+
+CLIENT_HEADERS = ('client_id', 'client', 'account', 'account_id')
+SYMBOL_HEADERS = ('symbol', 'ticker')
+VALUE_HEADERS = ('weight', 'value', 'market_value', 'amount')
+
+CHUNK_SIZE = 2_000
+OUTPUT_BUFFER = 1 << 16
+
+
+# ── Input ──────────────────────────────────────────────────────────
+
+
+def _find(names, candidates, path):
+    for candidate in candidates:
+        if candidate in names:
+            return names.index(candidate)
+    raise ValueError(f"{path}: missing one of columns {', '.join(candidates)}")
+
+
+def read_csv(path):
+    """Yield (client_id, {symbol: value}) from long-format rows grouped by client"""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        names = [name.strip().lower() for name in next(reader, [])]
+        client_idx = _find(names, CLIENT_HEADERS, path)
+        symbol_idx = _find(names, SYMBOL_HEADERS, path)
+        value_idx = _find(names, VALUE_HEADERS, path)
+        records = (r for r in reader if r)
+        for client_id, rows in groupby(records, key=lambda r: r[client_idx]):
+            holdings = {}
+            for r in rows:
+                symbol = r[symbol_idx].strip().upper()
+                holdings[symbol] = holdings.get(symbol, 0.0) + float(r[value_idx])
+            yield client_id, holdings
+
+
+def read_jsonl(path):
+    """Yield (client_id, {symbol: value}) from {"client_id": ..., "holdings": {...}} lines"""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            client_id = record.get('client_id', line_number)
+            yield client_id, {symbol.upper(): float(v) for symbol, v in record['holdings'].items()}
+
+
+def read_clients(path):
+    if path.endswith('.csv'):
+        return read_csv(path)
+    if path.endswith(('.jsonl', '.ndjson')):
+        return read_jsonl(path)
+    raise ValueError(f"Unsupported client file: {path} (expected .csv or .jsonl)")
+
+
+# ── Scoring ────────────────────────────────────────────────────────
+
+
+class Archetypes:
+    """Strategy targets as dense store columns, so distances are one sparse product"""
+
+    def __init__(self, store, strategies):
+        self.keys = list(strategies)
+        self.targets = [strategies[key]['allocation'] for key in self.keys]
+        self.columns = []
+        self.norms = []
+        for allocation in self.targets:
+            column = array('d', bytes(8 * len(store)))
+            for symbol, weight in allocation.items():
+                column[store.row(symbol)] = weight
+            self.columns.append(column)
+            self.norms.append(sum(w * w for w in allocation.values()))
+
+
+def _normalize(store, holdings):
+    known = {s: v for s, v in holdings.items() if s in store.index and v > 0}
+    total = sum(v for v in holdings.values() if v > 0)
+    known_total = sum(known.values())
+    weights = {s: v / known_total for s, v in known.items()} if known_total else {}
+    coverage = known_total / total if total else 0.0
+    unknown = sorted(s for s in holdings if s not in store.index)
+    return weights, coverage, unknown
+
+
+def drift(weights, target):
+    """{symbol: client weight − target weight} and the one-way turnover to close it"""
+    diffs = {}
+    for symbol in weights.keys() | target.keys():
+        d = weights.get(symbol, 0.0) - target.get(symbol, 0.0)
+        if abs(d) > 1e-9:
+            diffs[symbol] = round(d, 6)
+    return dict(sorted(diffs.items(), key=lambda x: -abs(x[1]))), sum(map(abs, diffs.values())) / 2
+
+
+def score(store, archetypes, clients, horizon='one_yr'):
+    """Score a batch of (client_id, holdings); yields one result dict per client"""
+    prepared = [(client_id, *_normalize(store, holdings)) for client_id, holdings in clients]
+    matrix = WeightMatrix.from_allocations(store, [weights for _, weights, _, _ in prepared])
+    metrics = evaluate(store, matrix, horizon=horizon, amount=1.0)
+    dots = matrix.matmul(archetypes.columns)
+    names = archetypes.keys
+
+    for i, (client_id, weights, coverage, unknown) in enumerate(prepared):
+        result = {
+            'client_id': client_id,
+            'holdings': len(weights),
+            'coverage': round(coverage, 6),
+            'unknown': unknown,
+            'blended_return': metrics.columns['blended_return'][i],
+            'yield': metrics.columns['yield'][i],
+            'expense_ratio': metrics.columns['expense_ratio'][i],
+        }
+        if not weights:
+            # Nothing in the catalog: an empty portfolio is not "near" any archetype
+            result.update(nearest=None, distance=None, distances=None, drift=None, turnover=None)
+            yield result
+            continue
+        norm = sum(w * w for w in weights.values())
+        distances = [max(0.0, norm + a_norm - 2 * dot[i]) for a_norm, dot in zip(archetypes.norms, dots)]
+        nearest = min(range(len(names)), key=distances.__getitem__)
+        diffs, turnover = drift(weights, archetypes.targets[nearest])
+        result.update(
+            nearest=names[nearest],
+            distance=math.sqrt(distances[nearest]),
+            distances={key: round(math.sqrt(d), 6) for key, d in zip(names, distances)},
+            drift=diffs,
+            turnover=turnover,
+        )
+        yield result
+
+
+# Worker state: store and archetypes are shipped once per process
+_context = None
+
+
+def _init_worker(store, strategies, horizon):
+    global _context
+    _context = (store, Archetypes(store, strategies), horizon)
+
+
+def _score_chunk(clients):
+    store, archetypes, horizon = _context
+    # Serialize in the worker so the parent only concatenates lines
+    return ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in score(store, archetypes, clients, horizon))
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _windowed(pool, chunks, window):
+    """Yield (clients, jsonl text) in input order with at most `window` chunks in flight"""
+    pending = deque()
+    for chunk in chunks:
+        pending.append((len(chunk), pool.submit(_score_chunk, chunk)))
+        if len(pending) >= window:
+            size, future = pending.popleft()
+            yield size, future.result()
+    while pending:
+        size, future = pending.popleft()
+        yield size, future.result()
+
+
+def _write(out, results):
+    clients = chunks = 0
+    for size, text in results:
+        out.write(text)
+        clients += size
+        chunks += 1
+    return {'clients': clients, 'chunks': chunks}
+
+
+def score_file(store, strategies, source, dest, workers=None, chunk_size=CHUNK_SIZE, horizon='one_yr'):
+    """Stream source (CSV/JSONL) to dest JSONL in input order; returns {'clients', 'chunks'}.
+
+    At most 2 × workers chunks are in flight, so memory stays flat however
+    many clients the input holds.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(read_clients(source), chunk_size)
+
+    with open(dest, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER) as out:
+        if workers == 1:
+            _init_worker(store, strategies, horizon)
+            return _write(out, ((len(chunk), _score_chunk(chunk)) for chunk in chunks))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(store, strategies, horizon)) as pool:
+            return _write(out, _windowed(pool, chunks, 2 * workers))
@@ -0,0 +1,156 @@
+"""
+Dashboard Data Build
+Compact JSON payload for index.html, rebuilt only when the catalog changes
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from fund_store import METRIC_FIELDS
+
+# Bump when the payload layout changes so stale builds are redone
+PAYLOAD_VERSION = 2
+
+MANIFEST = 'manifest.json'
+FUNDS_FILE = 'funds.json'
+STRATEGIES_FILE = 'strategies.json'
+
+FUND_FIELDS = ('t', 'n', 'type', 'y1', 'y3', 'div', 'exp', 'risk')
+
+# Scenario rates shown on strategy cards: 1-year Monte Carlo percentiles
+SCENARIO_PERCENTILES = {'bull': 'p75', 'base': 'p50', 'bear': 'p25'}
+
+
+def content_hash(store, strategies, **params):
+    """SHA-256 over everything the payload is derived from"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'version': PAYLOAD_VERSION, 'params': params}, sort_keys=True).encode())
+    for values in (store.symbols, store.names, store.types, store.risk_labels):
+        digest.update('\0'.join(values).encode('utf-8'))
+    for field in METRIC_FIELDS:
+        digest.update(store.columns[field].tobytes())
+    digest.update(store.risk_codes.tobytes())
+    digest.update(json.dumps(store.categories, sort_keys=True).encode())
+    digest.update(json.dumps(strategies, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _pct(value):
+    return round(value * 100, 2)
+
+
+def fund_rows(store):
+    """Catalog rows in FUND_FIELDS order, types and risk labels as codes"""
+    type_codes = {}
+    one_yr, three_yr = store.columns['one_yr'], store.columns['three_yr']
+    dividend, expense = store.columns['dividend'], store.columns['expense_ratio']
+    for row, symbol in enumerate(store.symbols):
+        fund_type = type_codes.setdefault(store.types[row], len(type_codes))
+        yield [symbol, store.names[row], fund_type,
+               _pct(one_yr[row]), _pct(three_yr[row]), _pct(dividend[row]), _pct(expense[row]),
+               store.risk_codes[row]]
+
+
+def funds_payload(store):
+    rows = list(fund_rows(store))
+    return {
+        'fields': FUND_FIELDS,
+        'types': list(dict.fromkeys(store.types)),
+        'risks': store.risk_labels,
+        'rows': rows,
+    }
+
+
+def _range(text, suffix):
+    # '5-7% annual' -> '5–7%' (en dash between the bounds, as the cards show it)
+    text = text.replace(suffix, '').strip()
+    return text[:1] + text[1:].replace('-', '–')
+
+
+def strategy_card(store, strategy, scenarios):
+    emoji, _, name = strategy['name'].partition(' ')
+    allocation = strategy['allocation']
+    return {
+        'n': name.title(),
+        'e': emoji,
+        'sub': strategy['subtitle'],
+        'ret': _range(strategy['expected_return'], 'annual'),
+        'down': _range(strategy['max_drawdown'], 'worst case'),
+        'hz': _range(strategy['time_horizon'], ''),
+        'for': strategy['best_for'],
+        **scenarios,
+        'alloc': {symbol: _pct(weight) for symbol, weight in allocation.items()},
+        'names': {symbol: store.names[store.row(symbol)] for symbol in allocation},
+    }
+
+
+def scenario_rates(store, strategies, paths=10_000, seed=42):
+    """{strategy key: {'bull', 'base', 'bear'}} annual % from a 1-year simulation"""
+    from monte_carlo import simulate
+
+    allocations = {key: s['allocation'] for key, s in strategies.items()}
+    simulation = simulate(store, allocations, years=1, paths=paths, seed=seed)
+    return {
+        key: {label: round(result['bands'][1][p] * 100, 1) for label, p in SCENARIO_PERCENTILES.items()}
+        for key, result in simulation.items()
+    }
+
+
+def strategies_payload(store, strategies, scenarios):
+    """STRATS keyed 1..n in catalog order, as the dashboard's quiz expects"""
+    return {
+        position: strategy_card(store, strategy, scenarios[key])
+        for position, (key, strategy) in enumerate(strategies.items(), start=1)
+    }
+
+
+def _write_json(path, payload):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build(store, strategies, out_dir='data', force=False, paths=10_000, seed=42, cache=None):
+    """Write funds/strategies JSON into out_dir unless the inputs are unchanged.
+
+    With a ResultCache the simulated scenario rates are reused across builds.
+    Returns (content hash, True if files were written).
+    """
+    digest = content_hash(store, strategies, paths=paths, seed=seed)
+    manifest = read_manifest(out_dir)
+    if not force and manifest.get('hash') == digest and all(
+            os.path.exists(os.path.join(out_dir, name)) for name in (FUNDS_FILE, STRATEGIES_FILE)):
+        return digest, False
+
+    if cache is None:
+        scenarios = scenario_rates(store, strategies, paths, seed)
+    else:
+        symbols = {symbol for s in strategies.values() for symbol in s['allocation']}
+        scenarios = cache.cached(
+            'dashboard_scenarios', store, symbols,
+            lambda: scenario_rates(store, strategies, paths, seed),
+            allocations={key: s['allocation'] for key, s in strategies.items()}, paths=paths, seed=seed)
+
+    os.makedirs(out_dir, exist_ok=True)
+    _write_json(os.path.join(out_dir, FUNDS_FILE), funds_payload(store))
+    _write_json(os.path.join(out_dir, STRATEGIES_FILE), strategies_payload(store, strategies, scenarios))
+    # Manifest last: a crash mid-build leaves the old hash, forcing a rebuild
+    _write_json(os.path.join(out_dir, MANIFEST), {
+        'hash': digest,
+        'version': PAYLOAD_VERSION,
+        'funds': len(store),
+        'strategies': len(strategies),
+        'generated': datetime.now().isoformat(timespec='seconds'),
+    })
+    return digest, True
@@ -0,0 +1,263 @@
+"""
+Columnar Fund Store
+Contiguous metric arrays + O(1) symbol and category indexes
+"""
+
+import json
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping
+from types import MappingProxyType
+
+METRIC_FIELDS = ('ytd', 'one_yr', 'three_yr', 'dividend', 'expense_ratio')
+
+# Row layout of the compact catalog file (see FundStore.load / save)
+ROW_FIELDS = ('symbol', 'name', 'type', *METRIC_FIELDS, 'risk')
+
+# Ordered low → high so risk codes compare meaningfully
+RISK_LEVELS = ('Very Low', 'Low', 'Moderate', 'Moderate-High', 'High', 'Very High', 'Extreme')
+
+
+class FundStore:
+    """Fund universe stored column-wise, one row per symbol.
+
+    Rows of a category are contiguous, so a category is just a row range.
+    """
+
+    def __init__(self):
+        self.symbols = []
+        self.names = []
+        self.types = []
+        self.columns = {field: array('d') for field in METRIC_FIELDS}
+        self.risk_codes = array('B')
+        self.risk_labels = list(RISK_LEVELS)
+        self.index = {}         # symbol -> row
+        self.categories = {}    # category key -> (label, start, stop)
+        self._category_starts = []
+        self._category_keys = []
+        self._risk_lookup = {label: code for code, label in enumerate(self.risk_labels)}
+
+    @classmethod
+    def from_nested(cls, funds):
+        """Build a store from the nested {category: {'category', 'funds'}} layout"""
+        store = cls()
+        for category_key, category_data in funds.items():
+            store.add_category(category_key, category_data['category'], category_data['funds'])
+        return store
+
+    @classmethod
+    def load(cls, path):
+        """Build a store from a compact catalog file written by save()"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        fields = tuple(data['fields'])
+        if fields != ROW_FIELDS:
+            raise ValueError(f"{path}: expected fields {', '.join(ROW_FIELDS)}")
+        store = cls()
+        for category in data['categories']:
+            store.add_rows(category['key'], category['label'], category['funds'])
+        return store
+
+    def save(self, path):
+        """Write the catalog as one JSON row per fund, grouped by category"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{\n  "fields": ' + json.dumps(ROW_FIELDS) + ',\n  "categories": [')
+            for i, (category_key, label, rows) in enumerate(self.iter_categories()):
+                head = json.dumps({'key': category_key, 'label': label}, ensure_ascii=False)[:-1]
+                f.write((',' if i else '') + f'\n    {head}, "funds": [')
+                f.write(','.join(
+                    '\n      ' + json.dumps(self._row_values(row), ensure_ascii=False) for row in rows))
+                f.write('\n    ]}')
+            f.write('\n  ]\n}\n')
+
+    def _row_values(self, row):
+        return [self.symbols[row], self.names[row], self.types[row],
+                *(self.columns[field][row] for field in METRIC_FIELDS), self.risk(row)]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def risk_code(self, label):
+        """Return the interned code for a risk label, registering new labels"""
+        code = self._risk_lookup.get(label)
+        if code is None:
+            code = len(self.risk_labels)
+            self.risk_labels.append(label)
+            self._risk_lookup[label] = code
+        return code
+
+    def add_category(self, category_key, label, funds):
+        """Append a category and its funds as one contiguous row range"""
+        if category_key in self.categories:
+            raise ValueError(f"Duplicate category: {category_key}")
+
+        start = len(self.symbols)
+        for symbol, fund_data in funds.items():
+            if symbol in self.index:
+                raise ValueError(f"Duplicate symbol: {symbol}")
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.names.append(fund_data['name'])
+            self.types.append(sys.intern(fund_data['type']))
+            for field in METRIC_FIELDS:
+                self.columns[field].append(fund_data[field])
+            self.risk_codes.append(self.risk_code(fund_data['risk']))
+
+        self.categories[category_key] = (label, start, len(self.symbols))
+        self._category_starts.append(start)
+        self._category_keys.append(category_key)
+
+    def add_rows(self, category_key, label, rows):
+        """Append a category from ROW_FIELDS-ordered rows, filling columns in bulk"""
+        if category_key in self.categories:
+            raise ValueError(f"Duplicate category: {category_key}")
+
+        start = len(self.symbols)
+        if rows:
+            symbols, names, types, *metrics, risks = zip(*rows)
+            for offset, symbol in enumerate(symbols):
+                if symbol in self.index:
+                    raise ValueError(f"Duplicate symbol: {symbol}")
+                self.index[symbol] = start + offset
+            self.symbols.extend(symbols)
+            self.names.extend(names)
+            self.types.extend(map(sys.intern, types))
+            for field, values in zip(METRIC_FIELDS, metrics):
+                self.columns[field].extend(map(float, values))
+            self.risk_codes.extend(map(self.risk_code, risks))
+
+        self.categories[category_key] = (label, start, len(self.symbols))
+        self._category_starts.append(start)
+        self._category_keys.append(category_key)
+
+    def get(self, symbol, default=None):
+        """Row for a symbol, or default when the symbol is unknown"""
+        return self.index.get(symbol, default)
+
+    def row(self, symbol):
+        """Row for a symbol, raising KeyError when the symbol is unknown"""
+        return self.index[symbol]
+
+    def rows(self, symbols):
+        """Rows for an iterable of symbols"""
+        return [self.index[symbol] for symbol in symbols]
+
+    def risk(self, row):
+        return self.risk_labels[self.risk_codes[row]]
+
+    def category_rows(self, category_key):
+        _, start, stop = self.categories[category_key]
+        return range(start, stop)
+
+    def category_of(self, row):
+        """Category key owning a row"""
+        return self._category_keys[bisect_right(self._category_starts, row) - 1]
+
+    def iter_categories(self):
+        """Yield (category_key, label, row range) in catalog order"""
+        for category_key, (label, start, stop) in self.categories.items():
+            yield category_key, label, range(start, stop)
+
+    def record(self, row):
+        """Fund data for a row in the original dict shape"""
+        fund_data = {'name': self.names[row], 'type': self.types[row]}
+        for field in METRIC_FIELDS:
+            fund_data[field] = self.columns[field][row]
+        fund_data['risk'] = self.risk(row)
+        return fund_data
+
+    def check_metrics(self, fields):
+        """Raise KeyError for any field set_metrics cannot write"""
+        for field in fields:
+            if field != 'risk' and field not in self.columns:
+                raise KeyError(f"Unknown metric: {field}")
+
+    def set_metrics(self, symbol, **values):
+        """Overwrite metric fields (and optionally risk) for one symbol in place.
+
+        Every field is checked before any is written, so an unknown one
+        leaves the row untouched.
+        """
+        row = self.index[symbol]
+        self.check_metrics(values)
+        for field, value in values.items():
+            if field == 'risk':
+                self.risk_codes[row] = self.risk_code(value)
+            else:
+                self.columns[field][row] = value
+        return row
+
+    def view(self):
+        """Read-only nested view matching the legacy self.funds layout"""
+        return FundsView(self)
+
+
+class FundsView(Mapping):
+    """Read-only {category: {'category', 'funds'}} view backed by a FundStore"""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, category_key):
+        label, _, _ = self._store.categories[category_key]
+        return MappingProxyType({
+            'category': label,
+            'funds': CategoryFundsView(self._store, category_key),
+        })
+
+    def __iter__(self):
+        return iter(self._store.categories)
+
+    def __len__(self):
+        return len(self._store.categories)
+
+
+class CategoryFundsView(Mapping):
+    """Read-only {symbol: fund_data} view over one category's row range"""
+
+    def __init__(self, store, category_key):
+        self._store = store
+        self._rows = store.category_rows(category_key)
+
+    def __getitem__(self, symbol):
+        row = self._store.get(symbol)
+        if row is None or row not in self._rows:
+            raise KeyError(symbol)
+        return MappingProxyType(self._store.record(row))
+
+    def __contains__(self, symbol):
+        row = self._store.get(symbol)
+        return row is not None and row in self._rows
+
+    def __iter__(self):
+        symbols = self._store.symbols
+        return (symbols[row] for row in self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+def read_fund(path, symbol):
+    """(category_key, label, record) for one symbol, scanning a save()d file line by line.
+
+    Avoids parsing the whole catalog for single-fund queries; returns None when
+    the symbol is not found, including in files not laid out by save().
+    """
+    prefix = json.dumps([symbol])[:-1]
+    category = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{"key"'):
+                category = json.loads(line.removesuffix('"funds": [').rstrip().rstrip(',') + '}')
+            elif line.startswith(prefix) and category is not None:
+                values = json.loads(line.rstrip(','))
+                if len(values) != len(ROW_FIELDS):
+                    return None
+                record = dict(zip(ROW_FIELDS[1:], values[1:]))
+                return category['key'], category['label'], record
+    return None
@@ -0,0 +1,203 @@
+"""
+Incremental Recompute
+Symbol → strategy reverse index, dirty flags and cached per-strategy aggregates
+"""
+
+from array import array
+from operator import mul
+
+import report
+from strategy_engine import HORIZONS, BatchResult, WeightMatrix, evaluate
+
+
+class DependencyIndex:
+    """Reverse (CSC) index of a WeightMatrix: store row → positions (and weights) of the allocations holding it"""
+
+    def __init__(self, matrix):
+        n_rows = matrix.n_columns
+        counts = array('l', bytes(8 * (n_rows + 1)))
+        for column in matrix.indices:
+            counts[column + 1] += 1
+        for row in range(n_rows):
+            counts[row + 1] += counts[row]
+        self.indptr = array('l', counts)
+        cursor = array('l', counts[:-1])
+        self.positions = array('l', bytes(8 * len(matrix.indices)))
+        self.weights = array('d', bytes(8 * len(matrix.indices)))
+        for position in range(len(matrix)):
+            for k in range(matrix.indptr[position], matrix.indptr[position + 1]):
+                row = matrix.indices[k]
+                self.positions[cursor[row]] = position
+                self.weights[cursor[row]] = matrix.data[k]
+                cursor[row] += 1
+
+    def dependents(self, row):
+        """Positions of the allocations holding one store row"""
+        return self.positions[self.indptr[row]:self.indptr[row + 1]]
+
+    def column(self, row):
+        """(positions, weights) of the allocations holding one store row"""
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        return self.positions[start:stop], self.weights[start:stop]
+
+
+class IncrementalEvaluator:
+    """evaluate() results kept current as individual fund metrics change.
+
+    Fund updates only mark the allocations that hold the fund as dirty; refresh()
+    recomputes those rows from their own holdings (the same sums evaluate() does,
+    so results stay bit-identical to a full rerun) and leaves every other cached
+    aggregate untouched.
+    """
+
+    def __init__(self, store, allocations, horizon='one_yr', amount=1000.0):
+        self.store = store
+        self.horizon = horizon
+        self.amount = amount
+        self.matrix = WeightMatrix.from_allocations(store, allocations)
+        self.dependencies = DependencyIndex(self.matrix)
+        self.result = evaluate(store, self.matrix, horizon=horizon, amount=amount)
+        self.positions = {key: i for i, key in enumerate(self.matrix.keys)}
+        self.dirty = bytearray(len(self.matrix))
+        self.pending = []
+        self.listeners = []
+
+    @property
+    def keys(self):
+        return self.matrix.keys
+
+    def mark_rows(self, rows):
+        """Flag every allocation holding any of the store rows; returns how many were newly flagged"""
+        dirty, pending = self.dirty, self.pending
+        flagged = 0
+        for row in rows:
+            for position in self.dependencies.dependents(row):
+                if not dirty[position]:
+                    dirty[position] = 1
+                    pending.append(position)
+                    flagged += 1
+        return flagged
+
+    def mark(self, symbols):
+        """Flag allocations holding any of the symbols (after an external store update)"""
+        index = self.store.index
+        return self.mark_rows(index[s] for s in symbols if s in index)
+
+    def update(self, symbol, **values):
+        """Set one fund's metrics in the store and flag its dependents"""
+        return self.mark_rows((self.store.set_metrics(symbol, **values),))
+
+    def update_many(self, updates):
+        """Apply {symbol: {field: value}} and flag dependents once per allocation.
+
+        Symbols and fields are all resolved before anything is written, so an
+        unknown one raises with the store and the dirty flags unchanged.
+        """
+        store = self.store
+        rows = [store.index[symbol] for symbol in updates]
+        for values in updates.values():
+            store.check_metrics(values)
+        for symbol, values in updates.items():
+            store.set_metrics(symbol, **values)
+        return self.mark_rows(rows)
+
+    def refresh(self):
+        """Recompute dirty allocations only; returns their keys and notifies listeners"""
+        if not self.pending:
+            return []
+        store, matrix, amount = self.store, self.matrix, self.amount
+        columns = self.result.columns
+        returns = store.columns[self.horizon]
+        dividend = store.columns['dividend']
+        expense = store.columns['expense_ratio']
+        years = HORIZONS[self.horizon]
+
+        positions = sorted(self.pending)
+        for position in positions:
+            start, stop = matrix.indptr[position], matrix.indptr[position + 1]
+            rows = matrix.indices[start:stop]
+            weights = matrix.data[start:stop]
+            weight = sum(weights)
+            blended = sum(map(mul, weights, [returns[r] for r in rows]))
+            if years == 1:
+                growth = weight + blended
+            else:
+                growth = sum(map(mul, weights, [(1 + returns[r]) ** years for r in rows]))
+            invested = amount * weight
+            ending_value = amount * growth
+            columns['weight'][position] = weight
+            columns['blended_return'][position] = blended
+            columns['yield'][position] = sum(map(mul, weights, [dividend[r] for r in rows]))
+            columns['expense_ratio'][position] = sum(map(mul, weights, [expense[r] for r in rows]))
+            columns['invested'][position] = invested
+            columns['ending_value'][position] = ending_value
+            columns['gain'][position] = ending_value - invested
+            self.dirty[position] = 0
+        self.pending = []
+
+        keys = [matrix.keys[p] for p in positions]
+        for listener in self.listeners:
+            listener(keys)
+        return keys
+
+    def __getitem__(self, key):
+        self.refresh()
+        return self.result.row(self.positions[key])
+
+    def snapshot(self):
+        """Current results as a BatchResult (refreshing dirty rows first)"""
+        self.refresh()
+        return BatchResult(self.result.keys, self.horizon, {f: array('d', v) for f, v in self.result.columns.items()})
+
+
+class IncrementalReport:
+    """Report sections and comparison rows rebuilt only for strategies whose funds changed.
+
+    tiers is a callable returning {key: measured risk tier}; it is read on
+    every rebuild, so comparison risk labels follow both fund re-tiering and
+    newly measured strategy tiers.
+    """
+
+    def __init__(self, store, strategies, horizon='one_yr', tiers=None):
+        self.store = store
+        self.strategies = strategies
+        self.tiers = tiers or dict
+        self.evaluator = IncrementalEvaluator(
+            store, {key: s['allocation'] for key, s in strategies.items()}, horizon=horizon)
+        self.evaluator.listeners.append(self._rebuild)
+        self.comparison = {}
+        self.sections = {}
+        self.rows = {}
+        self._rebuild(list(strategies))
+
+    def _rebuild(self, keys):
+        tiers = self.tiers()
+        for key in keys:
+            strategy = self.strategies[key]
+            self.comparison[key] = report.comparison_row(self.store, key, strategy, tiers.get(key))
+            self.sections[key] = report.build_strategy(self.store, key, strategy)
+            self.rows[key] = {**self.comparison[key], **self.evaluator.result.row(self.evaluator.positions[key])}
+
+    def refresh_risk(self):
+        """Recompute every comparison risk label (measured strategy tiers can move without any fund changing)"""
+        self.evaluator.refresh()
+        tiers = self.tiers()
+        for key, strategy in self.strategies.items():
+            risk = report.comparison_risk(self.store, strategy['allocation'], tiers.get(key))
+            self.comparison[key]['risk'] = self.rows[key]['risk'] = risk
+
+    def update(self, updates):
+        """Apply {symbol: {field: value}}; returns the strategy keys that were recomputed"""
+        self.evaluator.update_many(updates)
+        return self.evaluator.refresh()
+
+    def comparison_rows(self):
+        """Comparison rows with live metrics, in strategy order"""
+        self.evaluator.refresh()
+        return [self.rows[key] for key in self.strategies]
+
+    def model(self, generated=None):
+        """ReportModel over the cached sections"""
+        self.evaluator.refresh()
+        return report.ReportModel(self.store, [self.comparison[key] for key in self.strategies],
+                                  [self.sections[key] for key in self.strategies], generated=generated)
@@ -0,0 +1,149 @@
+"""
+Instrumentation
+Opt-in timing spans and counters; a shared no-op object when profiling is off
+"""
+
+import json
+import os
+import re
+import time
+
+PROMETHEUS_PREFIX = 'portfolio'
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+class Span:
+    """Times one block; nested spans are recorded under 'parent/child' paths"""
+
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        stack = self.profiler._stack
+        self.profiler.record('/'.join(stack), elapsed)
+        stack.pop()
+        return False
+
+
+class Profiler:
+    """Aggregated span timings {path: [calls, total_s, max_s]} and counters {name: value}"""
+
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self._stack = []
+        self.started = time.perf_counter()
+
+    def record(self, path, elapsed):
+        stats = self.spans.get(path)
+        if stats is None:
+            self.spans[path] = [1, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+
+    def snapshot(self):
+        return {
+            'wall_ms': (time.perf_counter() - self.started) * 1000,
+            'spans': {
+                path: {'calls': calls, 'total_ms': total * 1000, 'mean_ms': total / calls * 1000, 'max_ms': peak * 1000}
+                for path, (calls, total, peak) in self.spans.items()
+            },
+            'counters': dict(self.counters),
+        }
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Prometheus text exposition of every span and counter"""
+        lines = [
+            f"# HELP {prefix}_span_seconds_total Wall time spent in each instrumented span",
+            f"# TYPE {prefix}_span_seconds_total counter",
+        ]
+        lines += [f'{prefix}_span_seconds_total{{span="{_label(p)}"}} {s[1]:.9f}' for p, s in self.spans.items()]
+        lines += [
+            f"# HELP {prefix}_span_calls_total Times each span was entered",
+            f"# TYPE {prefix}_span_calls_total counter",
+        ]
+        lines += [f'{prefix}_span_calls_total{{span="{_label(p)}"}} {s[0]}' for p, s in self.spans.items()]
+        lines += [
+            f"# HELP {prefix}_span_max_seconds Slowest single call of each span",
+            f"# TYPE {prefix}_span_max_seconds gauge",
+        ]
+        lines += [f'{prefix}_span_max_seconds{{span="{_label(p)}"}} {s[2]:.9f}' for p, s in self.spans.items()]
+        for name, value in self.counters.items():
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the JSON breakdown to path and Prometheus text next to it (.prom)"""
+        root, ext = os.path.splitext(path)
+        if ext == '.prom':
+            raise ValueError(f"Profile path {path} would be overwritten by its .prom file; use e.g. {root}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        prom_path = root + '.prom'
+        with open(prom_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        return path, prom_path
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Active profiler, or None when instrumentation is off
+_profiler = None
+
+
+def span(name):
+    """Context manager timing a block; the shared NOOP when profiling is off"""
+    if _profiler is None:
+        return NOOP
+    return Span(_profiler, name)
+
+
+def count(name, n=1):
+    if _profiler is not None:
+        counters = _profiler.counters
+        counters[name] = counters.get(name, 0) + n
+
+
+def enabled():
+    return _profiler is not None
+
+
+def enable():
+    """Start collecting into a fresh Profiler and return it"""
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    """Stop collecting and return the Profiler that was active, if any"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+API Load Test
+Keep-alive connections hammering the recommendation API, reporting throughput and latency percentiles
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+DEFAULT_PATHS = (
+    '/quiz/1/1/1', '/quiz/2/3/2', '/quiz/4/4/4', '/quiz/3/4/4',
+    '/strategies', '/strategies/strategy_3', '/funds/QQQ', '/categories/etf_bonds',
+)
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head[9:12])
+    start = head.lower().find(b'content-length:')
+    if start >= 0:
+        length = int(head[start + 15:head.find(b'\r\n', start)])
+        await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, paths, deadline, latencies, statuses, etags):
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            path = rng.choice(paths)
+            conditional = f"If-None-Match: {etags[path]}\r\n" if path in etags else ''
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{conditional}\r\n".encode())
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def _fetch_etags(host, port, paths):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    for path in paths:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+        head = await reader.readuntil(b'\r\n\r\n')
+        for line in head.decode('latin-1').split('\r\n'):
+            if line.lower().startswith('etag:'):
+                etags[path] = line[5:].strip()
+            elif line.lower().startswith('content-length:'):
+                await reader.readexactly(int(line[15:]))
+    writer.close()
+    return etags
+
+
+def percentile(ordered, p):
+    """p-th percentile of sorted values, or None when there are none"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run(host, port, connections=32, duration=5.0, paths=DEFAULT_PATHS, conditional=False):
+    """Returns {'requests', 'rps', 'statuses', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}.
+
+    Latencies are None when no response completed in time.
+    """
+    etags = await _fetch_etags(host, port, paths) if conditional else {}
+    latencies = []
+    statuses = {}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _client(host, port, paths, deadline, latencies, statuses, etags) for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'rps': len(ordered) / elapsed,
+        'statuses': statuses,
+        **{f"p{p}_ms": percentile(ordered, p) * 1000 if ordered else None for p in (50, 90, 99)},
+        'max_ms': ordered[-1] * 1000 if ordered else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the recommendation API (python api.py)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--connections', type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds to run")
+    parser.add_argument('--conditional', action='store_true', help="send If-None-Match (304 path)")
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.connections, args.duration,
+                             tuple(args.paths), args.conditional))
+    print(f"{result['requests']:,} requests in {args.duration:.1f}s "
+          f"({result['rps']:,.0f} req/s over {args.connections} connections)")
+    print(f"status counts: {result['statuses']}")
+    if result['requests']:
+        print(f"latency ms  p50 {result['p50_ms']:.3f}  p90 {result['p90_ms']:.3f}  "
+              f"p99 {result['p99_ms']:.3f}  max {result['max_ms']:.3f}")
+    else:
+        print("latency ms  n/a (no responses completed)")
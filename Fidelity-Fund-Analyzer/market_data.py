@@ -0,0 +1,361 @@
+"""
+Market Data Providers
+Async quote / trailing-return refresh over pooled keep-alive HTTP connections
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote, urlsplit
+
+from fund_store import METRIC_FIELDS
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ProviderError(Exception):
+    """A batch could not be fetched after all retries"""
+
+
+class TTLCache:
+    """LRU cache whose entries expire ttl seconds after they were stored"""
+
+    def __init__(self, maxsize=10_000, ttl=900.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Shared by every provider in the process unless one is passed explicitly,
+# so repeated report runs in one session reuse fresh quotes
+DEFAULT_CACHE = TTLCache()
+
+
+class ConnectionPool:
+    """At most `size` keep-alive connections to one host, reused across requests"""
+
+    def __init__(self, host, port, size=8, ssl=None, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self.opened = 0
+
+    async def acquire(self):
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            connection = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+        self.opened += 1
+        return connection
+
+    def release(self, connection, reusable=True):
+        if reusable:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+        self._slots.release()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+async def _read_response(reader):
+    """(status, headers, body) for one HTTP/1.1 response (Content-Length or chunked)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed by server")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        return status, headers, bytes(body)
+    return status, headers, await reader.readexactly(int(headers.get('content-length', 0)))
+
+
+class MarketDataProvider(ABC):
+    """Interface: fetch(symbols) -> {symbol: {'price': ..., <metric field>: ...}}"""
+
+    @abstractmethod
+    async def fetch(self, symbols):
+        """{symbol: {'price': ..., <metric field>: ...}} for the symbols it could quote"""
+
+    async def close(self):
+        pass
+
+
+class HttpProvider(MarketDataProvider):
+    """JSON quotes from GET <url>?symbols=A,B,C, batched over a bounded connection pool.
+
+    Batches run concurrently, so wall time scales with batches / pool_size
+    round-trips instead of one round-trip per symbol.
+    """
+
+    def __init__(self, url, batch_size=100, pool_size=8, retries=3, backoff=0.25,
+                 timeout=10.0, cache=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        self.host = parts.hostname
+        self.path = parts.path or '/'
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = DEFAULT_CACHE if cache is None else cache
+        self.pool = ConnectionPool(
+            self.host, parts.port or (443 if parts.scheme == 'https' else 80),
+            size=pool_size, ssl=parts.scheme == 'https' or None, timeout=timeout)
+        self.requests = 0
+
+    async def fetch(self, symbols):
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            cached = self.cache.get(symbol)
+            if cached is None:
+                missing.append(symbol)
+            else:
+                results[symbol] = cached
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        for payload in await asyncio.gather(*map(self._fetch_batch, batches)):
+            for symbol, values in payload.items():
+                self.cache.put(symbol, values)
+                results[symbol] = values
+        return results
+
+    async def _fetch_batch(self, batch):
+        target = f"{self.path}?symbols={quote(','.join(batch), safe=',')}"
+        for attempt in range(self.retries + 1):
+            try:
+                status, body = await asyncio.wait_for(self._get(target), self.timeout)
+                if status == 200:
+                    return json.loads(body)
+                if status not in RETRY_STATUSES:
+                    raise ProviderError(f"HTTP {status} for {len(batch)} symbols")
+                error = ProviderError(f"HTTP {status} after {attempt + 1} attempts")
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                error = ProviderError(f"{type(e).__name__}: {e}")
+            if attempt < self.retries:
+                # Exponential backoff with full jitter
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise error
+
+    async def _get(self, target):
+        reader, writer = connection = await self.pool.acquire()
+        reusable = False
+        try:
+            writer.write(
+                f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Accept: application/json\r\nConnection: keep-alive\r\n\r\n".encode())
+            await writer.drain()
+            status, headers, body = await _read_response(reader)
+            self.requests += 1
+            reusable = headers.get('connection', '').lower() != 'close'
+            return status, body
+        finally:
+            self.pool.release(connection, reusable)
+
+    async def close(self):
+        await self.pool.close()
+
+
+def refresh(store, provider, symbols=None):
+    """Fetch every (or the given) symbol and overwrite store metrics, returning the quotes"""
+    symbols = list(store.symbols if symbols is None else symbols)
+
+    async def run():
+        try:
+            return await provider.fetch(symbols)
+        finally:
+            await provider.close()
+
+    quotes = asyncio.run(run())
+    for symbol, values in quotes.items():
+        metrics = {field: values[field] for field in METRIC_FIELDS if field in values}
+        if symbol in store and metrics:
+            store.set_metrics(symbol, **metrics)
+    return quotes
+
+
+# ── Local stub server (tests and offline runs) ────────────────────
+
+
+def stub_quote(symbol):
+    """Deterministic fake quote for a symbol"""
+    seed = int.from_bytes(hashlib.sha1(symbol.encode()).digest()[:8], 'big')
+    rng = random.Random(seed)
+    return {
+        'price': round(rng.uniform(10, 500), 2),
+        'ytd': round(rng.uniform(-0.1, 0.3), 4),
+        'one_yr': round(rng.uniform(-0.15, 0.6), 4),
+        'three_yr': round(rng.uniform(-0.05, 0.4), 4),
+        'dividend': round(rng.uniform(0, 0.05), 4),
+    }
+
+
+class StubServer:
+    """Keep-alive HTTP server answering GET /quotes?symbols=... with stub_quote data.
+
+    latency delays every response; fail_every=n answers every nth request with 503.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, fail_every=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.connections = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/quotes"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                self.requests += 1
+                number = self.requests      # taken before yielding: other connections count on meanwhile
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, body = self._respond(request_line.decode('latin-1').split()[1], number)
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + body)
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, target, number):
+        if self.fail_every and number % self.fail_every == 0:
+            return 503, b'{}'
+        parts = urlsplit(target)
+        if parts.path != '/quotes':
+            return 404, b'{}'
+        query = parse_qs(parts.query).get('symbols', [''])[0]
+        symbols = [s for s in query.split(',') if s]
+        return 200, json.dumps({s: stub_quote(s) for s in symbols}).encode()
+
+
+def check(symbols=500, batch_size=20, fail_every=3, latency=0.01):
+    """Fetch from a flaky stub with concurrent batches; raises AssertionError unless retries recovered every quote.
+
+    Returns (batches, requests served). With every fail_every-th request
+    answered 503, the server must see more requests than there are batches.
+    """
+    wanted = [f"S{i:05d}" for i in range(symbols)]
+    batches = -(-symbols // batch_size)
+
+    async def run():
+        async with StubServer(latency=latency, fail_every=fail_every) as server:
+            provider = HttpProvider(server.url, batch_size=batch_size, retries=5, backoff=0.01, cache=TTLCache())
+            try:
+                quotes = await provider.fetch(wanted)
+            finally:
+                await provider.close()
+            return quotes, server.requests
+
+    quotes, served = asyncio.run(run())
+    assert quotes == {s: stub_quote(s) for s in wanted}, "quotes missing or wrong after retries"
+    assert served > batches, f"expected retried requests: {served} served for {batches} batches"
+    assert served - batches >= batches // fail_every, f"too few retries: {served} served for {batches} batches"
+    return batches, served
+
+
+if __name__ == "__main__":
+    import sys
+
+    async def serve(port):
+        server = await StubServer(port=port).start()
+        print(f"Stub quotes at {server.url}")
+        await server._server.serve_forever()
+
+    if sys.argv[1:] == ['--check']:
+        batches, served = check()
+        print(f"OK: {batches} batches, {served} requests served ({served - batches} retried)")
+    else:
+        asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8765))
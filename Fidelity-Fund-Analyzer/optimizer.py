@@ -0,0 +1,346 @@
+"""
+Mean-Variance Optimizer
+Cached single-index covariance + constrained efficient frontier
+"""
+
+import json
+import math
+import os
+from itertools import compress, repeat
+from operator import add, is_not, mul, sub, truediv
+
+TRADING_DAYS = 252
+MIN_OBSERVATIONS = 60
+STATS_FILE = 'covariance.json'
+
+# Frontier trade-off grid: minimize ½w'Σw - t·μ'w for each t
+FRONTIER_TRADEOFFS = (0.0, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 100.0)
+
+
+class SingleIndexCovariance:
+    """Σ = σ²ₘ·ββ' + diag(σ²ₑ), estimated from daily total returns in a PriceCache.
+
+    Only per-symbol sufficient statistics are kept (and persisted next to the
+    cache), so appending new days updates the model in O(new rows) and Σw
+    costs O(n) instead of O(n²).
+    """
+
+    def __init__(self, store, cache, benchmark='VTI'):
+        self.store = store
+        self.cache = cache
+        self.benchmark = benchmark if benchmark in cache else next(iter(cache.symbols()), None)
+        if self.benchmark is None:
+            raise ValueError("Price cache is empty; ingest price history first")
+        self.stats_path = os.path.join(cache.cache_dir, STATS_FILE)
+        self.stats = self._load_stats()
+        self.version = 0
+        self._bench_returns = {}    # date -> benchmark total return, for bench rows [1, _bench_rows)
+        self._bench_rows = 1
+        self.update()
+
+    def _load_stats(self):
+        try:
+            with open(self.stats_path, encoding='utf-8') as f:
+                stats = json.load(f)
+        except FileNotFoundError:
+            return {'benchmark': self.benchmark, 'market': None, 'symbols': {}}
+        if stats.get('benchmark') != self.benchmark:
+            return {'benchmark': self.benchmark, 'market': None, 'symbols': {}}
+        return stats
+
+    def _save_stats(self):
+        tmp_path = self.stats_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, separators=(',', ':'))
+        os.replace(tmp_path, self.stats_path)
+
+    def update(self):
+        """Fold any rows appended to the cache since the last update; True if anything changed"""
+        bench = self.cache.series(self.benchmark)
+        last_bench_date = bench.dates[-1] if len(bench) else 0
+
+        changed = False
+        market = self.stats['market'] or {'rows': 1, 'n': 0, 's': 0.0, 'ss': 0.0}
+        if len(bench) > market['rows']:
+            m = _total_returns(bench, market['rows'])
+            market.update({
+                'rows': len(bench),
+                'n': market['n'] + len(m),
+                's': market['s'] + sum(m),
+                'ss': market['ss'] + sum(map(mul, m, m)),
+            })
+            changed = True
+        self.stats['market'] = market
+
+        symbols = self.stats['symbols']
+        for symbol in self.store.symbols:
+            if symbol not in self.cache:
+                continue
+            series = self.cache.series(symbol)
+            entry = symbols.get(symbol) or {'rows': 1, 'n': 0, 'sx': 0.0, 'sxx': 0.0,
+                                            'sm': 0.0, 'smm': 0.0, 'sxm': 0.0}
+            # Never consume days the benchmark has not reached yet
+            limit = series.index_on_or_before(last_bench_date) + 1
+            if limit <= entry['rows']:
+                symbols[symbol] = entry
+                continue
+
+            x = _total_returns(series, entry['rows'], limit)
+            m = list(map(self._benchmark_returns(bench).get, series.dates[entry['rows']:limit]))
+            matched = list(map(is_not, m, repeat(None)))
+            x = list(compress(x, matched))
+            m = list(compress(m, matched))
+            entry.update({
+                'rows': limit,
+                'n': entry['n'] + len(x),
+                'sx': entry['sx'] + sum(x),
+                'sxx': entry['sxx'] + sum(map(mul, x, x)),
+                'sm': entry['sm'] + sum(m),
+                'smm': entry['smm'] + sum(map(mul, m, m)),
+                'sxm': entry['sxm'] + sum(map(mul, x, m)),
+            })
+            symbols[symbol] = entry
+            changed = True
+
+        if changed:
+            self._save_stats()
+            self.version += 1
+        self._derive()
+        return changed
+
+    def _benchmark_returns(self, bench):
+        """{date: benchmark return}, extended by the rows appended since the last call only"""
+        if len(bench) > self._bench_rows:
+            tail = _total_returns(bench, self._bench_rows)
+            self._bench_returns.update(zip(bench.dates[self._bench_rows:], tail))
+            self._bench_rows = len(bench)
+        return self._bench_returns
+
+    def _derive(self):
+        """Annualized market variance, betas and residual variances per store row"""
+        market = self.stats['market']
+        n = market['n']
+        self.market_variance = _variance(n, market['s'], market['ss']) * TRADING_DAYS
+
+        size = len(self.store)
+        self.beta = [0.0] * size
+        self.residual = [0.0] * size
+        self.valid = [False] * size
+        for symbol, entry in self.stats['symbols'].items():
+            row = self.store.get(symbol)
+            if row is None or entry['n'] < MIN_OBSERVATIONS:
+                continue
+            k = entry['n']
+            var_m = _variance(k, entry['sm'], entry['smm'])
+            var_x = _variance(k, entry['sx'], entry['sxx'])
+            cov_xm = (entry['sxm'] - entry['sx'] * entry['sm'] / k) / (k - 1)
+            beta = cov_xm / var_m if var_m > 0 else 0.0
+            self.beta[row] = beta
+            self.residual[row] = max(var_x - beta * beta * var_m, 0.0) * TRADING_DAYS
+            self.valid[row] = True
+
+    def volatility(self, row):
+        return math.sqrt(self.beta[row] ** 2 * self.market_variance + self.residual[row])
+
+    def matvec(self, w):
+        """Σw for a dense weight vector over store rows"""
+        market = sum(map(mul, self.beta, w)) * self.market_variance
+        return list(map(add, map(mul, self.beta, repeat(market)), map(mul, self.residual, w)))
+
+    def quad(self, w):
+        """w'Σw for a dense weight vector"""
+        exposure = sum(map(mul, self.beta, w))
+        return exposure * exposure * self.market_variance + sum(map(mul, self.residual, map(mul, w, w)))
+
+    def portfolio_variance(self, rows, weights):
+        """w'Σw for a sparse allocation (same interface as monte_carlo.TierCovariance)"""
+        exposure = sum(self.beta[r] * w for r, w in zip(rows, weights))
+        idio = sum(self.residual[r] * w * w for r, w in zip(rows, weights))
+        return exposure * exposure * self.market_variance + idio
+
+    def matrix(self, rows):
+        """Dense Σ restricted to rows (for inspection / small catalogs)"""
+        return [[self.beta[i] * self.beta[j] * self.market_variance + (self.residual[i] if i == j else 0.0)
+                 for j in rows] for i in rows]
+
+
+class Constraints:
+    """Long-only weight limits for the optimizer"""
+
+    def __init__(self, max_weight=0.25, category_caps=None, min_bond=0.0, bond_categories=None):
+        self.max_weight = max_weight
+        self.category_caps = dict(category_caps or {})
+        self.min_bond = min_bond
+        self.bond_categories = set(bond_categories) if bond_categories is not None else None
+
+    def bounds(self, store, valid):
+        """Per-row upper bounds, per-row category key and per-row bond flag"""
+        upper = [self.max_weight if ok else 0.0 for ok in valid]
+        category = [None] * len(store)
+        is_bond = [False] * len(store)
+        for key, _, rows in store.iter_categories():
+            bond = key in self.bond_categories if self.bond_categories is not None else 'bond' in key
+            for row in rows:
+                category[row] = key
+                is_bond[row] = bond
+        return upper, category, is_bond
+
+
+class EfficientFrontier:
+    """Frank-Wolfe solver for min ½w'Σw - t·μ'w over the constraint polytope.
+
+    The linear subproblem over {Σw=1, 0≤w≤cap, category caps, bond floor} is
+    solved exactly by a greedy fill, so each iteration is O(n log n) with an
+    O(n) gradient from the factor covariance. Solutions are kept per t and
+    reused as warm starts after the covariance is incrementally updated.
+    """
+
+    def __init__(self, store, covariance, constraints=None, mean_field='three_yr',
+                 max_iter=500, tolerance=1e-5):
+        self.store = store
+        self.covariance = covariance
+        self.constraints = constraints or Constraints()
+        self.mean_field = mean_field
+        self.max_iter = max_iter
+        self.tolerance = tolerance
+        self._warm = {}
+        self._prepare()
+
+    def _prepare(self):
+        self.mu = list(self.store.columns[self.mean_field])
+        self.upper, self.category, self.is_bond = self.constraints.bounds(self.store, self.covariance.valid)
+        start = self._linear_oracle([0.0] * len(self.mu))
+        if start is None:
+            raise ValueError("Constraints are infeasible for the optimizable universe")
+        self._feasible = start
+
+    def refresh(self):
+        """Re-read μ after store/covariance updates; cached solutions stay as warm starts"""
+        self._prepare()
+
+    def _linear_oracle(self, gradient):
+        """Vertex minimizing gradient·s, or None if the polytope is empty"""
+        order = sorted(range(len(gradient)), key=gradient.__getitem__)
+        caps = self.constraints.category_caps
+        room = {key: caps.get(key, 1.0) for key in set(self.category)}
+        s = [0.0] * len(gradient)
+
+        def fill(budget, bonds_only):
+            for row in order:
+                if budget <= 1e-12:
+                    break
+                if bonds_only and not self.is_bond[row]:
+                    continue
+                key = self.category[row]
+                amount = min(self.upper[row] - s[row], room[key], budget)
+                if amount > 0:
+                    s[row] += amount
+                    room[key] -= amount
+                    budget -= amount
+            return budget
+
+        bond_floor = self.constraints.min_bond
+        if bond_floor > 0 and fill(bond_floor, True) > 1e-9:
+            return None
+        if fill(1.0 - bond_floor, False) > 1e-9:
+            return None
+        return s
+
+    def solve(self, tradeoff, start=None):
+        """Optimal weights (dense over store rows) for one risk/return trade-off"""
+        mu, cov = self.mu, self.covariance
+        w = list(start or self._warm.get(tradeoff) or self._nearest_warm(tradeoff) or self._feasible)
+
+        for _ in range(self.max_iter):
+            gradient = list(map(sub, cov.matvec(w), map(mul, mu, repeat(tradeoff))))
+            s = self._linear_oracle(gradient)
+            d = list(map(sub, s, w))
+            slope = sum(map(mul, gradient, d))
+            if -slope <= self.tolerance:
+                break
+            curvature = cov.quad(d)
+            step = 1.0 if curvature <= 0 else min(1.0, -slope / curvature)
+            w = list(map(add, w, map(mul, d, repeat(step))))
+
+        self._warm[tradeoff] = w
+        return w
+
+    def _nearest_warm(self, tradeoff):
+        if not self._warm:
+            return None
+        return self._warm[min(self._warm, key=lambda t: abs(t - tradeoff))]
+
+    def point(self, w):
+        """(expected return, volatility) of dense weights"""
+        return sum(map(mul, self.mu, w)), math.sqrt(max(self.covariance.quad(w), 0.0))
+
+    def frontier(self, tradeoffs=FRONTIER_TRADEOFFS):
+        """[{tradeoff, return, volatility, weights}] from min-variance to max-return"""
+        points = []
+        for t in tradeoffs:
+            w = self.solve(t)
+            ret, vol = self.point(w)
+            points.append({'tradeoff': t, 'return': ret, 'volatility': vol, 'weights': self.weights(w)})
+        return points
+
+    def target_volatility(self, target, iterations=20, tolerance=1e-4):
+        """Highest-return frontier portfolio whose volatility is closest to target"""
+        low, high = 0.0, FRONTIER_TRADEOFFS[-1]
+        best = self.solve(low)
+        if self.point(best)[1] >= target:
+            return best
+        top = self.solve(high)
+        if self.point(top)[1] <= target:
+            return top
+        for _ in range(iterations):
+            mid = math.sqrt(low * high) if low > 0 else high / 1000
+            w = self.solve(mid)
+            vol = self.point(w)[1]
+            if abs(vol - target) <= tolerance:
+                return w
+            if vol < target:
+                low, best = mid, w
+            else:
+                high = mid
+        return best
+
+    def weights(self, w, threshold=1e-4):
+        """Dense weights → {symbol: weight}, dropping dust"""
+        symbols = self.store.symbols
+        return {symbols[row]: weight for row, weight in enumerate(w) if weight > threshold}
+
+
+def risk_targeted_portfolios(store, strategies, covariance, constraints=None, frontier=None):
+    """For each strategy, the constrained frontier portfolio matching its modeled volatility"""
+    frontier = frontier or EfficientFrontier(store, covariance, constraints)
+    results = {}
+    for key, strategy in strategies.items():
+        allocation = {s: w for s, w in strategy['allocation'].items() if s in store}
+        rows, weights = store.rows(allocation), list(allocation.values())
+        target = math.sqrt(covariance.portfolio_variance(rows, weights))
+        w = frontier.target_volatility(target)
+        ret, vol = frontier.point(w)
+        results[key] = {
+            'target_volatility': target,
+            'expected_return': ret,
+            'volatility': vol,
+            'allocation': frontier.weights(w),
+        }
+    return results
+
+
+def _total_returns(series, start, stop=None):
+    """Daily distribution-inclusive returns for rows start..stop-1 (start ≥ 1)"""
+    stop = len(series) if stop is None else stop
+    start = max(start, 1)
+    if stop <= start:
+        return []
+    close, dist = series.close, series.distribution
+    growth = map(truediv, map(add, close[start:stop], dist[start:stop]), close[start - 1:stop - 1])
+    return list(map(sub, growth, repeat(1.0)))
+
+
+def _variance(n, total, total_sq):
+    if n < 2:
+        return 0.0
+    return max((total_sq - total * total / n) / (n - 1), 0.0)
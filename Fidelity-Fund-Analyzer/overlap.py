@@ -0,0 +1,324 @@
+"""
+Holdings Overlap
+Per-fund constituent weights → sparse fund × security matrix, pairwise overlap and look-through exposure
+"""
+
+import csv
+import os
+from array import array
+
+FUND_HEADERS = ('fund', 'fund_symbol', 'etf', 'portfolio')
+SECURITY_HEADERS = ('security', 'holding', 'constituent', 'ticker', 'symbol', 'cusip', 'isin')
+WEIGHT_HEADERS = ('weight',)
+PERCENT_HEADERS = ('percent', 'pct', 'weight_pct', '% of net assets', 'percent_of_fund')
+
+
+# ── Loading ────────────────────────────────────────────────────────
+
+
+def _column(names, candidates):
+    for candidate in candidates:
+        if candidate in names:
+            return names.index(candidate)
+    return None
+
+
+def read_holdings_csv(path, fund=None):
+    """Yield (fund, security, weight) from a CSV of constituent weights.
+
+    Per-fund files (fund=None → file stem, e.g. holdings/SMH.csv) need a security
+    column and a weight (fraction) or percent column; combined files also need
+    a fund column.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        names = [name.strip().lower() for name in next(reader, [])]
+        fund_idx = _column(names, FUND_HEADERS)
+        security_idx = _column(names, SECURITY_HEADERS)
+        weight_idx = _column(names, WEIGHT_HEADERS)
+        scale = 1.0
+        if weight_idx is None:
+            weight_idx = _column(names, PERCENT_HEADERS)
+            scale = 0.01
+        if security_idx is None or weight_idx is None:
+            raise ValueError(f"{path}: expected a security column and a weight or percent column")
+        if fund is None and fund_idx is None:
+            fund = os.path.splitext(os.path.basename(path))[0]
+        fund = fund.upper() if fund else None
+
+        for record in reader:
+            if not record or not record[security_idx].strip():
+                continue
+            value = record[weight_idx].strip().rstrip('%').replace(',', '')
+            if not value:
+                continue
+            owner = fund or record[fund_idx].strip().upper()
+            yield owner, record[security_idx].strip().upper(), float(value) * scale
+
+
+def load_holdings(path, symbols=None):
+    """HoldingsMatrix from a directory of per-fund CSVs or one combined CSV.
+
+    Only funds in symbols (when given) are loaded.
+    """
+    wanted = set(symbols) if symbols is not None else None
+    if os.path.isdir(path):
+        sources = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith('.csv')
+            and (wanted is None or os.path.splitext(name)[0].upper() in wanted)
+        )
+    else:
+        sources = [path]
+
+    holdings = {}
+    for source in sources:
+        for fund, security, weight in read_holdings_csv(source):
+            if wanted is not None and fund not in wanted:
+                continue
+            constituents = holdings.setdefault(fund, {})
+            constituents[security] = constituents.get(security, 0.0) + weight
+
+    matrix = HoldingsMatrix()
+    for fund, constituents in holdings.items():
+        matrix.add_fund(fund, constituents)
+    return matrix
+
+
+# ── Sparse matrix ──────────────────────────────────────────────────
+
+
+class HoldingsMatrix:
+    """CSR fund × security weights, with a lazily built CSC (security → funds) inverted index.
+
+    Securities are interned to integer columns and each fund's row is stored
+    sorted by column, so pairwise overlap is a merge and nothing is densified.
+    """
+
+    def __init__(self):
+        self.funds = []
+        self.fund_index = {}
+        self.securities = []
+        self.security_index = {}
+        self.indptr = array('l', [0])
+        self.indices = array('l')
+        self.data = array('d')
+        self._csc = None
+
+    def __len__(self):
+        return len(self.funds)
+
+    def __contains__(self, fund):
+        return fund in self.fund_index
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def security_id(self, security):
+        column = self.security_index.get(security)
+        if column is None:
+            column = len(self.securities)
+            self.securities.append(security)
+            self.security_index[security] = column
+        return column
+
+    def add_fund(self, fund, constituents):
+        """Append one fund's {security: weight} row"""
+        if fund in self.fund_index:
+            raise ValueError(f"Duplicate fund: {fund}")
+        entries = sorted((self.security_id(s), w) for s, w in constituents.items() if w > 0)
+        self.fund_index[fund] = len(self.funds)
+        self.funds.append(fund)
+        self.indices.extend(column for column, _ in entries)
+        self.data.extend(weight for _, weight in entries)
+        self.indptr.append(len(self.indices))
+        self._csc = None
+
+    def row(self, i):
+        """(security columns, weights) for one fund row"""
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+    def holdings(self, fund):
+        """{security: weight} for one fund"""
+        columns, weights = self.row(self.fund_index[fund])
+        securities = self.securities
+        return {securities[c]: w for c, w in zip(columns, weights)}
+
+    def coverage(self, fund):
+        """Total disclosed constituent weight of one fund"""
+        _, weights = self.row(self.fund_index[fund])
+        return sum(weights)
+
+    def csc(self):
+        """(indptr, fund rows, weights) grouped by security column, built once in O(nnz)"""
+        if self._csc is None:
+            n_columns = len(self.securities)
+            counts = array('l', bytes(8 * (n_columns + 1)))
+            for column in self.indices:
+                counts[column + 1] += 1
+            for column in range(n_columns):
+                counts[column + 1] += counts[column]
+            indptr = array('l', counts)
+            cursor = array('l', counts[:-1])
+            rows = array('l', bytes(8 * self.nnz))
+            data = array('d', bytes(8 * self.nnz))
+            for fund_row in range(len(self.funds)):
+                for position in range(self.indptr[fund_row], self.indptr[fund_row + 1]):
+                    column = self.indices[position]
+                    slot = cursor[column]
+                    rows[slot] = fund_row
+                    data[slot] = self.data[position]
+                    cursor[column] = slot + 1
+            self._csc = (indptr, rows, data)
+        return self._csc
+
+    def holders(self, security):
+        """{fund: weight} of every fund holding a security"""
+        column = self.security_index.get(security)
+        if column is None:
+            return {}
+        indptr, rows, data = self.csc()
+        start, stop = indptr[column], indptr[column + 1]
+        return {self.funds[r]: w for r, w in zip(rows[start:stop], data[start:stop])}
+
+
+# ── Overlap ────────────────────────────────────────────────────────
+
+
+def overlap(matrix, a, b):
+    """Weighted overlap Σ min(wa, wb) over shared securities, and the shared count"""
+    ca, wa = matrix.row(matrix.fund_index[a])
+    cb, wb = matrix.row(matrix.fund_index[b])
+    i = j = shared = 0
+    total = 0.0
+    while i < len(ca) and j < len(cb):
+        if ca[i] == cb[j]:
+            total += wa[i] if wa[i] < wb[j] else wb[j]
+            shared += 1
+            i += 1
+            j += 1
+        elif ca[i] < cb[j]:
+            i += 1
+        else:
+            j += 1
+    return total, shared
+
+
+def overlaps_with(matrix, fund, min_overlap=0.0):
+    """{other fund: weighted overlap} against every fund sharing a security.
+
+    Walks the fund's row and, per security, its inverted-index column: the cost
+    is the number of (security, holder) pairs touched, not funds × securities.
+    """
+    columns, weights = matrix.row(matrix.fund_index[fund])
+    indptr, rows, data = matrix.csc()
+    own = matrix.fund_index[fund]
+    totals = {}
+    for column, weight in zip(columns, weights):
+        for position in range(indptr[column], indptr[column + 1]):
+            other = rows[position]
+            if other != own:
+                value = data[position]
+                totals[other] = totals.get(other, 0.0) + (weight if weight < value else value)
+    funds = matrix.funds
+    return {funds[r]: total for r, total in totals.items() if total > min_overlap}
+
+
+def pairwise(matrix, funds=None, min_overlap=0.0):
+    """{(a, b): weighted overlap} for every overlapping pair (a before b in matrix order).
+
+    Row-by-row sparse product (Gustavson's algorithm with min in place of
+    multiply) over the rows of funds when given, all rows otherwise. The
+    inverted index is built on the fly, only for the columns those rows use,
+    and each row is paired with the earlier rows already in it, so pairs with
+    no shared security never materialize and nothing global is copied.
+    """
+    if funds is None:
+        fund_rows = range(len(matrix))
+    else:
+        index = matrix.fund_index
+        fund_rows = sorted({index[f] for f in funds if f in index})
+    names = matrix.funds
+    holders = {}    # column -> [(earlier fund row, weight)]
+    result = {}
+    for b in fund_rows:
+        columns, weights = matrix.row(b)
+        totals = {}
+        for column, weight in zip(columns, weights):
+            held = holders.get(column)
+            if held is None:
+                holders[column] = [(b, weight)]
+                continue
+            for a, value in held:
+                totals[a] = totals.get(a, 0.0) + (weight if weight < value else value)
+            held.append((b, weight))
+        for a, total in totals.items():
+            if total > min_overlap:
+                result[(names[a], names[b])] = total
+    return result
+
+
+# ── Look-through exposure ──────────────────────────────────────────
+
+
+class Exposure:
+    """Security-level exposure of one allocation through its funds' holdings"""
+
+    def __init__(self, weights, sources, nominal, covered, missing):
+        self.weights = weights      # {security: allocation-weighted exposure}
+        self.sources = sources      # {security: {fund: contribution}}
+        self.nominal = nominal      # Σ allocation weights
+        self.covered = covered      # allocation weight with holdings data
+        self.missing = missing      # funds without holdings data
+
+    def top(self, k=10):
+        """[(security, exposure, {fund: contribution})] largest first"""
+        ranked = sorted(self.weights.items(), key=lambda x: (-x[1], x[0]))[:k]
+        return [(security, weight, self.sources[security]) for security, weight in ranked]
+
+    def concentration(self):
+        """Herfindahl index of look-through exposure (1 / effective number of securities)"""
+        total = sum(self.weights.values())
+        if not total:
+            return 0.0
+        return sum((w / total) ** 2 for w in self.weights.values())
+
+
+def look_through(matrix, allocation):
+    """Exposure of {fund: weight} = allocationᵀ · holdings, touching only held rows"""
+    exposure = {}
+    sources = {}
+    covered = 0.0
+    missing = []
+    securities = matrix.securities
+    for fund, weight in allocation.items():
+        fund_row = matrix.fund_index.get(fund)
+        if fund_row is None:
+            missing.append(fund)
+            continue
+        covered += weight
+        columns, weights = matrix.row(fund_row)
+        for column, value in zip(columns, weights):
+            security = securities[column]
+            contribution = weight * value
+            exposure[security] = exposure.get(security, 0.0) + contribution
+            sources.setdefault(security, {})[fund] = contribution
+    return Exposure(exposure, sources, sum(allocation.values()), covered, missing)
+
+
+def strategy_overlap(matrix, strategies, top=10, min_overlap=0.0):
+    """Per strategy: look-through exposure and overlapping holding pairs"""
+    results = {}
+    for key, strategy in strategies.items():
+        allocation = strategy['allocation']
+        exposure = look_through(matrix, allocation)
+        pairs = pairwise(matrix, allocation, min_overlap=min_overlap)
+        results[key] = {
+            'name': strategy['name'],
+            'exposure': exposure,
+            'top': exposure.top(top),
+            'pairs': sorted(pairs.items(), key=lambda x: -x[1]),
+        }
+    return results
@@ -7,598 +7,772 @@ Stocks + ETFs + Mutual Funds
 
 import sys
 import os
-from datetime import datetime
+from functools import partial
+
+from fund_store import FundStore
 
 if sys.platform == 'win32':
     os.environ['PYTHONIOENCODING'] = 'utf-8'
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
-class PortfolioAnalyzer:
-    def __init__(self):
-        # Organized by type and category
-        self.funds = {
-            'fidelity_large_cap': {
-                'category': 'FIDELITY: LARGE-CAP GROWTH',
-                'funds': {
-                    'FFVTX': {
-                        'name': 'Fidelity Large Cap Growth',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.18,
-                        'one_yr': 0.35,
-                        'three_yr': 0.38,
-                        'dividend': 0.005,
-                        'expense_ratio': 0.0065,
-                        'risk': 'High'
-                    },
-                    'FLPSX': {
-                        'name': 'Fidelity Growth Company Fund',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.20,
-                        'one_yr': 0.38,
-                        'three_yr': 0.40,
-                        'dividend': 0.002,
-                        'expense_ratio': 0.0070,
-                        'risk': 'Very High'
-                    },
-                }
-            },
-            'fidelity_sector': {
-                'category': 'FIDELITY: SECTOR FOCUSED',
-                'funds': {
-                    'FBIOX': {
-                        'name': 'Fidelity Select Technology',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.28,
-                        'one_yr': 0.55,
-                        'three_yr': 0.52,
-                        'dividend': 0.003,
-                        'expense_ratio': 0.0090,
-                        'risk': 'Very High'
-                    },
-                    'FSHBX': {
-                        'name': 'Fidelity Select Semiconductors',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.32,
-                        'one_yr': 0.62,
-                        'three_yr': 0.58,
-                        'dividend': 0.004,
-                        'expense_ratio': 0.0095,
-                        'risk': 'Extreme'
-                    },
-                    'FSPHX': {
-                        'name': 'Fidelity Select Biotechnology',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.15,
-                        'one_yr': 0.32,
-                        'three_yr': 0.28,
-                        'dividend': 0.002,
-                        'expense_ratio': 0.0088,
-                        'risk': 'Very High'
-                    },
-                }
-            },
-            'fidelity_balanced': {
-                'category': 'FIDELITY: BALANCED & INCOME',
-                'funds': {
-                    'FXAIX': {
-                        'name': 'Fidelity Total Market Index',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.10,
-                        'one_yr': 0.22,
-                        'three_yr': 0.18,
-                        'dividend': 0.015,
-                        'expense_ratio': 0.0015,
-                        'risk': 'Moderate'
-                    },
-                    'FSKAX': {
-                        'name': 'Fidelity Balanced Fund',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.08,
-                        'one_yr': 0.16,
-                        'three_yr': 0.12,
-                        'dividend': 0.025,
-                        'expense_ratio': 0.0045,
-                        'risk': 'Moderate'
-                    },
-                    'FAGIX': {
-                        'name': 'Fidelity Dividend Growth Fund',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.12,
-                        'one_yr': 0.26,
-                        'three_yr': 0.22,
-                        'dividend': 0.032,
-                        'expense_ratio': 0.0055,
-                        'risk': 'Moderate-High'
-                    },
-                }
-            },
-            'fidelity_international': {
-                'category': 'FIDELITY: INTERNATIONAL & EMERGING',
-                'funds': {
-                    'FEMKX': {
-                        'name': 'Fidelity Emerging Markets Equity',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.14,
-                        'one_yr': 0.28,
-                        'three_yr': 0.24,
-                        'dividend': 0.018,
-                        'expense_ratio': 0.0063,
-                        'risk': 'High'
-                    },
-                    'FIEUX': {
-                        'name': 'Fidelity International Growth Fund',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.11,
-                        'one_yr': 0.22,
-                        'three_yr': 0.18,
-                        'dividend': 0.012,
-                        'expense_ratio': 0.0070,
-                        'risk': 'High'
-                    },
-                }
-            },
-            'fidelity_bonds': {
-                'category': 'FIDELITY: BONDS & FIXED INCOME',
-                'funds': {
-                    'FBNDX': {
-                        'name': 'Fidelity Bond Fund',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.02,
-                        'one_yr': 0.05,
-                        'three_yr': 0.03,
-                        'dividend': 0.035,
-                        'expense_ratio': 0.0030,
-                        'risk': 'Low'
-                    },
-                    'FTABX': {
-                        'name': 'Fidelity Total Bond Fund',
-                        'type': 'Fidelity Mutual Fund',
-                        'ytd': 0.02,
-                        'one_yr': 0.05,
-                        'three_yr': 0.03,
-                        'dividend': 0.040,
-                        'expense_ratio': 0.0025,
-                        'risk': 'Low'
-                    },
-                }
-            },
-            'etf_broad': {
-                'category': 'BROAD MARKET ETFs',
-                'funds': {
-                    'VTI': {
-                        'name': 'Vanguard Total Stock Market ETF',
-                        'type': 'ETF',
-                        'ytd': 0.10,
-                        'one_yr': 0.22,
-                        'three_yr': 0.18,
-                        'dividend': 0.015,
-                        'expense_ratio': 0.0003,
-                        'risk': 'Moderate'
-                    },
-                    'ITOT': {
-                        'name': 'iShares Core S&P Total U.S. Stock Market ETF',
-                        'type': 'ETF',
-                        'ytd': 0.10,
-                        'one_yr': 0.22,
-                        'three_yr': 0.18,
-                        'dividend': 0.016,
-                        'expense_ratio': 0.0003,
-                        'risk': 'Moderate'
-                    },
-                }
-            },
-            'etf_tech': {
-                'category': 'TECH & GROWTH ETFs',
-                'funds': {
-                    'QQQ': {
-                        'name': 'Invesco QQQ Trust',
-                        'type': 'ETF',
-                        'ytd': 0.134,
-                        'one_yr': 0.28,
-                        'three_yr': 0.32,
-                        'dividend': 0.004,
-                        'expense_ratio': 0.0020,
-                        'risk': 'High'
-                    },
-                    'SMH': {
-                        'name': 'iShares Semiconductor ETF',
-                        'type': 'ETF',
-                        'ytd': 0.68,
-                        'one_yr': 1.02,
-                        'three_yr': 0.85,
-                        'dividend': 0.008,
-                        'expense_ratio': 0.0035,
-                        'risk': 'Very High'
-                    },
-                    'XLK': {
-                        'name': 'Technology Select Sector SPDR',
-                        'type': 'ETF',
-                        'ytd': 0.16,
-                        'one_yr': 0.32,
-                        'three_yr': 0.38,
-                        'dividend': 0.005,
-                        'expense_ratio': 0.0010,
-                        'risk': 'High'
-                    },
-                }
-            },
-            'etf_specialty': {
-                'category': 'SPECIALTY & THEMED ETFs',
-                'funds': {
-                    'ARKK': {
-                        'name': 'ARK Innovation ETF',
-                        'type': 'ETF',
-                        'ytd': 0.28,
-                        'one_yr': 0.52,
-                        'three_yr': 0.42,
-                        'dividend': 0.002,
-                        'expense_ratio': 0.0075,
-                        'risk': 'Extreme'
-                    },
-                    'ICLN': {
-                        'name': 'iShares Global Clean Energy ETF',
-                        'type': 'ETF',
-                        'ytd': 0.31,
-                        'one_yr': 0.58,
-                        'three_yr': 0.35,
-                        'dividend': 0.018,
-                        'expense_ratio': 0.0040,
-                        'risk': 'High'
-                    },
-                    'IBB': {
-                        'name': 'iShares Nasdaq Biotechnology',
-                        'type': 'ETF',
-                        'ytd': 0.18,
-                        'one_yr': 0.34,
-                        'three_yr': 0.28,
-                        'dividend': 0.003,
-                        'expense_ratio': 0.0045,
-                        'risk': 'Very High'
-                    },
-                    'IBIT': {
-                        'name': 'iShares Bitcoin Mini Trust',
-                        'type': 'ETF',
-                        'ytd': 0.92,
-                        'one_yr': 1.68,
-                        'three_yr': 1.42,
-                        'dividend': 0.0,
-                        'expense_ratio': 0.0020,
-                        'risk': 'Extreme'
-                    },
-                }
-            },
-            'etf_bonds': {
-                'category': 'BONDS & FIXED INCOME ETFs',
-                'funds': {
-                    'BND': {
-                        'name': 'Vanguard Total Bond Market ETF',
-                        'type': 'ETF',
-                        'ytd': 0.02,
-                        'one_yr': 0.05,
-                        'three_yr': 0.03,
-                        'dividend': 0.042,
-                        'expense_ratio': 0.0003,
-                        'risk': 'Low'
-                    },
-                    'AGG': {
-                        'name': 'iShares Core U.S. Aggregate Bond ETF',
-                        'type': 'ETF',
-                        'ytd': 0.02,
-                        'one_yr': 0.05,
-                        'three_yr': 0.03,
-                        'dividend': 0.044,
-                        'expense_ratio': 0.0003,
-                        'risk': 'Low'
-                    },
-                }
-            },
-            'etf_dividend': {
-                'category': 'DIVIDEND & INCOME ETFs',
-                'funds': {
-                    'SCHD': {
-                        'name': 'Schwab U.S. Dividend Equity ETF',
-                        'type': 'ETF',
-                        'ytd': 0.12,
-                        'one_yr': 0.26,
-                        'three_yr': 0.22,
-                        'dividend': 0.035,
-                        'expense_ratio': 0.0006,
-                        'risk': 'Moderate'
-                    },
-                    'VYM': {
-                        'name': 'Vanguard High Dividend Yield ETF',
-                        'type': 'ETF',
-                        'ytd': 0.11,
-                        'one_yr': 0.24,
-                        'three_yr': 0.20,
-                        'dividend': 0.038,
-                        'expense_ratio': 0.0006,
-                        'risk': 'Moderate'
-                    },
-                }
-            },
-            'etf_international': {
-                'category': 'INTERNATIONAL ETFs',
-                'funds': {
-                    'VXUS': {
-                        'name': 'Vanguard International Stock ETF',
-                        'type': 'ETF',
-                        'ytd': 0.09,
-                        'one_yr': 0.18,
-                        'three_yr': 0.14,
-                        'dividend': 0.018,
-                        'expense_ratio': 0.0009,
-                        'risk': 'Moderate-High'
-                    },
-                    'IEMG': {
-                        'name': 'iShares MSCI Emerging Markets ETF',
-                        'type': 'ETF',
-                        'ytd': 0.16,
-                        'one_yr': 0.32,
-                        'three_yr': 0.26,
-                        'dividend': 0.019,
-                        'expense_ratio': 0.0008,
-                        'risk': 'High'
-                    },
-                }
-            },
-        }
-
-        # 6 Strategy Archetypes
-        self.strategies = {
-            'strategy_1': {
-                'name': '🛡️ CONSERVATIVE',
-                'subtitle': 'Capital Preservation + Steady Income',
-                'description': 'Bonds + dividend stocks, minimal volatility',
-                'allocation': {
-                    'FBNDX': 0.40,  # Bonds
-                    'FTABX': 0.20,  # Total Bond
-                    'FAGIX': 0.15,  # Dividend Growth
-                    'SCHD': 0.15,   # Dividend ETF
-                    'FXAIX': 0.10,  # Total Market (safety)
-                },
-                'expected_return': '5-7% annual',
-                'max_drawdown': '-15% worst case',
-                'time_horizon': '1-3 years',
-                'best_for': 'Risk-averse, income-focused, near retirement'
-            },
-            'strategy_2': {
-                'name': '🎯 MODERATE',
-                'subtitle': 'Balanced Growth + Income',
-                'description': '60/40 stocks-bonds, steady growth with downside protection',
-                'allocation': {
-                    'FSKAX': 0.25,  # Balanced Fund
-                    'FXAIX': 0.20,  # Total Market
-                    'BND': 0.20,    # Bonds ETF
-                    'FAGIX': 0.15,  # Dividend Growth
-                    'VXUS': 0.10,   # International
-                    'SCHD': 0.10,   # Dividend ETF
-                },
-                'expected_return': '8-12% annual',
-                'max_drawdown': '-25% worst case',
-                'time_horizon': '2-5 years',
-                'best_for': 'Balanced growth, mid-career, 401k alternative'
-            },
-            'strategy_3': {
-                'name': '📈 GROWTH',
-                'subtitle': 'Solid Growth + Diversification',
-                'description': 'Growth stocks + sectors + international, some bonds',
-                'allocation': {
-                    'FFVTX': 0.18,  # Fidelity Large Cap Growth
-                    'QQQ': 0.15,    # Tech ETF
-                    'FXAIX': 0.15,  # Total Market
-                    'FBIOX': 0.10,  # Tech Sector
-                    'IEMG': 0.10,   # Emerging Markets
-                    'BND': 0.15,    # Bonds (downside protection)
-                    'SCHD': 0.08,   # Dividend ETF
-                    'ICLN': 0.09,   # Clean Energy
-                },
-                'expected_return': '12-18% annual',
-                'max_drawdown': '-35% worst case',
-                'time_horizon': '3-5 years',
-                'best_for': 'Growth-oriented, medium risk tolerance, 3-5 year horizon'
-            },
-            'strategy_4': {
-                'name': '🚀 AGGRESSIVE',
-                'subtitle': 'High Growth + Concentrated Bets',
-                'description': 'Growth + sectors + emerging markets, minimal bonds',
-                'allocation': {
-                    'QQQ': 0.18,      # Tech ETF
-                    'FBIOX': 0.12,    # Tech Sector
-                    'FFVTX': 0.12,    # Large Cap Growth
-                    'FLPSX': 0.10,    # Growth Company
-                    'SMH': 0.10,      # Semiconductors
-                    'ARKK': 0.08,     # Innovation
-                    'IEMG': 0.08,     # Emerging Markets
-                    'IBB': 0.07,      # Biotech
-                    'ICLN': 0.08,     # Clean Energy
-                    'BND': 0.07,      # Bonds (emergency buffer)
-                },
-                'expected_return': '25-40% annual',
-                'max_drawdown': '-50% worst case',
-                'time_horizon': '3-5 years',
-                'best_for': 'Aggressive growth, high risk tolerance, young investor'
-            },
-            'strategy_5': {
-                'name': '💥 MOONSHOT',
-                'subtitle': 'Maximum Growth + Crypto + Leverage',
-                'description': 'Bleeding-edge tech, crypto, leverage, maximum volatility',
-                'allocation': {
-                    'IBIT': 0.20,     # Bitcoin ETF
-                    'ARKK': 0.15,     # Innovation
-                    'QQQ': 0.15,      # Tech ETF
-                    'FSHBX': 0.12,    # Semiconductors
-                    'SMH': 0.10,      # Semiconductor ETF
-                    'FLPSX': 0.10,    # Growth Company
-                    'IBB': 0.08,      # Biotech
-                    'FBIOX': 0.05,    # Tech Sector (small)
-                    'ICLN': 0.05,     # Clean Energy (small)
-                },
-                'expected_return': '60-150%+ annual',
-                'max_drawdown': '-70%+ worst case',
-                'time_horizon': '3-7 years',
-                'best_for': 'Moonshot bets, extreme risk tolerance, YOLO mindset'
-            },
-            'strategy_6': {
-                'name': '🌍 GLOBAL DIVERSIFIED',
-                'subtitle': 'Balanced Global + Sector Rotation',
-                'description': 'US/International blend, reduced single-country risk',
-                'allocation': {
-                    'FXAIX': 0.18,    # Total Market (US)
-                    'VXUS': 0.15,     # International
-                    'IEMG': 0.12,     # Emerging Markets
-                    'QQQ': 0.12,      # Tech (growth)
-                    'FIEUX': 0.10,    # Intl Growth
-                    'BND': 0.15,      # Bonds (stability)
-                    'SCHD': 0.10,     # Dividend ETF
-                    'ICLN': 0.05,     # Clean Energy
-                    'FAGIX': 0.03,    # Dividend Growth (small)
-                },
-                'expected_return': '10-16% annual',
-                'max_drawdown': '-30% worst case',
-                'time_horizon': '3-5 years',
-                'best_for': 'Currency hedging, emerging market exposure, global diversification'
-            },
-        }
+HERE = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.path.join(HERE, 'catalog.json')
+STRATEGIES_PATH = os.path.join(HERE, 'strategies.json')
 
-    def print_fund_catalog(self):
-        """Print all available funds by category"""
+class PortfolioAnalyzer:
+    def __init__(self, catalog_path=CATALOG_PATH, strategies_path=STRATEGIES_PATH, cache_path=None):
+        # Catalog (funds by category) and the 6 strategy archetypes live in data
+        # files and are only read when first used
+        self.catalog_path = catalog_path
+        self.strategies_path = strategies_path
+        self._store = None
+        self._strategies = None
+        self._screen_index = None
+        self._live = None
+        self._risk = None
+
+        # Optional persistent cache of metric history and computed results
+        self.cache = None
+        if cache_path:
+            from result_cache import ResultCache
+            self.cache = ResultCache(cache_path)
+
+    @property
+    def store(self):
+        """Columnar FundStore, loaded from catalog_path on first access"""
+        if self._store is None:
+            self._store = FundStore.load(self.catalog_path)
+            self._record_snapshot()
+        return self._store
+
+    @store.setter
+    def store(self, store):
+        self._store = store
+        self._screen_index = None
+        self._live = None
+        self._risk = None
+
+    @property
+    def strategies(self):
+        """{key: strategy} archetypes, loaded and validated from strategies_path (JSON/TOML file or directory)"""
+        if self._strategies is None:
+            from strategy_library import load_strategies
+
+            self._strategies = load_strategies(self.strategies_path, self.store)
+        return self._strategies
+
+    @strategies.setter
+    def strategies(self, strategies):
+        self._strategies = strategies
+        self._live = None
+        self._risk = None
+
+    @property
+    def funds(self):
+        """Read-only nested {category: {'category', 'funds'}} view of the store"""
+        return self.store.view()
+
+    def evaluate_strategies(self, allocations=None, horizon='one_yr', amount=1000.0):
+        """Blended metrics and $ projections for many allocations at once
+
+        Defaults to the six archetypes; pass {key: {symbol: weight}} to screen
+        custom portfolios in bulk.
+        """
+        import instrumentation
+        from strategy_engine import WeightMatrix, evaluate
+
+        if allocations is None:
+            allocations = {key: s['allocation'] for key, s in self.strategies.items()}
+        with instrumentation.span('evaluate'):
+            matrix = WeightMatrix.from_allocations(self.store, allocations)
+            instrumentation.count('store_lookups', len(matrix.indices))
+            return evaluate(self.store, matrix, horizon=horizon, amount=amount)
+
+    def simulate_strategies(self, years=5, paths=100_000, seed=42, workers=None):
+        """Monte Carlo percentile bands, loss probability and drawdown per strategy"""
+        from monte_carlo import simulate
+
+        allocations = {key: s['allocation'] for key, s in self.strategies.items()}
+        return simulate(self.store, allocations, years=years, paths=paths, seed=seed, workers=workers)
+
+    def load_price_history(self, cache_dir, source_dir=None):
+        """Ingest new CSV rows (if source_dir given) and derive trailing metrics from the cache"""
+        from price_history import PriceCache, refresh_store
+
+        cache = PriceCache(cache_dir)
+        if source_dir:
+            cache.ingest(source_dir, symbols=self.store.symbols)
+        updated = refresh_store(self.store, cache)
+        self._record_snapshot(updated)
+        return updated
+
+    def refresh_market_data(self, url, symbols=None, **options):
+        """Refresh quotes and trailing returns from an HTTP quote service (see market_data)"""
+        from market_data import HttpProvider, refresh
+
+        quotes = refresh(self.store, HttpProvider(url, **options), symbols)
+        self._record_snapshot(quotes)
+        return quotes
+
+    def load_risk_metrics(self, cache_dir, source_dir=None):
+        """Fold cached price history into the streaming risk state and re-tier funds from it.
+
+        Repeat calls only fold in days newer than the last one seen. Returns
+        {symbol: tier} for the funds whose risk label changed.
+        """
+        from price_history import PriceCache
+
+        cache = PriceCache(cache_dir)
+        if source_dir:
+            cache.ingest(source_dir, symbols=self.store.symbols)
+        self.risk_monitor().backfill(cache)
+        return self._apply_risk_tiers()
+
+    def record_prices(self, closes, distributions=None, as_of=None):
+        """Fold one new trading day {symbol: close} into the risk state; returns re-tiered funds"""
+        self.risk_monitor().update_day(closes, distributions, as_of)
+        return self._apply_risk_tiers(closes)
+
+    def risk_monitor(self):
+        """RiskMonitor over every fund and strategy, fed by load_risk_metrics / record_prices"""
+        if self._risk is None:
+            from risk_metrics import RiskMonitor
+
+            self._risk = RiskMonitor(self.store, {key: s['allocation'] for key, s in self.strategies.items()})
+        return self._risk
+
+    def _apply_risk_tiers(self, symbols=None):
+        from risk_metrics import MIN_DAYS, risk_tier
+
+        funds = self._risk.funds
+        changed = {}
+        for symbol in symbols if symbols is not None else self.store.symbols:
+            row = funds.index.get(symbol)
+            if row is None or funds.count[row] < MIN_DAYS:
+                continue
+            tier = risk_tier(funds.volatility(row), funds.max_drawdown[row])
+            if tier != self.store.risk(row):
+                self.store.set_metrics(symbol, risk=tier)
+                changed[symbol] = tier
+        if changed:
+            self._record_snapshot(changed)
+        if self._live is not None:
+            self._live.refresh_risk()
+        return changed
+
+    def strategy_tiers(self):
+        """{strategy key: measured risk tier}, empty until price history is loaded"""
+        return self._risk.tiers(self._risk.strategies) if self._risk is not None else {}
+
+    def print_risk_metrics(self, funds=False):
+        """Print measured risk per strategy (and optionally per fund) from the loaded price history"""
+        monitor = self.risk_monitor()
+        print(f"\n{'='*130}")
+        print("📉 MEASURED RISK (daily returns, annualized)")
+        print(f"{'='*130}\n")
+        header = (f"{'Volatility':>11} {'Rolling':>9} {'Max DD':>8} {'Sharpe':>7} {'Sortino':>8} "
+                  f"{'Beta':>6} {'Days':>6}  {'Tier'}")
+        print(f"{'Strategy':<35} {'Stated Max DD':<18}" + header)
+        print('-' * 130)
+        for key in monitor.strategies.keys:
+            strategy = self.strategies[key]
+            print(f"{key:<12} {strategy['name']:<22} {strategy['max_drawdown']:<18}"
+                  + _risk_row(monitor.strategies[key]))
+        if funds:
+            print(f"\n{'Fund':<8} {'Name':<45}" + header)
+            print('-' * 130)
+            rows = [(symbol, monitor.funds[symbol]) for symbol in self.store.symbols]
+            rows = sorted((r for r in rows if r[1]['volatility'] is not None), key=lambda r: -r[1]['volatility'])
+            for symbol, metrics in rows:
+                print(f"{symbol:<8} {self.store.names[self.store.row(symbol)][:45]:<45}" + _risk_row(metrics))
+
+    def update_funds(self, updates):
+        """Apply {symbol: {field: value}} metric updates; returns the strategy keys recomputed"""
+        keys = self.live_report().update(updates)
+        self._record_snapshot()
+        return keys
+
+    def live_report(self):
+        """IncrementalReport kept current by update_funds and market data refreshes"""
+        if self._live is None:
+            from incremental import IncrementalReport
+
+            self._live = IncrementalReport(self.store, self.strategies, tiers=self.strategy_tiers)
+        return self._live
+
+    def _record_snapshot(self, symbols=None):
+        # Metrics changed in place: log them and drop results that read them
+        self._screen_index = None
+        if self._live is not None and symbols:
+            self._live.evaluator.mark(symbols)
+        if self.cache is not None and self._store is not None:
+            self.cache.record_snapshot(self._store)
+
+    def optimize_strategies(self, cache_dir, constraints=None):
+        """Constrained efficient-frontier portfolio at each strategy's modeled risk level"""
+        from optimizer import SingleIndexCovariance, risk_targeted_portfolios
+        from price_history import PriceCache
+
+        covariance = SingleIndexCovariance(self.store, PriceCache(cache_dir))
+        return risk_targeted_portfolios(self.store, self.strategies, covariance, constraints)
+
+    def backtest_strategy(self, strategy_key, cache_dir, policies=None, workers=None):
+        """Replay a strategy under many rebalancing policies, vs. buy-and-hold"""
+        from backtest import compare, sweep
+        from price_history import PriceCache, aligned_panel
+
+        allocation = self.strategies[strategy_key]['allocation']
+        dates, panel = aligned_panel(PriceCache(cache_dir), allocation)
+        if len(dates) < 2:
+            raise ValueError(f"Not enough shared price history for {strategy_key}")
+        return compare(sweep(allocation, dates, panel, policies, workers=workers))
+
+    def simulate_dca(self, cache_dir, schedules=None, horizon_days=252):
+        """DCA vs. lump sum over every historical start date, per strategy"""
+        import dca
+        from price_history import PriceCache, aligned_panel
+
+        cache = PriceCache(cache_dir)
+        results = {}
+        for key, strategy in self.strategies.items():
+            allocation = strategy['allocation']
+            _, panel = aligned_panel(cache, allocation)
+            results[key] = dca.compare(allocation, panel, schedules or dca.DEFAULT_SCHEDULES, horizon_days)
+        return results
+
+    def score_clients(self, source, dest, workers=None, chunk_size=2_000):
+        """Score client holdings (CSV/JSONL) against the archetypes, streaming JSONL to dest"""
+        from client_scoring import score_file
+
+        return score_file(self.store, self.strategies, source, dest, workers=workers, chunk_size=chunk_size)
+
+    def holdings_overlap(self, holdings_path, top=10, min_overlap=0.0, strategy_key=None):
+        """Look-through exposure and overlapping holding pairs per strategy (or just one)"""
+        from overlap import load_holdings, strategy_overlap
+
+        strategies = self.strategies
+        if strategy_key is not None:
+            if strategy_key not in strategies:
+                raise KeyError(f"Unknown strategy: {strategy_key}")
+            strategies = {strategy_key: strategies[strategy_key]}
+        # Only the funds these strategies hold are read from the holdings files
+        held = {symbol for s in strategies.values() for symbol in s['allocation']}
+        return strategy_overlap(load_holdings(holdings_path, held), strategies, top=top, min_overlap=min_overlap)
+
+    def print_holdings_overlap(self, holdings_path, strategy_key=None, top=10):
+        """Print look-through exposure and fund overlap for one or all strategies"""
+        results = self.holdings_overlap(holdings_path, top=top, strategy_key=strategy_key)
+        for result in results.values():
+            exposure = result['exposure']
+            print(f"\n{'='*100}")
+            print(f"{result['name']} — HOLDINGS OVERLAP")
+            print(f"{'='*100}")
+            print(f"Look-through coverage: {exposure.covered / exposure.nominal * 100:.0f}% of allocation"
+                  + (f" (no holdings data: {', '.join(exposure.missing)})" if exposure.missing else ''))
+            if exposure.weights:
+                print(f"Effective securities:  {1 / exposure.concentration():.0f}")
+            print(f"\n{'Security':<12} {'Exposure':>9}   Via")
+            print('-' * 100)
+            for security, weight, sources in result['top']:
+                via = ', '.join(f"{fund} {w*100:.1f}%" for fund, w in sorted(sources.items(), key=lambda x: -x[1]))
+                print(f"{security:<12} {weight*100:>8.2f}%   {via}")
+            if result['pairs']:
+                print(f"\n{'Fund Pair':<20} {'Overlap':>8}")
+                print('-' * 100)
+                for (a, b), value in result['pairs']:
+                    print(f"{a + ' / ' + b:<20} {value*100:>7.1f}%")
+
+    def stress_test(self, scenarios_path=None):
+        """Every strategy's return under the historical crash library (or scenarios from a JSON file)"""
+        from scenarios import HISTORICAL_SCENARIOS, StressTest, load_scenarios
+
+        scenarios = load_scenarios(scenarios_path) if scenarios_path else HISTORICAL_SCENARIOS
+        allocations = {key: s['allocation'] for key, s in self.strategies.items()}
+        return StressTest(self.store, allocations).run(scenarios)
+
+    def print_stress_test(self, scenarios_path=None):
+        """Print a scenario × strategy return table and each strategy's modeled worst case"""
+        result = self.stress_test(scenarios_path)
         print(f"\n{'='*130}")
-        print("📚 AVAILABLE INVESTMENTS CATALOG")
+        print(f"⚠️  STRESS TEST — {len(result.scenarios)} SCENARIOS × {len(result.keys)} STRATEGIES")
         print(f"{'='*130}\n")
+        print(f"{'Scenario':<30}" + ''.join(f"{key:>12}" for key in result.keys))
+        print('-' * 130)
+        for scenario, losses in zip(result.scenarios, result.losses):
+            print(f"{scenario.name[:30]:<30}" + ''.join(f"{loss*100:>11.1f}%" for loss in losses))
+
+        print(f"\n{'Strategy':<35} {'Stated Max Drawdown':<22} {'Modeled Worst Case'}")
+        print('-' * 130)
+        for key in result.keys:
+            scenario, loss = result.worst(key)
+            print(f"{key:<12} {self.strategies[key]['name']:<22} {self.strategies[key]['max_drawdown']:<22} "
+                  f"{loss*100:.1f}% ({scenario.name})")
+
+    def projections(self, horizons=None, rate=None):
+        """ProjectionGrid of net-of-fee and gross ending values for every strategy"""
+        from projections import DEFAULT_RATE, HORIZONS, ProjectionGrid
+
+        allocations = {key: s['allocation'] for key, s in self.strategies.items()}
+        return ProjectionGrid(self.store, allocations, horizons or HORIZONS, DEFAULT_RATE if rate is None else rate)
+
+    def print_projection(self, strategy_key, amount=10_000.0, contribution=0.0, horizons=None, rate=None):
+        """Print net-of-fee growth and cumulative fee cost for one strategy"""
+        from projections import DEFAULT_RATE, SUMMARY_HORIZONS, describe_rate
+
+        horizons = horizons or SUMMARY_HORIZONS
+        rate = DEFAULT_RATE if rate is None else rate
+        grid = self.projections(horizons, rate)
+        rows = grid.summary(strategy_key, amount, contribution, horizons)
+        basis = f"${amount:,.0f}" + (f" + ${contribution:,.0f}/yr" if contribution else '')
+        print(f"\n\nNET-OF-FEE PROJECTION ({basis}, dividends reinvested, {describe_rate(rate)}):\n")
+        columns = ('contributed', 'gross', 'net', 'fee_cost')
+        width = max(14, max(len(f"${row[c]:,.0f}") for row in rows for c in columns) + 2)
+        print(f"{'Years':<8}" + ''.join(f"{title:>{width}}"
+                                         for title in ('Contributed', 'Before Fees', 'After Fees', 'Fee Cost')))
+        print(f"{'-'*(8 + 4 * width)}")
+        for row in rows:
+            print(f"{row['years']:<8}" + ''.join(f"{'$' + format(row[c], ',.0f'):>{width}}" for c in columns))
+        years = horizons[-1]
+        print(f"\nFee cost by holding over {years} years:")
+        for symbol, weight, expense, cost in grid.fee_costs(strategy_key, years, amount, contribution):
+            print(f"  {symbol:<8} {weight*100:>4.0f}% at {expense*100:.2f}%  ${cost:>13,.0f}")
+
+    def print_fund_fees(self, symbols, amount=10_000.0, contribution=0.0, horizons=None, rate=None):
+        """Print cumulative fee cost of individual funds side by side"""
+        from projections import DEFAULT_RATE, SUMMARY_HORIZONS, describe_rate, growth_factors, project_fund
+
+        horizons = horizons or SUMMARY_HORIZONS
+        rate = DEFAULT_RATE if rate is None else rate
+        factors = growth_factors(self.store, rate)
+        symbols = [s.upper() for s in symbols]
+        headers = [f"{s} {self.store.columns['expense_ratio'][self.store.row(s)] * 100:.2f}%" for s in symbols]
+        costs = {years: ['$' + format(project_fund(self.store, s, years, amount, contribution, factors=factors)['fee_cost'], ',.0f')
+                         for s in symbols]
+                 for years in horizons}
+        width = max(len(cell) for cell in headers + [c for row in costs.values() for c in row]) + 4
+        print(f"\nCUMULATIVE FEE COST (${amount:,.0f}" + (f" + ${contribution:,.0f}/yr" if contribution else '')
+              + f", {describe_rate(rate)})\n")
+        print(f"{'Years':<8}" + ''.join(f"{header:>{width}}" for header in headers))
+        print(f"{'-'*(8 + width * len(symbols))}")
+        for years in horizons:
+            print(f"{years:<8}" + ''.join(f"{cost:>{width}}" for cost in costs[years]))
+
+    def rebalance_lots(self, lots_path, prices_path, strategy_key, method='min_tax', band=0.0, cash=0.0,
+                       today=None, lot_ids=None):
+        """Tax-aware trades moving a lot-level account (CSV) toward one strategy's allocation"""
+        from tax_lots import load_prices, read_lots, rebalance
+
+        if strategy_key not in self.strategies:
+            raise KeyError(f"Unknown strategy: {strategy_key}")
+        lots = read_lots(lots_path)
+        target = self.strategies[strategy_key]['allocation']
+        prices = load_prices(prices_path, set(lots.names) | set(target))
+        return rebalance(lots, target, prices, today, method=method, cash=cash, band=band, lot_ids=lot_ids)
+
+    def print_rebalance(self, lots_path, prices_path, strategy_key, method='min_tax', band=0.0, cash=0.0,
+                        today=None, lot_ids=None):
+        """Print rebalancing trades, the lots they sell and the realized gain and tax"""
+        plan = self.rebalance_lots(lots_path, prices_path, strategy_key, method, band, cash, today, lot_ids)
+        print(f"\n{'='*100}")
+        print(f"{self.strategies[strategy_key]['name']} — REBALANCE (${plan['value']:,.0f}, {method} lots)")
+        print(f"{'='*100}\n")
+        print(f"{'Action':<8} {'Symbol':<8} {'Lot':<16} {'Shares':>12} {'Value':>14} {'Gain':>12} {'Term':<6}")
+        print('-' * 100)
+        sales = iter(plan['sales'])
+        for trade in plan['trades']:
+            if trade['action'] == 'sell':
+                sale = next(sales)
+                flag = '  wash sale' if sale['wash_sale'] else ''
+                print(f"{'SELL':<8} {trade['symbol']:<8} {trade['lot_id'][:16]:<16} {trade['quantity']:>12,.3f} "
+                      f"${trade['value']:>13,.2f} ${sale['gain']:>11,.2f} {sale['term']:<6}{flag}")
+            else:
+                flag = '  wash sale (recent loss sale)' if trade['wash_sale'] else ''
+                print(f"{'BUY':<8} {trade['symbol']:<8} {'':<16} {trade['quantity']:>12,.3f} "
+                      f"${trade['value']:>13,.2f}{flag}")
+        print(f"\nRealized gain: ${plan['realized_gain']:,.2f}   Estimated tax: ${plan['tax']:,.2f}")
+
+    def harvest_losses(self, lots_path, prices_path, min_loss=100.0, today=None):
+        """Tax-loss harvesting swaps between the catalog's equivalent pairs"""
+        from tax_lots import load_prices, partners, read_lots, harvest
+
+        lots = read_lots(lots_path)
+        prices = load_prices(prices_path, set(lots.names) | set(partners()))
+        return harvest(lots, prices, today, min_loss=min_loss)
+
+    def print_harvest(self, lots_path, prices_path, min_loss=100.0, today=None):
+        """Print harvesting swaps, largest tax saving first"""
+        swaps = self.harvest_losses(lots_path, prices_path, min_loss, today)
+        print(f"\n{'='*100}")
+        print(f"TAX-LOSS HARVESTING — {len(swaps)} SWAP(S)")
+        print(f"{'='*100}\n")
+        if not swaps:
+            print(f"No losses of ${min_loss:,.0f} or more in an equivalent pair.")
+            return
+        print(f"{'Swap':<14} {'Lots':>5} {'Proceeds':>14} {'Loss':>13} {'Tax Saved':>12}   {'Status'}")
+        print('-' * 100)
+        for swap in swaps:
+            status = f"BLOCKED: {swap['blocked']}" if swap['blocked'] else f"buy back after {swap['repurchase_after']}"
+            print(f"{swap['sell'] + ' → ' + swap['buy']:<14} {len(swap['lots']):>5} ${swap['proceeds']:>13,.2f} "
+                  f"${swap['loss']:>12,.2f} ${swap['tax_saved']:>11,.2f}   {status}")
+
+    def build_dashboard(self, out_dir='data', force=False):
+        """Write the index.html data files, skipped when the catalog is unchanged"""
+        import dashboard
+
+        return dashboard.build(self.store, self.strategies, out_dir=out_dir, force=force, cache=self.cache)
+
+    def build_report(self):
+        """Compute the full report model once (shared by every output format)"""
+        import instrumentation
+        import report
+
+        if self.cache is None:
+            return report.build_report(self.store, self.strategies, tiers=self.strategy_tiers())
+        with instrumentation.span('build'):
+            sections = [
+                self.cache.cached('report_strategy', self.store, strategy['allocation'],
+                                  partial(report.build_strategy, self.store, key, strategy),
+                                  key=key, strategy=strategy)
+                for key, strategy in self.strategies.items()
+            ]
+        comparison = report.build_comparison(self.store, self.strategies, self.strategy_tiers())
+        return report.ReportModel(self.store, comparison, sections)
 
-        for category_key, category_data in self.funds.items():
-            print(f"\n{category_data['category']}")
-            print(f"{'-'*130}")
-            print(f"{'Symbol':<10} {'Fund Name':<45} {'Type':<25} {'1-Yr':<10} {'Dividend':<12} {'Risk':<15}")
-            print(f"{'-'*130}")
+    def print_fund_catalog(self):
+        """Print all available funds by category"""
+        import report
 
-            for symbol, fund_data in category_data['funds'].items():
-                print(
-                    f"{symbol:<10} {fund_data['name']:<45} {fund_data['type']:<25} "
-                    f"{fund_data['one_yr']*100:>6.0f}%    {fund_data['dividend']*100:>5.2f}%    {fund_data['risk']:<15}"
-                )
+        model = report.ReportModel(self.store, [], [])
+        report.TextRenderer(sys.stdout).catalog(model)
 
     def print_strategy_comparison(self):
         """Compare all 6 strategies side-by-side"""
-        print(f"\n{'='*130}")
-        print("ALL 6 STRATEGIES COMPARISON")
-        print(f"{'='*130}\n")
+        import report
+
+        model = report.ReportModel(self.store, report.build_comparison(self.store, self.strategies,
+                                                                       self.strategy_tiers()), [])
+        report.TextRenderer(sys.stdout).comparison(model)
 
-        print(f"{'Strategy':<20} {'Expected Return':<22} {'Max Drawdown':<20} {'Time Horizon':<20} {'Risk Level':<20}")
-        print(f"{'-'*130}")
+    def rank_strategies(self, library=None, sort_by='one_yr', descending=None, limit=None, workers=None):
+        """Metric rows for every strategy (or a user library file/directory), best first by sort_by"""
+        from strategy_library import evaluate_all, load_strategies, rank
 
-        for strategy_key in ['strategy_1', 'strategy_2', 'strategy_3', 'strategy_4', 'strategy_5', 'strategy_6']:
-            s = self.strategies[strategy_key]
-            expected = s['expected_return']
-            drawdown = s['max_drawdown']
-            horizon = s['time_horizon']
-            risk = 'EXTREME' if 'Moonshot' in s['name'] else ('HIGH' if 'Aggressive' in s['name'] else 'MODERATE' if 'Moderate' in s['name'] else 'LOW' if 'Conservative' in s['name'] else 'MODERATE-HIGH')
-            print(f"{s['name']:<20} {expected:<22} {drawdown:<20} {horizon:<20} {risk:<20}")
+        strategies = load_strategies(library, self.store) if library else self.strategies
+        rows = evaluate_all(self.store, strategies, workers=workers)
+        for row in rows:
+            row['name'] = strategies[row['key']]['name']
+        return rank(rows, sort_by, descending, limit)
 
-    def print_strategy_detail(self, strategy_key):
-        """Print detailed breakdown for one strategy"""
-        strategy = self.strategies[strategy_key]
-        allocation = strategy['allocation']
+    def print_strategy_ranking(self, library=None, sort_by='one_yr', descending=None, limit=None, workers=None):
+        """Print strategies ranked by one metric"""
+        from strategy_library import METRICS
 
+        rows = self.rank_strategies(library, sort_by, descending, limit, workers)
         print(f"\n{'='*130}")
-        print(strategy['name'])
-        print(strategy['subtitle'])
+        print(f"🏆 STRATEGY RANKING — by {METRICS[sort_by][0]}")
         print(f"{'='*130}\n")
-
-        print(f"Expected Annual Return:  {strategy['expected_return']}")
-        print(f"Max Drawdown Risk:       {strategy['max_drawdown']}")
-        print(f"Time Horizon:            {strategy['time_horizon']}")
-        print(f"Best For:                {strategy['best_for']}\n")
-
-        # Portfolio breakdown
-        print("PORTFOLIO ALLOCATION:\n")
-        print(f"{'Symbol':<10} {'Fund Name':<45} {'Allocation':<15} {'$1K Invested':<18} {'1-Year Value':<18} {'Gain/Loss':<15}")
-        print(f"{'-'*130}")
-
-        total_value = 0
-        for symbol, pct in sorted(allocation.items(), key=lambda x: x[1], reverse=True):
-            # Find fund data
-            fund_data = None
-            for category in self.funds.values():
-                if symbol in category['funds']:
-                    fund_data = category['funds'][symbol]
-                    break
-
-            if fund_data:
-                invested = 1000 * pct
-                one_yr_return = fund_data['one_yr']
-                ending_value = invested * (1 + one_yr_return)
-                gain = ending_value - invested
-                total_value += ending_value
-
-                print(
-                    f"{symbol:<10} {fund_data['name']:<45} {pct*100:>6.0f}%      "
-                    f"${invested:>7,.0f}         ${ending_value:>7,.0f}         ${gain:>7,.0f}"
-                )
-
-        print(f"{'-'*130}")
-        total_gain = total_value - 10000
-        print(f"{'TOTAL':<10} {'':<45} {'100%':<15} {'$10,000':<18} '${total_value:>8,.0f}'       ${total_gain:>8,.0f}")
-
-        print(f"\n\nRECOMMENDED IMPLEMENTATION:")
-        print(f"├─ Month 1-2: Invest ~$3,300 (core positions)")
-        print(f"├─ Month 2-3: Invest ~$3,300 (diversify)")
-        print(f"├─ Month 3-4: Invest ~$3,400 (complete allocation)")
-        print(f"├─ Quarterly:  Rebalance to targets")
-        print(f"└─ On 20%+ dips: Deploy cash reserves")
-
-    def generate_report(self):
+        print(f"{'#':>4}  {'Strategy':<16} {'Name':<30} {'1Y':>8} {'3Y':>8} {'Yield':>7} {'Expense':>8} "
+              f"{'Risk':>5} {'Worst Case':>11} {'Funds':>6}")
+        print('-' * 130)
+        for position, row in enumerate(rows, 1):
+            print(f"{position:>4}  {row['key'][:16]:<16} {row['name'][:30]:<30} {row['one_yr']*100:>7.1f}% "
+                  f"{row['three_yr']*100:>7.1f}% {row['yield']*100:>6.2f}% {row['expense_ratio']*100:>7.3f}% "
+                  f"{row['risk_score']:>5.1f} {row['worst_case']*100:>10.1f}% {row['holdings']:>6}")
+
+    def screen_funds(self, conditions=(), sort_by=None, descending=False, limit=None):
+        """Funds matching conditions like 'risk=Moderate', 'dividend>3%', best first by sort_by"""
+        from screening import ScreenIndex, screen
+
+        if self._screen_index is None:
+            self._screen_index = ScreenIndex(self.store)
+        return screen(self.store, conditions, sort_by=sort_by, descending=descending, limit=limit,
+                      index=self._screen_index)
+
+    def print_screen(self, conditions=(), sort_by=None, descending=False, limit=None):
+        """Print screening results as a table"""
+        funds = self.screen_funds(conditions, sort_by, descending, limit)
+        print(f"{'Symbol':<10} {'Fund Name':<45} {'Type':<22} {'Expense':>8} {'Dividend':>9} "
+              f"{'1-Yr':>7} {'Risk':<15}")
+        print('-' * 122)
+        for fund in funds:
+            print(f"{fund['symbol']:<10} {fund['name'][:45]:<45} {fund['type']:<22} "
+                  f"{fund['expense_ratio']*100:>7.2f}% {fund['dividend']*100:>8.2f}% "
+                  f"{fund['one_yr']*100:>6.1f}% {fund['risk']:<15}")
+        print(f"\n{len(funds)} fund{'s' if len(funds) != 1 else ''} matched")
+
+    def fund_detail(self, symbol):
+        """Fund record plus its category label"""
+        symbol = symbol.upper()
+        if self._store is None:
+            # Single-fund query: scan the catalog file instead of loading it
+            from fund_store import read_fund
+
+            found = read_fund(self.catalog_path, symbol)
+            if found is not None:
+                _, label, record = found
+                return {'symbol': symbol, 'category': label, **record}
+        store = self.store
+        row = store.get(symbol)
+        if row is None:
+            raise KeyError(f"Unknown symbol: {symbol}")
+        label, _, _ = store.categories[store.category_of(row)]
+        return {'symbol': store.symbols[row], 'category': label, **store.record(row)}
+
+    def print_fund_detail(self, symbol):
+        """Print one fund's metrics"""
+        fund = self.fund_detail(symbol)
+        print(f"{fund['symbol']} — {fund['name']}")
+        print(f"Category:       {fund['category']}")
+        print(f"Type:           {fund['type']}")
+        print(f"YTD:            {fund['ytd']*100:>6.1f}%")
+        print(f"1-Year:         {fund['one_yr']*100:>6.1f}%")
+        print(f"3-Year:         {fund['three_yr']*100:>6.1f}%")
+        print(f"Dividend:       {fund['dividend']*100:>6.2f}%")
+        print(f"Expense Ratio:  {fund['expense_ratio']*100:>6.2f}%")
+        print(f"Risk:           {fund['risk']}")
+
+    def print_strategy_detail(self, strategy_key, project=False):
+        """Print detailed breakdown for one strategy (plus its fee projection if asked)"""
+        import report
+
+        if strategy_key not in self.strategies:
+            raise KeyError(f"Unknown strategy: {strategy_key} (expected one of {', '.join(self.strategies)})")
+        model = report.ReportModel(self.store, [], [])
+        section = report.build_strategy(self.store, strategy_key, self.strategies[strategy_key])
+        report.TextRenderer(sys.stdout).strategy(model, section)
+        if project:
+            self.print_projection(strategy_key, horizons=(1, 5, 10, 20, 30))
+
+    def generate_report(self, fmt='text', stream=None):
         """Generate complete multi-strategy report"""
-        print("\n" + "="*130)
-        print("📊 COMPREHENSIVE PORTFOLIO ANALYZER")
-        print("Stocks + ETFs + Mutual Funds | 6 Complete Strategy Archetypes")
-        print(f"Generated: {datetime.now().strftime('%A, %B %d, %Y — %I:%M %p EST')}")
-        print("="*130)
-
-        # 1. Fund catalog
-        self.print_fund_catalog()
-
-        # 2. All strategies comparison
-        self.print_strategy_comparison()
+        import report
 
-        # 3. Detailed breakdowns for each strategy
-        for strategy_key in ['strategy_1', 'strategy_2', 'strategy_3', 'strategy_4', 'strategy_5', 'strategy_6']:
-            self.print_strategy_detail(strategy_key)
+        report.render(self.build_report(), fmt, stream or sys.stdout)
 
-        # 4. Final guidance
-        print(f"\n\n{'='*130}")
-        print("⚠️  KEY PRINCIPLES")
-        print(f"{'='*130}\n")
+    def write_reports(self, outputs):
+        """Write several formats, e.g. {'markdown': 'PORTFOLIO_REPORT.md'}, from one model"""
+        import report
 
-        print("1. **Dollar-Cost Averaging:**")
-        print("   Spread $10K over 3-4 months, not lump sum. Reduces timing risk.\n")
+        model = self.build_report()
+        for fmt, path in outputs.items():
+            report.write(model, fmt, path)
 
-        print("2. **Rebalancing:**")
-        print("   Review quarterly. Rebalance when any position deviates >20% from target.\n")
 
-        print("3. **Emergency Fund First:**")
-        print("   Keep 6 months expenses in safe funds BEFORE aggressive strategies.\n")
+def _risk_row(metrics):
+    def number(value, spec):
+        return '—' if value is None else format(value, spec)
 
-        print("4. **Fidelity vs ETFs:**")
-        print("   Fidelity funds offer expertise; ETFs offer low costs. Mix both for balance.\n")
+    return (f"{number(metrics['volatility'], '.1%'):>11} {number(metrics['rolling_volatility'], '.1%'):>9} "
+            f"{metrics['max_drawdown']:>8.1%} {number(metrics['sharpe'], '.2f'):>7} "
+            f"{number(metrics['sortino'], '.2f'):>8} {number(metrics['beta'], '.2f'):>6} {metrics['days']:>6}  "
+            f"{metrics['tier'] or '—'}")
 
-        print("5. **Tax Efficiency:**")
-        print("   Fidelity mutual funds in taxable accounts; ETFs for tax efficiency; mutual funds in 401k.\n")
 
-        print("6. **Monitoring:**")
-        print("   Conservative: quarterly | Moderate: quarterly | Aggressive+: monthly")
-        print("   Moonshot: weekly (high volatility)\n")
+def _rate(value):
+    """--rate: a trailing return field or a number"""
+    import argparse
+    from projections import RATE_FIELDS
 
-        print(f"{'='*130}")
-        print(f"✅ Report generated {datetime.now().strftime('%I:%M %p EST')}")
-        print(f"{'='*130}\n")
+    if value in RATE_FIELDS:
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or one of {', '.join(RATE_FIELDS)}") from None
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Comprehensive Portfolio Analyzer")
+    parser.add_argument('--format', default='text', choices=('html', 'json', 'markdown', 'text'),
+                        help="report format (default: text)")
+    parser.add_argument('--output', help="write the report to this file instead of stdout")
+    parser.add_argument('--catalog', default=CATALOG_PATH, metavar='PATH', help="fund catalog file")
+    parser.add_argument('--strategies', default=STRATEGIES_PATH, metavar='PATH', help="strategy file")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="SQLite file caching metric history and computed results")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-section timings to PATH (JSON) plus a .prom file (Prometheus)")
+
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.add_parser('report', help="full multi-strategy report (default)")
+    commands.add_parser('catalog', help="all funds by category")
+    commands.add_parser('compare', help="strategies side by side")
+    detail = commands.add_parser('detail', help="one strategy's allocation")
+    detail.add_argument('strategy', help="strategy key, e.g. strategy_3")
+    detail.add_argument('--project', action='store_true', help="add the net-of-fee projection")
+    screen = commands.add_parser('screen', help="filter, sort and rank funds",
+                                 description="Conditions: type=ETF, risk=Low,Moderate, category=etf_bonds, "
+                                             "dividend>3%%, expense_ratio<=0.001, one_yr>=20%% ...")
+    screen.add_argument('conditions', nargs='*', metavar='CONDITION')
+    screen.add_argument('--sort', metavar='FIELD', help="metric to rank by (ascending)")
+    screen.add_argument('--desc', action='store_true', help="rank highest first")
+    screen.add_argument('--limit', type=int, default=20, help="max results (default 20, 0 = all)")
+    ranking = commands.add_parser('rank', help="evaluate and rank strategies by any metric")
+    ranking.add_argument('library', nargs='?', help="JSON/TOML strategy file or directory (default: --strategies)")
+    ranking.add_argument('--sort', default='one_yr',
+                         choices=('one_yr', 'three_yr', 'yield', 'expense_ratio', 'risk_score', 'worst_case',
+                                  'holdings'),
+                         help="metric to rank by (default one_yr)")
+    order = ranking.add_mutually_exclusive_group()
+    order.add_argument('--desc', dest='descending', action='store_true', default=None, help="highest first")
+    order.add_argument('--asc', dest='descending', action='store_false', help="lowest first")
+    ranking.add_argument('--limit', type=int, default=0, help="top N only (default all)")
+    ranking.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    overlap = commands.add_parser('overlap', help="look-through exposure and holdings overlap")
+    overlap.add_argument('holdings', help="directory of per-fund CSVs (SYMBOL.csv) or one fund,security,weight CSV")
+    overlap.add_argument('--strategy', help="only this strategy")
+    overlap.add_argument('--top', type=int, default=10, help="securities to list (default 10)")
+    stress = commands.add_parser('stress', help="strategy returns under historical crash scenarios")
+    stress.add_argument('--scenarios', metavar='PATH', help="JSON list of custom scenarios")
+    project = commands.add_parser('project', help="net-of-fee growth and fee cost over 1-40 years")
+    project.add_argument('strategy', nargs='?', help="strategy key (default: all)")
+    project.add_argument('--funds', metavar='SYMBOLS', help="compare fee cost of funds instead, e.g. FFVTX,VTI")
+    project.add_argument('--amount', type=float, default=10_000.0, help="starting amount (default 10000)")
+    project.add_argument('--contribution', type=float, default=0.0, help="added at each year end")
+    project.add_argument('--years', default='1,5,10,20,30,40', help="horizons, comma separated")
+    project.add_argument('--rate', default='three_yr', type=_rate,
+                         help="annual return before fees, e.g. 0.07, or a trailing field (one_yr, three_yr) "
+                              "capped to 0-10%% (default three_yr)")
+    rebalance = commands.add_parser('rebalance', help="tax-aware trades from a lot-level account to a strategy")
+    rebalance.add_argument('lots', help="lots CSV: symbol, quantity, cost_per_share or cost_basis, acquired")
+    rebalance.add_argument('strategy', help="target strategy key")
+    rebalance.add_argument('--prices', required=True, metavar='PATH',
+                           help="symbol,price CSV or a price history cache directory")
+    rebalance.add_argument('--method', default='min_tax', choices=('min_tax', 'hifo', 'fifo', 'lifo', 'specific'),
+                           help="lot selection (default min_tax)")
+    rebalance.add_argument('--lots-to-sell', metavar='IDS', help="lot ids for --method specific, comma separated")
+    rebalance.add_argument('--band', type=float, default=0.0, help="relative drift tolerated, e.g. 0.2")
+    rebalance.add_argument('--cash', type=float, default=0.0, help="cash available to invest")
+    rebalance.add_argument('--date', help="trade date (default today)")
+    harvest = commands.add_parser('harvest', help="tax-loss harvesting swaps (VTI↔ITOT, BND↔AGG)")
+    harvest.add_argument('lots', help="lots CSV")
+    harvest.add_argument('--prices', required=True, metavar='PATH',
+                         help="symbol,price CSV or a price history cache directory")
+    harvest.add_argument('--min-loss', type=float, default=100.0, help="smallest loss worth harvesting")
+    harvest.add_argument('--date', help="trade date (default today)")
+    risk = commands.add_parser('risk', help="volatility, drawdown, Sharpe/Sortino and beta from price history")
+    risk.add_argument('history', help="price history cache directory")
+    risk.add_argument('--source', metavar='DIR', help="ingest new SYMBOL.csv price files from DIR first")
+    risk.add_argument('--funds', action='store_true', help="also list every fund")
+    fund = commands.add_parser('fund', help="one fund's metrics")
+    fund.add_argument('symbol')
+    dashboard = commands.add_parser('dashboard', help="build the index.html data files")
+    dashboard.add_argument('out_dir', nargs='?', default='data')
+    dashboard.add_argument('--force', action='store_true', help="rebuild even if unchanged")
+    score = commands.add_parser('score-clients', help="score client holdings against the strategies")
+    score.add_argument('source', help="client holdings (.csv or .jsonl)")
+    score.add_argument('dest', help="results (.jsonl)")
+    args = parser.parse_args(argv)
+    if args.profile and args.profile.endswith('.prom'):
+        parser.error("--profile names the JSON file; the .prom file is written next to it")
+
+    profiler = None
+    if args.profile:
+        import instrumentation
+        profiler = instrumentation.enable()
 
-if __name__ == "__main__":
     try:
-        analyzer = PortfolioAnalyzer()
-        analyzer.generate_report()
+        analyzer = PortfolioAnalyzer(args.catalog, args.strategies, cache_path=args.cache)
+        command = args.command or 'report'
+        if command == 'catalog':
+            analyzer.print_fund_catalog()
+        elif command == 'compare':
+            analyzer.print_strategy_comparison()
+        elif command == 'detail':
+            analyzer.print_strategy_detail(args.strategy, args.project)
+        elif command == 'screen':
+            options = dict(sort_by=args.sort, descending=args.desc, limit=args.limit or None)
+            if args.format == 'json':
+                import json
+                print(json.dumps(analyzer.screen_funds(args.conditions, **options), ensure_ascii=False, indent=2))
+            else:
+                analyzer.print_screen(args.conditions, **options)
+        elif command == 'rank':
+            options = dict(sort_by=args.sort, descending=args.descending, limit=args.limit or None,
+                           workers=args.workers)
+            if args.format == 'json':
+                import json
+                print(json.dumps(analyzer.rank_strategies(args.library, **options), ensure_ascii=False, indent=2))
+            else:
+                analyzer.print_strategy_ranking(args.library, **options)
+        elif command == 'overlap':
+            analyzer.print_holdings_overlap(args.holdings, args.strategy, args.top)
+        elif command == 'stress':
+            if args.format == 'json':
+                import json
+                result = analyzer.stress_test(args.scenarios)
+                print(json.dumps({
+                    'scenarios': [scenario.to_dict() for scenario in result.scenarios],
+                    'returns': {key: result.row(key) for key in result.keys},
+                }, ensure_ascii=False, indent=2))
+            else:
+                analyzer.print_stress_test(args.scenarios)
+        elif command == 'project':
+            options = dict(amount=args.amount, contribution=args.contribution,
+                           horizons=tuple(int(y) for y in args.years.split(',')), rate=args.rate)
+            if args.funds:
+                analyzer.print_fund_fees(args.funds.split(','), **options)
+            else:
+                for key in [args.strategy] if args.strategy else analyzer.strategies:
+                    if key not in analyzer.strategies:
+                        raise KeyError(f"Unknown strategy: {key}")
+                    print(f"\n{analyzer.strategies[key]['name']}")
+                    analyzer.print_projection(key, **options)
+        elif command == 'rebalance':
+            lot_ids = args.lots_to_sell.split(',') if args.lots_to_sell else None
+            options = dict(method=args.method, band=args.band, cash=args.cash, today=args.date, lot_ids=lot_ids)
+            if args.format == 'json':
+                import json
+                print(json.dumps(analyzer.rebalance_lots(args.lots, args.prices, args.strategy, **options),
+                                 ensure_ascii=False, indent=2))
+            else:
+                analyzer.print_rebalance(args.lots, args.prices, args.strategy, **options)
+        elif command == 'harvest':
+            if args.format == 'json':
+                import json
+                print(json.dumps(analyzer.harvest_losses(args.lots, args.prices, args.min_loss, args.date),
+                                 ensure_ascii=False, indent=2))
+            else:
+                analyzer.print_harvest(args.lots, args.prices, args.min_loss, args.date)
+        elif command == 'risk':
+            analyzer.load_risk_metrics(args.history, args.source)
+            if args.format == 'json':
+                import json
+                monitor = analyzer.risk_monitor()
+                print(json.dumps({
+                    'strategies': {key: monitor.strategies[key] for key in monitor.strategies.keys},
+                    'funds': {symbol: monitor.funds[symbol] for symbol in analyzer.store.symbols}
+                    if args.funds else {},
+                }, ensure_ascii=False, indent=2))
+            else:
+                analyzer.print_risk_metrics(funds=args.funds)
+        elif command == 'fund':
+            if args.format == 'json':
+                import json
+                print(json.dumps(analyzer.fund_detail(args.symbol), ensure_ascii=False))
+            else:
+                analyzer.print_fund_detail(args.symbol)
+        elif command == 'dashboard':
+            digest, written = analyzer.build_dashboard(args.out_dir, force=args.force)
+            print(f"Dashboard data {'written' if written else 'unchanged'} ({digest[:12]})")
+        elif command == 'score-clients':
+            summary = analyzer.score_clients(args.source, args.dest)
+            print(f"Scored {summary['clients']:,} clients")
+        elif args.output:
+            analyzer.write_reports({args.format: args.output})
+        else:
+            analyzer.generate_report(args.format)
     except Exception as e:
         print(f"[ERROR] {str(e)}")
         sys.exit(1)
+
+    if profiler:
+        json_path, prom_path = profiler.write(args.profile)
+        print(f"Profile written to {json_path} and {prom_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Historical Price Ingestion
+Daily price/distribution CSVs → append-only, memory-mapped columnar cache
+"""
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+# Column files per symbol: suffix -> array typecode
+COLUMNS = {
+    'dates': 'i',           # proleptic Gregorian ordinal
+    'close': 'd',
+    'distribution': 'd',    # cash distribution paid that day (dividend / cap gain)
+}
+
+DATE_HEADERS = ('date',)
+CLOSE_HEADERS = ('close', 'adj_close', 'price', 'nav')
+DISTRIBUTION_HEADERS = ('distribution', 'dividend', 'dividends')
+
+HEAD_BYTES = 4096
+MANIFEST = 'manifest.json'
+
+
+class PriceSeries:
+    """Read-only columns for one symbol (memoryviews over the mapped cache)"""
+
+    def __init__(self, symbol, dates, close, distribution):
+        self.symbol = symbol
+        self.dates = dates
+        self.close = close
+        self.distribution = distribution
+
+    def __len__(self):
+        return len(self.dates)
+
+    def index_on_or_before(self, ordinal):
+        """Row of the last trading day on or before ordinal, or -1"""
+        return bisect_right(self.dates, ordinal) - 1
+
+    def index_on_or_after(self, ordinal):
+        return bisect_left(self.dates, ordinal)
+
+
+class PriceCache:
+    """Columnar price cache in cache_dir, appended to incrementally from CSV files.
+
+    The manifest remembers, per symbol, how many rows are cached and the byte
+    offset already parsed in the source CSV, so a rerun only stats unchanged
+    files and only parses the bytes appended since the last run.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, separators=(',', ':'))
+        os.replace(tmp_path, self.manifest_path)
+
+    def _column_path(self, symbol, column):
+        return os.path.join(self.cache_dir, f"{symbol}.{column}")
+
+    def __contains__(self, symbol):
+        return symbol in self.manifest
+
+    def symbols(self):
+        return list(self.manifest)
+
+    def rows(self, symbol):
+        entry = self.manifest.get(symbol)
+        return entry['rows'] if entry else 0
+
+    # ── Ingestion ──────────────────────────────────────────────────
+
+    def ingest(self, source_dir, symbols=None):
+        """Ingest <source_dir>/<SYMBOL>.csv files, returning {symbol: rows appended}"""
+        if symbols is None:
+            symbols = sorted(name[:-4] for name in os.listdir(source_dir) if name.endswith('.csv'))
+
+        appended = {}
+        for symbol in symbols:
+            path = os.path.join(source_dir, f"{symbol}.csv")
+            if os.path.exists(path):
+                appended[symbol] = self._ingest_file(symbol, path)
+
+        self._save_manifest()
+        return appended
+
+    def _ingest_file(self, symbol, path):
+        stat = os.stat(path)
+        entry = self.manifest.get(symbol)
+
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return 0
+
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+
+            # Rewritten or truncated source → rebuild this symbol from scratch
+            if entry and (stat.st_size < entry['offset'] or
+                          hashlib.sha1(head[:entry['head_len']]).hexdigest() != entry['head']):
+                entry = None
+
+            if entry is None:
+                self._reset(symbol)
+                entry = {'rows': 0, 'offset': 0, 'last_date': None, 'fields': None}
+            else:
+                self._repair(symbol, entry['rows'])
+
+            f.seek(entry['offset'])
+            chunk = f.read()
+
+        # Only parse complete lines; a partially written last line waits for the next run
+        end = chunk.rfind(b'\n') + 1
+        lines = chunk[:end].decode('utf-8').splitlines()
+        if entry['fields'] is None and lines:
+            entry['fields'] = _header_fields(next(csv.reader([lines[0]])), path)
+            lines = lines[1:]
+
+        new_rows = self._append(symbol, entry, csv.reader(lines))
+
+        offset = entry['offset'] + end
+        head_len = min(offset, HEAD_BYTES)
+        entry.update({
+            'rows': entry['rows'] + new_rows,
+            'offset': offset,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'head': hashlib.sha1(head[:head_len]).hexdigest(),
+            'head_len': head_len,
+        })
+        self.manifest[symbol] = entry
+        return new_rows
+
+    def _append(self, symbol, entry, records):
+        date_idx, close_idx, dist_idx = entry['fields']
+        last_date = entry['last_date']
+        dates, close, distribution = array('i'), array('d'), array('d')
+
+        for record in records:
+            if not record or not record[date_idx].strip():
+                continue
+            ordinal = date.fromisoformat(record[date_idx].strip()).toordinal()
+            if last_date is not None and ordinal <= last_date:
+                continue    # already cached or out of order
+            dates.append(ordinal)
+            close.append(float(record[close_idx]))
+            distribution.append(float(record[dist_idx] or 0.0) if dist_idx >= 0 else 0.0)
+            last_date = ordinal
+
+        if dates:
+            for column, values in zip(COLUMNS, (dates, close, distribution)):
+                with open(self._column_path(symbol, column), 'ab') as f:
+                    values.tofile(f)
+            entry['last_date'] = last_date
+        return len(dates)
+
+    def _reset(self, symbol):
+        for column in COLUMNS:
+            with open(self._column_path(symbol, column), 'wb'):
+                pass
+
+    def _repair(self, symbol, rows):
+        # Drop rows written by an interrupted run the manifest never recorded
+        for column, typecode in COLUMNS.items():
+            path = self._column_path(symbol, column)
+            expected = rows * array(typecode).itemsize
+            if os.path.getsize(path) != expected:
+                with open(path, 'r+b') as f:
+                    f.truncate(expected)
+
+    # ── Reading ────────────────────────────────────────────────────
+
+    def series(self, symbol):
+        """Memory-mapped PriceSeries for a cached symbol"""
+        rows = self.rows(symbol)
+        columns = [self._map_column(symbol, column, typecode, rows)
+                   for column, typecode in COLUMNS.items()]
+        return PriceSeries(symbol, *columns)
+
+    def _map_column(self, symbol, column, typecode, rows):
+        if rows == 0:
+            return memoryview(array(typecode))
+        with open(self._column_path(symbol, column), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), rows * array(typecode).itemsize, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(typecode)
+
+
+def _header_fields(header, path):
+    names = [name.strip().lower() for name in header]
+
+    def find(candidates, required=True):
+        for candidate in candidates:
+            if candidate in names:
+                return names.index(candidate)
+        if required:
+            raise ValueError(f"{path}: missing one of columns {', '.join(candidates)}")
+        return -1
+
+    return [find(DATE_HEADERS), find(CLOSE_HEADERS), find(DISTRIBUTION_HEADERS, required=False)]
+
+
+def _window_return(series, end, start_ordinal, years=1):
+    """Distribution-inclusive return from start_ordinal to row end, annualized over years"""
+    start = series.index_on_or_before(start_ordinal)
+    if start < 0 or start >= end:
+        return None
+    paid = sum(series.distribution[start + 1:end + 1])
+    growth = (series.close[end] + paid) / series.close[start]
+    return growth ** (1 / years) - 1
+
+
+def trailing_metrics(series):
+    """ytd / one_yr / three_yr (annualized) / dividend yield as of the last cached day"""
+    if len(series) < 2:
+        return {}
+
+    end = len(series) - 1
+    as_of = date.fromordinal(series.dates[end])
+    last_close = series.close[end]
+    one_year_ago = as_of.toordinal() - 365
+
+    metrics = {
+        'ytd': _window_return(series, end, date(as_of.year - 1, 12, 31).toordinal()),
+        'one_yr': _window_return(series, end, one_year_ago),
+        'three_yr': _window_return(series, end, as_of.toordinal() - 3 * 365, years=3),
+    }
+    start = series.index_on_or_after(one_year_ago + 1)
+    if last_close > 0:
+        metrics['dividend'] = sum(series.distribution[start:end + 1]) / last_close
+    return {field: value for field, value in metrics.items() if value is not None}
+
+
+def aligned_panel(cache, symbols, start=None, end=None):
+    """Closes and distributions for symbols on the trading days they all share.
+
+    Returns (dates, {symbol: (close list, distribution list)}), restricted to
+    start..end ordinals when given.
+    """
+    series = {symbol: cache.series(symbol) for symbol in symbols}
+    common = None
+    for s in series.values():
+        common = set(s.dates) if common is None else common.intersection(s.dates)
+    dates = sorted(d for d in common or () if (start is None or d >= start) and (end is None or d <= end))
+
+    panel = {}
+    for symbol, s in series.items():
+        position = dict(zip(s.dates, range(len(s))))
+        rows = list(map(position.__getitem__, dates))
+        close = list(map(s.close.__getitem__, rows))
+        distribution = list(map(s.distribution.__getitem__, rows))
+        panel[symbol] = (close, distribution)
+    return dates, panel
+
+
+def refresh_store(store, cache, symbols=None):
+    """Overwrite trailing-return fields in store from the cache, returning {symbol: metrics}"""
+    updated = {}
+    for symbol in symbols if symbols is not None else store.symbols:
+        if symbol not in cache or symbol not in store:
+            continue
+        metrics = trailing_metrics(cache.series(symbol))
+        if metrics:
+            store.set_metrics(symbol, **metrics)
+            updated[symbol] = metrics
+    return updated
@@ -0,0 +1,157 @@
+"""
+Fee-Drag Projections
+Closed-form net-of-fee compounding with reinvested dividends and contributions, over horizons × amounts
+"""
+
+from array import array
+from operator import add, mul
+
+from strategy_engine import WeightMatrix
+
+HORIZONS = tuple(range(1, 41))
+SUMMARY_HORIZONS = (1, 5, 10, 20, 30, 40)
+AMOUNTS = (1_000.0, 10_000.0, 100_000.0)
+RATE_FIELDS = ('one_yr', 'three_yr')
+DEFAULT_RATE = 'three_yr'
+# Long-run bounds on a trailing total return: a hot (or cold) year or three
+# compounded unchanged for decades gives meaningless ending values
+LONG_RUN_RATES = (0.0, 0.10)
+
+
+def annual_rates(store, rate=DEFAULT_RATE, bounds=LONG_RUN_RATES):
+    """Per-fund assumed annual total return before fees.
+
+    rate is a trailing total-return field ('one_yr', 'three_yr', already
+    including dividends; clamped to the long-run bounds) or a number assumed
+    for every fund.
+    """
+    if isinstance(rate, (int, float)):
+        return array('d', [float(rate)]) * len(store)
+    if rate not in RATE_FIELDS:
+        raise ValueError(f"Unknown rate: {rate} (expected a number or one of {', '.join(RATE_FIELDS)})")
+    low, high = bounds
+    return array('d', [min(max(r, low), high) for r in store.columns[rate]])
+
+
+def describe_rate(rate):
+    if isinstance(rate, (int, float)):
+        return f"{rate*100:.1f}%/yr assumed for every fund"
+    low, high = LONG_RUN_RATES
+    return f"trailing {rate} returns capped to {low*100:.0f}-{high*100:.0f}%/yr"
+
+
+def growth_factors(store, rate=DEFAULT_RATE):
+    """Per-fund (gross, net) annual growth factors.
+
+    gross = 1 + annual total return (dividends reinvested);
+    net = gross × (1 − expense ratio), the fee taken from assets each year.
+    """
+    expense = store.columns['expense_ratio']
+    gross = array('d', [1.0 + r for r in annual_rates(store, rate)])
+    net = array('d', [g * (1.0 - e) for g, e in zip(gross, expense)])
+    return gross, net
+
+
+def compound(factor, years):
+    """(growth of 1, value of 1 contributed at each year end) after `years` years"""
+    growth = factor ** years
+    annuity = years if abs(factor - 1.0) < 1e-12 else (growth - 1.0) / (factor - 1.0)
+    return growth, annuity
+
+
+def project_fund(store, symbol, years, amount, contribution=0.0, rate=DEFAULT_RATE, factors=None):
+    """{'gross', 'net', 'fee_cost'} ending values for one fund.
+
+    Pass factors (from growth_factors) when projecting many funds, so the
+    per-fund rates are computed once rather than per call.
+    """
+    row = store.row(symbol)
+    gross, net = factors or growth_factors(store, rate)
+    g_growth, g_annuity = compound(gross[row], years)
+    n_growth, n_annuity = compound(net[row], years)
+    gross_value = amount * g_growth + contribution * g_annuity
+    net_value = amount * n_growth + contribution * n_annuity
+    return {'gross': gross_value, 'net': net_value, 'fee_cost': gross_value - net_value}
+
+
+class ProjectionGrid:
+    """Ending values of every allocation on a horizon grid, linear in amount and contribution.
+
+    Each holding compounds at its own net factor (buy and hold, no rebalancing),
+    so for allocation weights w and horizon h:
+
+        value = amount · Σ w·qʰ + contribution · Σ w·(qʰ − 1)/(q − 1)
+
+    Both sums are filled for every horizon in one pass over the nonzeros per
+    year, so any amount or contribution is two multiplications away.
+    """
+
+    def __init__(self, store, allocations, horizons=HORIZONS, rate=DEFAULT_RATE):
+        self.store = store
+        self.horizons = tuple(horizons)
+        self.rate = rate
+        self.matrix = WeightMatrix.from_allocations(store, allocations)
+        self.keys = self.matrix.keys
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+
+        self.factors = gross, net = growth_factors(store, rate)
+        matrix = self.matrix
+        slices = list(map(slice, matrix.indptr[:-1], matrix.indptr[1:]))
+        wanted = set(self.horizons)
+        self.growth = {}    # (basis, horizon) -> per-allocation Σ w·qʰ
+        self.annuity = {}   # (basis, horizon) -> per-allocation Σ w·(qʰ − 1)/(q − 1)
+        for basis, factors in (('gross', gross), ('net', net)):
+            # Per-nonzero terms w·qʰ advance one year per pass; row sums give
+            # Gʰ = Σ w·qʰ, and the annuity is the running sum Aʰ = Aʰ⁻¹ + Gʰ⁻¹
+            # (plain lists: map over lists skips the array boxing round trip)
+            step = list(map(factors.__getitem__, matrix.indices))
+            terms = list(matrix.data)
+            growth = matrix.row_sums()
+            annuity = array('d', bytes(8 * len(matrix)))
+            for year in range(1, max(self.horizons, default=0) + 1):
+                annuity = array('d', map(add, annuity, growth))
+                terms = list(map(mul, terms, step))
+                growth = array('d', map(sum, map(terms.__getitem__, slices)))
+                if year in wanted:
+                    self.growth[basis, year] = growth
+                    self.annuity[basis, year] = annuity
+
+    def value(self, key, horizon, amount, contribution=0.0, basis='net'):
+        i = self._positions[key]
+        return amount * self.growth[basis, horizon][i] + contribution * self.annuity[basis, horizon][i]
+
+    def grid(self, basis='net', amounts=AMOUNTS, contribution=0.0):
+        """{(horizon, amount): ending values, one per allocation in self.keys order}"""
+        grid = {}
+        for h in self.horizons:
+            growth, annuity = self.growth[basis, h], self.annuity[basis, h]
+            contributed = array('d', map(contribution.__mul__, annuity))
+            for a in amounts:
+                grid[h, a] = array('d', map(add, map(a.__mul__, growth), contributed))
+        return grid
+
+    def summary(self, key, amount, contribution=0.0, horizons=None):
+        """[{'years', 'contributed', 'gross', 'net', 'fee_cost'}] for one allocation"""
+        rows = []
+        for horizon in horizons or self.horizons:
+            gross = self.value(key, horizon, amount, contribution, 'gross')
+            net = self.value(key, horizon, amount, contribution, 'net')
+            rows.append({
+                'years': horizon,
+                'contributed': amount + contribution * horizon,
+                'gross': gross,
+                'net': net,
+                'fee_cost': gross - net,
+            })
+        return rows
+
+    def fee_costs(self, key, horizon, amount, contribution=0.0):
+        """[(symbol, weight, expense ratio, fee cost)] per holding, costliest first"""
+        store = self.store
+        indices, weights = self.matrix.row(self._positions[key])
+        costs = []
+        for row, weight in zip(indices, weights):
+            fund = project_fund(store, store.symbols[row], horizon, amount * weight,
+                                contribution * weight, factors=self.factors)
+            costs.append((store.symbols[row], weight, store.columns['expense_ratio'][row], fund['fee_cost']))
+        return sorted(costs, key=lambda x: -x[3])
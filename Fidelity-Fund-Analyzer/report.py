@@ -0,0 +1,504 @@
+"""
+Report Model + Renderers
+Compute the report once, then write it as text, Markdown, JSON or HTML
+"""
+
+import html
+import json
+from datetime import datetime
+
+from instrumentation import count, span
+from risk_metrics import holdings_tier
+from strategy_engine import holding_values
+
+WIDTH = 130
+
+TITLE = "📊 COMPREHENSIVE PORTFOLIO ANALYZER"
+
+IMPLEMENTATION_STEPS = (
+    ('Month 1-2', 'Invest ~$3,300 (core positions)'),
+    ('Month 2-3', 'Invest ~$3,300 (diversify)'),
+    ('Month 3-4', 'Invest ~$3,400 (complete allocation)'),
+    ('Quarterly', 'Rebalance to targets'),
+    ('On 20%+ dips', 'Deploy cash reserves'),
+)
+# The text report has always printed this step with a two-space gap
+TEXT_STEP_SEPARATORS = {'Quarterly': ':  '}
+
+PRINCIPLES = (
+    ('Dollar-Cost Averaging', (
+        'Spread $10K over 3-4 months, not lump sum. Reduces timing risk.',
+    )),
+    ('Rebalancing', (
+        'Review quarterly. Rebalance when any position deviates >20% from target.',
+    )),
+    ('Emergency Fund First', (
+        'Keep 6 months expenses in safe funds BEFORE aggressive strategies.',
+    )),
+    ('Fidelity vs ETFs', (
+        'Fidelity funds offer expertise; ETFs offer low costs. Mix both for balance.',
+    )),
+    ('Tax Efficiency', (
+        'Fidelity mutual funds in taxable accounts; ETFs for tax efficiency; mutual funds in 401k.',
+    )),
+    ('Monitoring', (
+        'Conservative: quarterly | Moderate: quarterly | Aggressive+: monthly',
+        'Moonshot: weekly (high volatility)',
+    )),
+)
+
+
+# ── Model ──────────────────────────────────────────────────────────
+
+class ReportModel:
+    """Every number in the report, computed once and shared by all renderers.
+
+    Catalog rows are read from the fund store on demand, so a large universe
+    streams straight to the output instead of being copied into the model.
+    """
+
+    def __init__(self, store, comparison, strategies, generated=None):
+        self.store = store
+        self.comparison = comparison
+        self.strategies = strategies
+        self.generated = generated or datetime.now()
+        self.principles = PRINCIPLES
+        self.implementation = IMPLEMENTATION_STEPS
+
+    @property
+    def subtitle(self):
+        return f"Stocks + ETFs + Mutual Funds | {len(self.strategies)} Complete Strategy Archetypes"
+
+    def categories(self):
+        """(category key, label, row range) in catalog order"""
+        return self.store.iter_categories()
+
+    def catalog_rows(self, rows):
+        """Yield catalog dicts for a row range"""
+        store = self.store
+        one_yr = store.columns['one_yr']
+        dividend = store.columns['dividend']
+        for row in rows:
+            yield {
+                'symbol': store.symbols[row],
+                'name': store.names[row],
+                'type': store.types[row],
+                'one_yr': one_yr[row],
+                'dividend': dividend[row],
+                'risk': store.risk(row),
+            }
+
+
+def comparison_risk(store, allocation, tier=None):
+    """Strategy risk label: the measured tier when price history gave one, else its holdings' tiers"""
+    return (tier or holdings_tier(store, allocation)).upper()
+
+
+def comparison_row(store, key, strategy, tier=None):
+    return {
+        'key': key,
+        'name': strategy['name'],
+        'expected_return': strategy['expected_return'],
+        'max_drawdown': strategy['max_drawdown'],
+        'time_horizon': strategy['time_horizon'],
+        'risk': comparison_risk(store, strategy['allocation'], tier),
+    }
+
+
+def build_comparison(store, strategies, tiers=None):
+    tiers = tiers or {}
+    return [comparison_row(store, key, s, tiers.get(key)) for key, s in strategies.items()]
+
+
+def build_strategy(store, key, strategy, amount=1000.0):
+    count('store_lookups', len(strategy['allocation']))
+    holdings = []
+    total_invested = total_value = 0
+    for symbol, row, pct, invested, ending_value, gain in holding_values(store, strategy['allocation'], amount=amount):
+        total_invested += invested
+        total_value += ending_value
+        holdings.append({
+            'symbol': symbol,
+            'name': store.names[row],
+            'allocation': pct,
+            'invested': invested,
+            'ending_value': ending_value,
+            'gain': gain,
+        })
+    return {
+        'key': key,
+        'name': strategy['name'],
+        'subtitle': strategy['subtitle'],
+        'expected_return': strategy['expected_return'],
+        'max_drawdown': strategy['max_drawdown'],
+        'time_horizon': strategy['time_horizon'],
+        'best_for': strategy['best_for'],
+        'holdings': holdings,
+        'total_invested': total_invested,
+        'total_value': total_value,
+        'total_gain': total_value - total_invested,
+    }
+
+
+def build_report(store, strategies, generated=None, tiers=None):
+    """Compute every section of the report once"""
+    with span('build'):
+        with span('comparison'):
+            comparison = build_comparison(store, strategies, tiers)
+        sections = []
+        for key, s in strategies.items():
+            with span(f'strategy:{key}'):
+                sections.append(build_strategy(store, key, s))
+    return ReportModel(store, comparison, sections, generated=generated)
+
+
+# ── Renderers ──────────────────────────────────────────────────────
+
+class Renderer:
+    """Writes a ReportModel to one text stream, section by section"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.write = stream.write
+
+    def line(self, text=''):
+        self.write(text)
+        self.write('\n')
+
+    def render(self, model):
+        with span('render'):
+            with span('header'):
+                self.header(model)
+            with span('catalog'):
+                self.catalog(model)
+            count('rows_rendered', len(model.store))
+            with span('comparison'):
+                self.comparison(model)
+            count('rows_rendered', len(model.comparison))
+            for strategy in model.strategies:
+                with span(f"strategy:{strategy['key']}"):
+                    self.strategy(model, strategy)
+                count('rows_rendered', len(strategy['holdings']))
+            with span('principles'):
+                self.principles(model)
+            with span('footer'):
+                self.footer(model)
+
+    def header(self, model):
+        pass
+
+    def footer(self, model):
+        pass
+
+
+class TextRenderer(Renderer):
+    """Fixed-width console report (the original stdout layout)"""
+
+    def header(self, model):
+        self.line("\n" + "=" * WIDTH)
+        self.line(TITLE)
+        self.line(model.subtitle)
+        self.line(f"Generated: {model.generated.strftime('%A, %B %d, %Y — %I:%M %p EST')}")
+        self.line("=" * WIDTH)
+
+    def catalog(self, model):
+        line = self.line
+        line(f"\n{'='*WIDTH}")
+        line("📚 AVAILABLE INVESTMENTS CATALOG")
+        line(f"{'='*WIDTH}\n")
+
+        for _, label, rows in model.categories():
+            line(f"\n{label}")
+            line(f"{'-'*WIDTH}")
+            line(f"{'Symbol':<10} {'Fund Name':<45} {'Type':<25} {'1-Yr':<10} {'Dividend':<12} {'Risk':<15}")
+            line(f"{'-'*WIDTH}")
+            for fund in model.catalog_rows(rows):
+                line(
+                    f"{fund['symbol']:<10} {fund['name']:<45} {fund['type']:<25} "
+                    f"{fund['one_yr']*100:>6.0f}%    {fund['dividend']*100:>5.2f}%    {fund['risk']:<15}"
+                )
+
+    def comparison(self, model):
+        line = self.line
+        line(f"\n{'='*WIDTH}")
+        line(f"ALL {len(model.comparison)} STRATEGIES COMPARISON")
+        line(f"{'='*WIDTH}\n")
+
+        line(f"{'Strategy':<20} {'Expected Return':<22} {'Max Drawdown':<20} {'Time Horizon':<20} {'Risk Level':<20}")
+        line(f"{'-'*WIDTH}")
+        for s in model.comparison:
+            line(f"{s['name']:<20} {s['expected_return']:<22} {s['max_drawdown']:<20} {s['time_horizon']:<20} {s['risk']:<20}")
+
+    def strategy(self, model, s):
+        line = self.line
+        line(f"\n{'='*WIDTH}")
+        line(s['name'])
+        line(s['subtitle'])
+        line(f"{'='*WIDTH}\n")
+
+        line(f"Expected Annual Return:  {s['expected_return']}")
+        line(f"Max Drawdown Risk:       {s['max_drawdown']}")
+        line(f"Time Horizon:            {s['time_horizon']}")
+        line(f"Best For:                {s['best_for']}\n")
+
+        line("PORTFOLIO ALLOCATION:\n")
+        line(f"{'Symbol':<10} {'Fund Name':<45} {'Allocation':<15} {'$1K Invested':<18} {'1-Year Value':<18} {'Gain/Loss':<15}")
+        line(f"{'-'*WIDTH}")
+        for h in s['holdings']:
+            line(
+                f"{h['symbol']:<10} {h['name']:<45} {h['allocation']*100:>6.0f}%      "
+                f"${h['invested']:>7,.0f}         ${h['ending_value']:>7,.0f}         ${h['gain']:>7,.0f}"
+            )
+        line(f"{'-'*WIDTH}")
+        line(
+            f"{'TOTAL':<10} {'':<45} {'100%':>7}      "
+            f"${s['total_invested']:>7,.0f}         ${s['total_value']:>7,.0f}         ${s['total_gain']:>7,.0f}"
+        )
+
+        line(f"\n\nRECOMMENDED IMPLEMENTATION:")
+        steps = model.implementation
+        for i, (when, what) in enumerate(steps):
+            branch = '└─' if i == len(steps) - 1 else '├─'
+            line(f"{branch} {when}{TEXT_STEP_SEPARATORS.get(when, ': ')}{what}")
+
+    def principles(self, model):
+        line = self.line
+        line(f"\n\n{'='*WIDTH}")
+        line("⚠️  KEY PRINCIPLES")
+        line(f"{'='*WIDTH}\n")
+        for i, (title, lines) in enumerate(model.principles, start=1):
+            line(f"{i}. **{title}:**")
+            for text in lines[:-1]:
+                line(f"   {text}")
+            line(f"   {lines[-1]}\n")
+
+    def footer(self, model):
+        self.line(f"{'='*WIDTH}")
+        self.line(f"✅ Report generated {model.generated.strftime('%I:%M %p EST')}")
+        self.line(f"{'='*WIDTH}\n")
+
+
+def _md(text):
+    return str(text).replace('|', '\\|')
+
+
+class MarkdownRenderer(Renderer):
+    """GitHub-flavored Markdown (PORTFOLIO_REPORT.md)"""
+
+    def header(self, model):
+        self.line(f"# {TITLE.title()}\n")
+        self.line(f"_{model.subtitle}_  ")
+        self.line(f"Generated: {model.generated.strftime('%A, %B %d, %Y — %I:%M %p EST')}\n")
+
+    def catalog(self, model):
+        line = self.line
+        line("## 📚 Available Investments Catalog\n")
+        for _, label, rows in model.categories():
+            line(f"### {_md(label)}\n")
+            line("| Symbol | Fund Name | Type | 1-Yr | Dividend | Risk |")
+            line("|--------|-----------|------|-----:|---------:|------|")
+            for fund in model.catalog_rows(rows):
+                line(
+                    f"| {fund['symbol']} | {_md(fund['name'])} | {_md(fund['type'])} | "
+                    f"{fund['one_yr']*100:.0f}% | {fund['dividend']*100:.2f}% | {fund['risk']} |"
+                )
+            line()
+
+    def comparison(self, model):
+        line = self.line
+        line(f"## All {len(model.comparison)} Strategies Comparison\n")
+        line("| Strategy | Expected Return | Max Drawdown | Time Horizon | Risk Level |")
+        line("|----------|-----------------|--------------|--------------|------------|")
+        for s in model.comparison:
+            line(f"| {_md(s['name'])} | {_md(s['expected_return'])} | {_md(s['max_drawdown'])} | "
+                 f"{_md(s['time_horizon'])} | {s['risk']} |")
+        line()
+
+    def strategy(self, model, s):
+        line = self.line
+        line(f"## {_md(s['name'])}\n")
+        line(f"**{_md(s['subtitle'])}**\n")
+        line(f"- **Expected Annual Return:** {_md(s['expected_return'])}")
+        line(f"- **Max Drawdown Risk:** {_md(s['max_drawdown'])}")
+        line(f"- **Time Horizon:** {_md(s['time_horizon'])}")
+        line(f"- **Best For:** {_md(s['best_for'])}\n")
+
+        line("### Portfolio Allocation\n")
+        line("| Symbol | Fund Name | Allocation | $1K Invested | 1-Year Value | Gain/Loss |")
+        line("|--------|-----------|-----------:|-------------:|-------------:|----------:|")
+        for h in s['holdings']:
+            line(f"| {h['symbol']} | {_md(h['name'])} | {h['allocation']*100:.0f}% | "
+                 f"${h['invested']:,.0f} | ${h['ending_value']:,.0f} | ${h['gain']:,.0f} |")
+        line(f"| **TOTAL** | | **100%** | **${s['total_invested']:,.0f}** | **${s['total_value']:,.0f}** | **${s['total_gain']:,.0f}** |\n")
+
+        line("### Recommended Implementation\n")
+        for when, what in model.implementation:
+            line(f"- **{when}:** {what}")
+        line()
+
+    def principles(self, model):
+        line = self.line
+        line("## ⚠️ Key Principles\n")
+        for i, (title, lines) in enumerate(model.principles, start=1):
+            line(f"{i}. **{title}:** {' '.join(lines)}")
+        line()
+
+    def footer(self, model):
+        self.line("---\n")
+        self.line(f"✅ Report generated {model.generated.strftime('%I:%M %p EST')}")
+
+
+class JsonRenderer(Renderer):
+    """Machine-readable report, streamed fund by fund"""
+
+    def dump(self, value):
+        self.write(json.dumps(value, ensure_ascii=False))
+
+    def header(self, model):
+        self.write('{"title":')
+        self.dump(TITLE)
+        self.write(',"subtitle":')
+        self.dump(model.subtitle)
+        self.write(',"generated":')
+        self.dump(model.generated.isoformat(timespec='seconds'))
+
+    def catalog(self, model):
+        self.write(',"catalog":[')
+        for i, (key, label, rows) in enumerate(model.categories()):
+            if i:
+                self.write(',')
+            self.write('{"key":')
+            self.dump(key)
+            self.write(',"category":')
+            self.dump(label)
+            self.write(',"funds":[')
+            for j, fund in enumerate(model.catalog_rows(rows)):
+                if j:
+                    self.write(',')
+                self.dump(fund)
+            self.write(']}')
+        self.write(']')
+
+    def comparison(self, model):
+        self.write(',"comparison":')
+        self.dump(model.comparison)
+        self.write(',"strategies":[')
+        self._strategies_written = 0
+
+    def strategy(self, model, s):
+        if self._strategies_written:
+            self.write(',')
+        self.dump(s)
+        self._strategies_written += 1
+
+    def principles(self, model):
+        self.write('],"implementation":')
+        self.dump([{'when': when, 'what': what} for when, what in model.implementation])
+        self.write(',"principles":')
+        self.dump([{'title': title, 'text': ' '.join(lines)} for title, lines in model.principles])
+
+    def footer(self, model):
+        self.write('}\n')
+
+
+class HtmlRenderer(Renderer):
+    """Standalone HTML page with one table per section"""
+
+    def header(self, model):
+        esc = html.escape
+        self.line('<!DOCTYPE html>')
+        self.line('<html lang="en"><head><meta charset="UTF-8">')
+        self.line(f'<title>{esc(TITLE.title())}</title>')
+        self.line('<style>body{font-family:system-ui,sans-serif;max-width:1100px;margin:24px auto;color:#1e293b}'
+                  'table{border-collapse:collapse;width:100%;margin:8px 0 24px}'
+                  'th,td{border-bottom:1px solid #e2e8f0;padding:6px 8px;text-align:left}'
+                  'td.num,th.num{text-align:right}</style>')
+        self.line('</head><body>')
+        self.line(f'<h1>{esc(TITLE.title())}</h1>')
+        self.line(f'<p><em>{esc(model.subtitle)}</em><br>'
+                  f'Generated: {esc(model.generated.strftime("%A, %B %d, %Y — %I:%M %p EST"))}</p>')
+
+    def catalog(self, model):
+        esc = html.escape
+        self.line('<h2>📚 Available Investments Catalog</h2>')
+        for _, label, rows in model.categories():
+            self.line(f'<h3>{esc(label)}</h3>')
+            self.line('<table><tr><th>Symbol</th><th>Fund Name</th><th>Type</th>'
+                      '<th class="num">1-Yr</th><th class="num">Dividend</th><th>Risk</th></tr>')
+            for fund in model.catalog_rows(rows):
+                self.line(
+                    f"<tr><td>{esc(fund['symbol'])}</td><td>{esc(fund['name'])}</td><td>{esc(fund['type'])}</td>"
+                    f"<td class=\"num\">{fund['one_yr']*100:.0f}%</td><td class=\"num\">{fund['dividend']*100:.2f}%</td>"
+                    f"<td>{esc(fund['risk'])}</td></tr>"
+                )
+            self.line('</table>')
+
+    def comparison(self, model):
+        esc = html.escape
+        self.line(f'<h2>All {len(model.comparison)} Strategies Comparison</h2>')
+        self.line('<table><tr><th>Strategy</th><th>Expected Return</th><th>Max Drawdown</th>'
+                  '<th>Time Horizon</th><th>Risk Level</th></tr>')
+        for s in model.comparison:
+            self.line(f"<tr><td>{esc(s['name'])}</td><td>{esc(s['expected_return'])}</td>"
+                      f"<td>{esc(s['max_drawdown'])}</td><td>{esc(s['time_horizon'])}</td><td>{esc(s['risk'])}</td></tr>")
+        self.line('</table>')
+
+    def strategy(self, model, s):
+        esc = html.escape
+        self.line(f"<h2>{esc(s['name'])}</h2>")
+        self.line(f"<p><strong>{esc(s['subtitle'])}</strong></p>")
+        self.line('<ul>')
+        self.line(f"<li>Expected Annual Return: {esc(s['expected_return'])}</li>")
+        self.line(f"<li>Max Drawdown Risk: {esc(s['max_drawdown'])}</li>")
+        self.line(f"<li>Time Horizon: {esc(s['time_horizon'])}</li>")
+        self.line(f"<li>Best For: {esc(s['best_for'])}</li>")
+        self.line('</ul>')
+        self.line('<table><tr><th>Symbol</th><th>Fund Name</th><th class="num">Allocation</th>'
+                  '<th class="num">$1K Invested</th><th class="num">1-Year Value</th><th class="num">Gain/Loss</th></tr>')
+        for h in s['holdings']:
+            self.line(f"<tr><td>{esc(h['symbol'])}</td><td>{esc(h['name'])}</td>"
+                      f"<td class=\"num\">{h['allocation']*100:.0f}%</td><td class=\"num\">${h['invested']:,.0f}</td>"
+                      f"<td class=\"num\">${h['ending_value']:,.0f}</td><td class=\"num\">${h['gain']:,.0f}</td></tr>")
+        self.line(f"<tr><th>TOTAL</th><th></th><th class=\"num\">100%</th><th class=\"num\">${s['total_invested']:,.0f}</th>"
+                  f"<th class=\"num\">${s['total_value']:,.0f}</th><th class=\"num\">${s['total_gain']:,.0f}</th></tr>")
+        self.line('</table>')
+        self.line('<h3>Recommended Implementation</h3><ul>')
+        for when, what in model.implementation:
+            self.line(f"<li><strong>{esc(when)}:</strong> {esc(what)}</li>")
+        self.line('</ul>')
+
+    def principles(self, model):
+        esc = html.escape
+        self.line('<h2>⚠️ Key Principles</h2><ol>')
+        for title, lines in model.principles:
+            self.line(f"<li><strong>{esc(title)}:</strong> {esc(' '.join(lines))}</li>")
+        self.line('</ol>')
+
+    def footer(self, model):
+        self.line(f"<p>✅ Report generated {html.escape(model.generated.strftime('%I:%M %p EST'))}</p>")
+        self.line('</body></html>')
+
+
+RENDERERS = {
+    'text': TextRenderer,
+    'markdown': MarkdownRenderer,
+    'json': JsonRenderer,
+    'html': HtmlRenderer,
+}
+
+BUFFER_SIZE = 1 << 16
+
+
+def render(model, fmt, stream):
+    """Write model to an open text stream in the given format"""
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown report format: {fmt} (expected one of {', '.join(RENDERERS)})") from None
+    renderer(stream).render(model)
+
+
+def write(model, fmt, path):
+    """Render model to a file through one buffered stream"""
+    with open(path, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as stream:
+        render(model, fmt, stream)
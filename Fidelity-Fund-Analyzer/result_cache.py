@@ -0,0 +1,214 @@
+"""
+Persistent Result Cache
+SQLite (WAL) store for fund metric history and computed strategy results
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+from fund_store import METRIC_FIELDS
+
+# fund_snapshots is a plain rowid table: two snapshots of a fund with the
+# same timestamp are both kept, in insertion (rowid) order
+SNAPSHOTS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS fund_snapshots (
+    symbol TEXT NOT NULL,
+    taken_at TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    {', '.join(f'{field} REAL' for field in METRIC_FIELDS)},
+    risk TEXT
+);
+"""
+
+SCHEMA = SNAPSHOTS_TABLE + """
+CREATE INDEX IF NOT EXISTS fund_snapshots_symbol ON fund_snapshots (symbol, taken_at);
+CREATE TABLE IF NOT EXISTS fund_latest (
+    symbol TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS result_deps (
+    key TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    PRIMARY KEY (symbol, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_lru ON results (last_used);
+CREATE INDEX IF NOT EXISTS result_deps_key ON result_deps (key);
+"""
+
+
+def fund_hash(store, row):
+    """Hash of everything a computed result can depend on for one fund"""
+    record = store.record(row)
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Results keyed by a hash of their inputs, invalidated per fund, evicted LRU past max_bytes"""
+
+    def __init__(self, path, max_bytes=64 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.conn.close()
+
+    def _migrate(self):
+        # Caches written before snapshots were keyed by rowid had PRIMARY KEY
+        # (symbol, taken_at), which made same-second snapshots overwrite each other
+        columns = self.conn.execute('PRAGMA table_info(fund_snapshots)').fetchall()
+        if not any(pk for *_, pk in columns):
+            return
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute('ALTER TABLE fund_snapshots RENAME TO fund_snapshots_old')
+            self.conn.execute(SNAPSHOTS_TABLE)
+            self.conn.execute('INSERT INTO fund_snapshots SELECT * FROM fund_snapshots_old ORDER BY taken_at')
+            self.conn.execute('DROP TABLE fund_snapshots_old')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── Fund snapshots ─────────────────────────────────────────────
+
+    def record_snapshot(self, store, taken_at=None):
+        """Store metrics for funds that changed since the last snapshot.
+
+        Results depending on a changed fund are invalidated. Returns the
+        changed symbols.
+        """
+        taken_at = taken_at or datetime.now().isoformat(timespec='microseconds')
+        latest = dict(self.conn.execute('SELECT symbol, hash FROM fund_latest'))
+        changed = []
+        snapshots = []
+        for row, symbol in enumerate(store.symbols):
+            digest = fund_hash(store, row)
+            if latest.get(symbol) == digest:
+                continue
+            changed.append(symbol)
+            metrics = [store.columns[field][row] for field in METRIC_FIELDS]
+            snapshots.append((symbol, taken_at, digest, *metrics, store.risk(row)))
+
+        if changed:
+            placeholders = ', '.join('?' * (len(METRIC_FIELDS) + 4))
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self.conn.executemany(
+                    f'INSERT INTO fund_snapshots VALUES ({placeholders})', snapshots)
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO fund_latest VALUES (?, ?)',
+                    [(s[0], s[2]) for s in snapshots])
+                self._delete_dependents(changed)
+        return changed
+
+    def history(self, symbol, field=None):
+        """[(taken_at, value)] for one field, or [(taken_at, {field: value})] for all"""
+        if field is not None and field not in METRIC_FIELDS and field != 'risk':
+            raise KeyError(f"Unknown metric: {field}")
+        fields = [field] if field else [*METRIC_FIELDS, 'risk']
+        cursor = self.conn.execute(
+            f"SELECT taken_at, {', '.join(fields)} FROM fund_snapshots WHERE symbol = ? ORDER BY taken_at, rowid",
+            (symbol,))
+        if field:
+            return list(cursor)
+        return [(taken_at, dict(zip(fields, values))) for taken_at, *values in cursor]
+
+    # ── Computed results ───────────────────────────────────────────
+
+    def result_key(self, kind, store, symbols, **params):
+        """Hash of the result kind, its parameters and the funds it reads"""
+        digest = hashlib.sha256(kind.encode())
+        digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        for symbol in sorted(symbols):
+            row = store.get(symbol)
+            digest.update(f"{symbol}:{fund_hash(store, row) if row is not None else '-'};".encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        row = self.conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, kind, value, symbols):
+        text = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+        now = time.time()
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                              (key, kind, text, len(text), now, now))
+            self.conn.executemany('INSERT OR IGNORE INTO result_deps VALUES (?, ?)',
+                                  [(key, symbol) for symbol in set(symbols)])
+            self._evict()
+
+    def cached(self, kind, store, symbols, compute, **params):
+        """Return the stored result for these inputs, computing and storing it on a miss"""
+        symbols = list(symbols)
+        key = self.result_key(kind, store, symbols, **params)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, kind, value, symbols)
+        return value
+
+    def invalidate(self, symbols):
+        """Drop every result that read any of the given funds, returning how many"""
+        with self.conn:
+            self.conn.execute('BEGIN')
+            return self._delete_dependents(list(symbols))
+
+    def _delete_dependents(self, symbols):
+        deleted = 0
+        for start in range(0, len(symbols), 500):
+            chunk = symbols[start:start + 500]
+            marks = ', '.join('?' * len(chunk))
+            keys = [k for (k,) in self.conn.execute(
+                f'SELECT DISTINCT key FROM result_deps WHERE symbol IN ({marks})', chunk)]
+            deleted += self._delete_keys(keys)
+        return deleted
+
+    def _delete_keys(self, keys):
+        for start in range(0, len(keys), 500):
+            chunk = [(k,) for k in keys[start:start + 500]]
+            self.conn.executemany('DELETE FROM results WHERE key = ?', chunk)
+            self.conn.executemany('DELETE FROM result_deps WHERE key = ?', chunk)
+        return len(keys)
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self.conn.execute('SELECT key, size FROM results ORDER BY last_used'):
+            if total <= self.max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        self._delete_keys(stale)
+
+    def stats(self):
+        entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,301 @@
+"""
+Streaming Risk Metrics
+Welford running moments, drawdown, beta and rolling volatility per series → derived risk tiers
+"""
+
+from array import array
+from math import sqrt
+
+from fund_store import RISK_LEVELS
+from strategy_engine import WeightMatrix
+
+PERIODS_PER_YEAR = 252
+WINDOW = 63                 # rolling window, about one quarter of trading days
+BENCHMARK = 'FXAIX'         # S&P 500 index fund in the catalog
+MIN_DAYS = 63               # history needed before a measured tier replaces the catalog's
+
+# Upper bounds per tier (annualized volatility, |max drawdown|); anything above is Extreme
+VOLATILITY_TIERS = (0.03, 0.07, 0.12, 0.18, 0.25, 0.40)
+DRAWDOWN_TIERS = (0.05, 0.12, 0.25, 0.35, 0.50, 0.65)
+
+
+def _tier(value, bounds):
+    for code, bound in enumerate(bounds):
+        if value <= bound:
+            return code
+    return len(bounds)
+
+
+def risk_tier(volatility=None, max_drawdown=None):
+    """Risk label from annualized volatility and/or max drawdown (the riskier of the two)"""
+    codes = []
+    if volatility is not None:
+        codes.append(_tier(volatility, VOLATILITY_TIERS))
+    if max_drawdown is not None:
+        codes.append(_tier(abs(max_drawdown), DRAWDOWN_TIERS))
+    if not codes:
+        raise ValueError("risk_tier needs a volatility or a max drawdown")
+    return RISK_LEVELS[max(codes)]
+
+
+def holdings_tier(store, allocation):
+    """Risk label of an allocation: weight-averaged tier of its funds, rounded half up"""
+    total = sum(allocation.values())
+    average = sum(weight * store.risk_codes[store.row(symbol)] for symbol, weight in allocation.items()) / total
+    return store.risk_labels[min(int(average + 0.5), len(RISK_LEVELS) - 1)]
+
+
+# ── Streaming state ────────────────────────────────────────────────
+
+
+class RiskEngine:
+    """Running risk state for many return series, one slot per key in flat arrays.
+
+    add() folds one period's return into a series in O(1): Welford mean/M2,
+    downside semi-deviation, a growth index with its peak and worst drawdown,
+    bivariate moments against the benchmark return for beta, and a ring
+    buffer of the last `window` returns for rolling volatility (the only state
+    that grows with the window rather than staying constant).
+    """
+
+    def __init__(self, keys, window=WINDOW, risk_free=0.0, periods=PERIODS_PER_YEAR):
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.window = window
+        self.periods = periods
+        self.risk_free = risk_free / periods        # per period
+        n = len(self.keys)
+
+        def zeros():
+            return array('d', bytes(8 * n))
+
+        self.count = array('l', bytes(8 * n))
+        self.mean = zeros()
+        self.m2 = zeros()
+        self.downside = zeros()         # Σ min(r − rf, 0)²
+        self.level = array('d', [1.0]) * n
+        self.peak = array('d', [1.0]) * n
+        self.max_drawdown = zeros()     # ≤ 0
+        self.paired = array('l', bytes(8 * n))
+        self.paired_mean = zeros()      # series mean over days with a benchmark return
+        self.benchmark_mean = zeros()
+        self.benchmark_m2 = zeros()
+        self.comoment = zeros()
+        self.ring = array('d', bytes(8 * n * window))
+        self.rolling_mean = zeros()
+        self.rolling_m2 = zeros()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, i, r, benchmark=None):
+        """Fold one period's return r (and the benchmark's, if known) into series i"""
+        n = self.count[i] + 1
+        self.count[i] = n
+        mean = self.mean[i]
+        delta = r - mean
+        mean += delta / n
+        self.mean[i] = mean
+        self.m2[i] += delta * (r - mean)
+        excess = r - self.risk_free
+        if excess < 0:
+            self.downside[i] += excess * excess
+
+        level = self.level[i] * (1.0 + r)
+        self.level[i] = level
+        if level > self.peak[i]:
+            self.peak[i] = level
+        else:
+            drawdown = level / self.peak[i] - 1.0
+            if drawdown < self.max_drawdown[i]:
+                self.max_drawdown[i] = drawdown
+
+        if benchmark is not None:
+            m = self.paired[i] + 1
+            self.paired[i] = m
+            dx = r - self.paired_mean[i]
+            self.paired_mean[i] += dx / m
+            b_mean = self.benchmark_mean[i]
+            dy = benchmark - b_mean
+            b_mean += dy / m
+            self.benchmark_mean[i] = b_mean
+            self.benchmark_m2[i] += dy * (benchmark - b_mean)
+            self.comoment[i] += dx * (benchmark - b_mean)
+
+        # Rolling window: grow with Welford, then swap the oldest return out
+        window = self.window
+        slot = i * window + (n - 1) % window
+        rolling_mean = self.rolling_mean[i]
+        if n <= window:
+            delta = r - rolling_mean
+            rolling_mean += delta / n
+            self.rolling_m2[i] += delta * (r - rolling_mean)
+        else:
+            old = self.ring[slot]
+            updated = rolling_mean + (r - old) / window
+            self.rolling_m2[i] += (r - old) * (r - updated + old - rolling_mean)
+            rolling_mean = updated
+        self.rolling_mean[i] = rolling_mean
+        self.ring[slot] = r
+
+    def volatility(self, i):
+        n = self.count[i]
+        return sqrt(self.m2[i] / (n - 1) * self.periods) if n > 1 else None
+
+    def rolling_volatility(self, i):
+        n = min(self.count[i], self.window)
+        return sqrt(max(self.rolling_m2[i], 0.0) / (n - 1) * self.periods) if n > 1 else None
+
+    def beta(self, i):
+        variance = self.benchmark_m2[i]
+        return self.comoment[i] / variance if self.paired[i] > 1 and variance > 0 else None
+
+    def metrics(self, i):
+        """{'days', 'annual_return', 'volatility', 'rolling_volatility', 'max_drawdown',
+        'current_drawdown', 'sharpe', 'sortino', 'beta', 'tier'} for series i"""
+        n = self.count[i]
+        volatility = self.volatility(i)
+        excess = (self.mean[i] - self.risk_free) * self.periods
+        downside = sqrt(self.downside[i] / n * self.periods) if n else 0.0
+        return {
+            'days': n,
+            'annual_return': self.level[i] ** (self.periods / n) - 1.0 if n else None,
+            'volatility': volatility,
+            'rolling_volatility': self.rolling_volatility(i),
+            'max_drawdown': self.max_drawdown[i],
+            'current_drawdown': self.level[i] / self.peak[i] - 1.0,
+            'sharpe': excess / volatility if volatility else None,
+            'sortino': excess / downside if downside else None,
+            'beta': self.beta(i),
+            'tier': risk_tier(volatility, self.max_drawdown[i]) if volatility is not None else None,
+        }
+
+    def __getitem__(self, key):
+        return self.metrics(self.index[key])
+
+
+# ── Funds and strategies ───────────────────────────────────────────
+
+
+class RiskMonitor:
+    """Risk state for every fund in a store and every allocation over it.
+
+    Allocation returns are the weighted fund returns of the same day (weights
+    held constant, i.e. rebalanced daily), computed with one W · r product,
+    so strategies are tracked alongside their funds in the same pass.
+    """
+
+    def __init__(self, store, allocations, benchmark=BENCHMARK, window=WINDOW, risk_free=0.0):
+        self.store = store
+        self.benchmark = benchmark if benchmark in store else None
+        self.funds = RiskEngine(store.symbols, window, risk_free)
+        self.matrix = WeightMatrix.from_allocations(store, allocations)
+        self.strategies = RiskEngine(self.matrix.keys, window, risk_free)
+        self.last_close = array('d', bytes(8 * len(store)))     # 0 = no close seen yet
+        self.as_of = None
+
+    def update_day(self, closes, distributions=None, as_of=None):
+        """Fold one trading day {symbol: close} (+ {symbol: cash paid}) into every series.
+
+        Funds without a close that day count as flat for the allocations
+        holding them. Returns the number of fund returns recorded.
+        """
+        index, last_close, add = self.store.index, self.last_close, self.funds.add
+        distributions = distributions or {}
+        returns = array('d', bytes(8 * len(self.store)))
+        benchmark = None
+        if self.benchmark in closes:
+            row = index[self.benchmark]
+            if last_close[row] > 0:
+                benchmark = (closes[self.benchmark] + distributions.get(self.benchmark, 0.0)) / last_close[row] - 1.0
+
+        recorded = 0
+        for symbol, close in closes.items():
+            row = index.get(symbol)
+            if row is None:
+                continue
+            previous = last_close[row]
+            last_close[row] = close
+            if previous > 0:
+                r = (close + distributions.get(symbol, 0.0)) / previous - 1.0
+                returns[row] = r
+                add(row, r, benchmark)
+                recorded += 1
+
+        if recorded:
+            add = self.strategies.add
+            for position, r in enumerate(self.matrix.matvec(returns)):
+                add(position, r, benchmark)
+        if as_of is not None:
+            self.as_of = as_of
+        return recorded
+
+    def backfill(self, cache, symbols=None):
+        """Fold a PriceCache's history (after as_of) in; returns the fund returns added.
+
+        Each fund series is read once, in date order. Weighted fund returns are
+        accumulated per date through the reverse fund → allocation index, then
+        the allocations replay those days in order, so nothing is bucketed per
+        symbol and per day.
+        """
+        from incremental import DependencyIndex
+
+        store, last_close, add = self.store, self.last_close, self.funds.add
+        wanted = [s for s in (symbols if symbols is not None else store.symbols) if s in store and cache.rows(s)]
+        since = self.as_of if self.as_of is not None else 0
+
+        benchmark = {}
+        if self.benchmark in wanted:
+            series = cache.series(self.benchmark)
+            previous = last_close[store.index[self.benchmark]]
+            for ordinal, close, paid in zip(series.dates, series.close, series.distribution):
+                if ordinal > since:
+                    if previous > 0:
+                        benchmark[ordinal] = (close + paid) / previous - 1.0
+                    previous = close
+
+        holders = DependencyIndex(self.matrix)
+        n_strategies = len(self.matrix)
+        strategy_days = {}
+        latest, added = since, 0
+        for symbol in wanted:
+            row = store.index[symbol]
+            series = cache.series(symbol)
+            positions, weights = holders.column(row)
+            held = list(zip(positions, weights))
+            previous = last_close[row]
+            for ordinal, close, paid in zip(series.dates, series.close, series.distribution):
+                if ordinal <= since:
+                    continue
+                if previous > 0:
+                    r = (close + paid) / previous - 1.0
+                    add(row, r, benchmark.get(ordinal))
+                    added += 1
+                    if held:
+                        day = strategy_days.get(ordinal)
+                        if day is None:
+                            day = strategy_days[ordinal] = array('d', bytes(8 * n_strategies))
+                        for position, weight in held:
+                            day[position] += weight * r
+                previous = close
+                if ordinal > latest:
+                    latest = ordinal
+            last_close[row] = previous
+
+        add = self.strategies.add
+        for ordinal in sorted(strategy_days):
+            b = benchmark.get(ordinal)
+            for position, r in enumerate(strategy_days[ordinal]):
+                add(position, r, b)
+        self.as_of = latest or None
+        return added
+
+    def fund_metrics(self, symbol):
+        return self.funds[symbol]
+
+    def strategy_metrics(self, key):
+        return self.strategies[key]
+
+    def tiers(self, engine, min_days=MIN_DAYS):
+        """{key: measured tier} for series with at least min_days returns"""
+        return {key: engine.metrics(i)['tier'] for i, key in enumerate(engine.keys) if engine.count[i] >= min_days}
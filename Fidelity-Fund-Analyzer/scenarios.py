@@ -0,0 +1,229 @@
+"""
+Stress-Test Scenarios
+Symbol / category / factor shocks → shock matrix → every strategy's loss in one pass
+"""
+
+import json
+from array import array
+from operator import add
+
+from incremental import DependencyIndex
+from strategy_engine import WeightMatrix
+
+FACTORS = ('equity', 'tech', 'international', 'bonds', 'speculative', 'crypto')
+
+# Default factor loadings (betas to each factor's shock) by catalog category
+CATEGORY_LOADINGS = {
+    'fidelity_large_cap': {'equity': 1.1, 'tech': 0.4},
+    'fidelity_sector': {'equity': 1.2, 'tech': 0.6},
+    'fidelity_balanced': {'equity': 0.9},
+    'fidelity_international': {'equity': 0.8, 'international': 0.5},
+    'fidelity_bonds': {'bonds': 1.0},
+    'etf_broad': {'equity': 1.0},
+    'etf_tech': {'equity': 1.1, 'tech': 0.7},
+    'etf_specialty': {'equity': 1.1, 'speculative': 1.0},
+    'etf_bonds': {'bonds': 1.0},
+    'etf_dividend': {'equity': 0.8},
+    'etf_international': {'equity': 0.8, 'international': 0.5},
+}
+
+# Funds that behave unlike the rest of their category
+SYMBOL_LOADINGS = {
+    'IBIT': {'crypto': 1.0},
+    'FAGIX': {'equity': 0.4, 'bonds': 0.5},
+}
+
+# Fallback for categories without explicit loadings, keyed by risk label
+RISK_LOADINGS = {
+    'Very Low': {'bonds': 0.5},
+    'Low': {'bonds': 1.0},
+    'Moderate': {'equity': 1.0},
+    'Moderate-High': {'equity': 1.1},
+    'High': {'equity': 1.25},
+    'Very High': {'equity': 1.4},
+    'Extreme': {'equity': 1.5, 'speculative': 1.0},
+}
+
+
+class Scenario:
+    """One stress scenario: fund total return = symbol shock, else category shock, else Σ loading × factor shock"""
+
+    def __init__(self, key, name, factors=None, categories=None, symbols=None, description=''):
+        unknown = set(factors or ()) - set(FACTORS)
+        if unknown:
+            raise KeyError(f"Unknown factor(s) in scenario {key}: {', '.join(sorted(unknown))}")
+        self.key = key
+        self.name = name
+        self.description = description
+        self.factors = dict(factors or {})
+        self.categories = dict(categories or {})
+        self.symbols = dict(symbols or {})
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['key'], data.get('name', data['key']), data.get('factors'),
+                   data.get('categories'), data.get('symbols'), data.get('description', ''))
+
+    def to_dict(self):
+        return {'key': self.key, 'name': self.name, 'description': self.description,
+                'factors': self.factors, 'categories': self.categories, 'symbols': self.symbols}
+
+
+# Approximate peak-to-trough factor moves of well-known drawdowns
+HISTORICAL_SCENARIOS = (
+    Scenario('black_monday_1987', 'Black Monday 1987', {'equity': -0.33, 'bonds': 0.02},
+             description='Aug – Dec 1987: the S&P 500 fell a third, 20% of it in one day'),
+    Scenario('dotcom_2000', 'Dot-com bust', {
+        'equity': -0.45, 'tech': -0.45, 'international': -0.15, 'speculative': -0.30, 'bonds': 0.20,
+    }, description='Mar 2000 – Oct 2002: Nasdaq-100 -83%, broad market -45%, Treasuries rallied'),
+    Scenario('gfc_2008', 'Global financial crisis', {
+        'equity': -0.51, 'tech': -0.03, 'international': -0.30, 'speculative': -0.15, 'bonds': 0.06,
+    }, description='Oct 2007 – Mar 2009: US stocks -51%, international -56%'),
+    Scenario('flash_crash_2010', 'Flash crash / euro crisis', {
+        'equity': -0.16, 'international': -0.06, 'bonds': 0.03,
+    }, description='Apr – Jul 2010'),
+    Scenario('taper_tantrum_2013', 'Taper tantrum', {
+        'equity': -0.06, 'international': -0.08, 'bonds': -0.04,
+    }, description='May – Jun 2013: yields jumped on Fed tapering talk'),
+    Scenario('q4_2018', 'Q4 2018 selloff', {
+        'equity': -0.20, 'tech': -0.04, 'bonds': 0.02, 'speculative': -0.05, 'crypto': -0.50,
+    }, description='Sep – Dec 2018'),
+    Scenario('covid_2020', 'COVID crash', {
+        'equity': -0.34, 'tech': 0.06, 'international': -0.02, 'speculative': -0.05, 'bonds': 0.01, 'crypto': -0.50,
+    }, description='Feb 19 – Mar 23, 2020'),
+    Scenario('rate_shock_2022', '2022 rate shock', {
+        'equity': -0.25, 'tech': -0.08, 'international': -0.05, 'speculative': -0.45, 'bonds': -0.17, 'crypto': -0.75,
+    }, description='Jan – Oct 2022: stocks and bonds fell together, ARKK -75%'),
+    Scenario('crypto_winter_2022', 'Crypto winter', {
+        'equity': -0.15, 'tech': -0.10, 'speculative': -0.40, 'crypto': -0.77,
+    }, description='Nov 2021 – Nov 2022'),
+)
+
+
+def load_scenarios(path):
+    """Scenarios from a JSON list of {key, name, factors, categories, symbols, description}"""
+    with open(path, encoding='utf-8') as f:
+        return [Scenario.from_dict(data) for data in json.load(f)]
+
+
+# ── Shock matrix ───────────────────────────────────────────────────
+
+
+class FactorModel:
+    """Per-fund factor loadings as dense store-aligned columns"""
+
+    def __init__(self, store, category_loadings=CATEGORY_LOADINGS, symbol_loadings=SYMBOL_LOADINGS,
+                 risk_loadings=RISK_LOADINGS):
+        self.store = store
+        self.columns = {factor: array('d', bytes(8 * len(store))) for factor in FACTORS}
+        for category_key, _, rows in store.iter_categories():
+            category = category_loadings.get(category_key)
+            for row in rows:
+                loadings = symbol_loadings.get(store.symbols[row]) or category \
+                    or risk_loadings.get(store.risk(row), {})
+                for factor, beta in loadings.items():
+                    self.columns[factor][row] = beta
+
+    def fund_shock(self, row, factors):
+        return sum(self.columns[factor][row] * shock for factor, shock in factors.items())
+
+    def shock_column(self, scenario):
+        """Dense per-fund total return under one scenario (one column of the shock matrix)"""
+        store = self.store
+        column = array('d', bytes(8 * len(store)))
+        for factor, shock in scenario.factors.items():
+            if shock:
+                column = array('d', map(add, column, map(shock.__mul__, self.columns[factor])))
+        for row, value in overrides(store, scenario).items():
+            column[row] = value
+        return column
+
+
+def overrides(store, scenario):
+    """{row: total return} set directly by category and symbol shocks (symbol wins)"""
+    values = {}
+    for category_key, shock in scenario.categories.items():
+        if category_key not in store.categories:
+            raise KeyError(f"Unknown category in scenario {scenario.key}: {category_key}")
+        for row in store.category_rows(category_key):
+            values[row] = shock
+    for symbol, shock in scenario.symbols.items():
+        values[store.row(symbol)] = shock
+    return values
+
+
+class StressTest:
+    """Every allocation's loss under every scenario.
+
+    The shock matrix S (funds × scenarios) is kept factored: S = L·F plus a
+    sparse correction for category/symbol overrides. Portfolio losses W·S are
+    then (W·L)·F, where W·L (allocations × factors) is computed once, plus
+    W·ΔS through the reverse index, touching only the overridden funds.
+    """
+
+    def __init__(self, store, allocations, model=None):
+        self.store = store
+        self.model = model or FactorModel(store)
+        self.matrix = WeightMatrix.from_allocations(store, allocations)
+        self.keys = self.matrix.keys
+        self.exposures = {factor: self.matrix.matvec(column) for factor, column in self.model.columns.items()}
+        self.weights = self.matrix.row_sums()
+        self._holders = None
+
+    def holders(self):
+        if self._holders is None:
+            self._holders = DependencyIndex(self.matrix)
+        return self._holders
+
+    def losses(self, scenario):
+        """Portfolio return per allocation under one scenario"""
+        n = len(self.keys)
+        result = array('d', bytes(8 * n))
+        for factor, shock in scenario.factors.items():
+            if shock:
+                result = array('d', map(add, result, map(shock.__mul__, self.exposures[factor])))
+        corrections = overrides(self.store, scenario)
+        if corrections:
+            holders = self.holders()
+            model = self.model
+            for row, value in corrections.items():
+                delta = value - model.fund_shock(row, scenario.factors)
+                positions, weights = holders.column(row)
+                for position, weight in zip(positions, weights):
+                    result[position] += weight * delta
+        return result
+
+    def run(self, scenarios=HISTORICAL_SCENARIOS):
+        scenarios = list(scenarios)
+        return StressResult(self.keys, scenarios, [self.losses(s) for s in scenarios])
+
+
+class StressResult:
+    """Scenario × allocation portfolio returns with rankings"""
+
+    def __init__(self, keys, scenarios, losses):
+        self.keys = keys
+        self.scenarios = scenarios
+        self.losses = losses        # one array per scenario, one value per allocation
+        self._positions = {key: i for i, key in enumerate(keys)}
+        self._scenario_positions = {s.key: i for i, s in enumerate(scenarios)}
+
+    def loss(self, scenario_key, key):
+        return self.losses[self._scenario_positions[scenario_key]][self._positions[key]]
+
+    def ranking(self, scenario_key):
+        """[(allocation key, return)] hardest hit first"""
+        column = self.losses[self._scenario_positions[scenario_key]]
+        order = sorted(range(len(self.keys)), key=column.__getitem__)
+        return [(self.keys[i], column[i]) for i in order]
+
+    def worst(self, key):
+        """(scenario, return) of the scenario that hurts one allocation most"""
+        i = self._positions[key]
+        j = min(range(len(self.scenarios)), key=lambda j: self.losses[j][i])
+        return self.scenarios[j], self.losses[j][i]
+
+    def row(self, key):
+        """{scenario key: return} for one allocation"""
+        i = self._positions[key]
+        return {s.key: losses[i] for s, losses in zip(self.scenarios, self.losses)}
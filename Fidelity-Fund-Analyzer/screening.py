@@ -0,0 +1,288 @@
+"""
+Fund Screening
+Sorted secondary indexes + heap top-k queries over the fund universe
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import partial
+from itertools import chain, islice
+
+from fund_store import METRIC_FIELDS, RISK_LEVELS
+
+# Field aliases accepted by parse_condition
+ALIASES = {
+    'expense': 'expense_ratio', 'er': 'expense_ratio', 'fee': 'expense_ratio',
+    'yield': 'dividend', '1yr': 'one_yr', '3yr': 'three_yr',
+}
+
+CONDITION = re.compile(r'^\s*([A-Za-z0-9_-]+)\s*(>=|<=|!=|=|>|<)\s*(.+?)\s*$')
+
+
+class Range:
+    """lo/hi bounds on one metric; None means unbounded"""
+
+    __slots__ = ('field', 'lo', 'lo_inclusive', 'hi', 'hi_inclusive')
+
+    def __init__(self, field, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        if field not in METRIC_FIELDS:
+            raise KeyError(f"Unknown metric: {field}")
+        self.field = field
+        self.lo = lo
+        self.hi = hi
+        self.lo_inclusive = lo_inclusive
+        self.hi_inclusive = hi_inclusive
+
+    def intersect(self, other):
+        """Tighten this range by another on the same field"""
+        if other.lo is not None and (self.lo is None or other.lo > self.lo
+                                     or (other.lo == self.lo and not other.lo_inclusive)):
+            self.lo, self.lo_inclusive = other.lo, other.lo_inclusive
+        if other.hi is not None and (self.hi is None or other.hi < self.hi
+                                     or (other.hi == self.hi and not other.hi_inclusive)):
+            self.hi, self.hi_inclusive = other.hi, other.hi_inclusive
+
+    def contains(self, value):
+        if self.lo is not None and (value < self.lo or (value == self.lo and not self.lo_inclusive)):
+            return False
+        if self.hi is not None and (value > self.hi or (value == self.hi and not self.hi_inclusive)):
+            return False
+        return True
+
+
+class Query:
+    """Conjunction of predicates plus ordering and limit"""
+
+    def __init__(self, types=None, risks=None, categories=None, ranges=(), sort_by=None,
+                 descending=False, limit=None):
+        self.types = set(types) if types else None
+        self.risks = set(risks) if risks else None
+        self.categories = list(categories) if categories else None
+        self.ranges = {}
+        for r in ranges:
+            if r.field in self.ranges:
+                self.ranges[r.field].intersect(r)
+            else:
+                self.ranges[r.field] = Range(r.field, r.lo, r.hi, r.lo_inclusive, r.hi_inclusive)
+        if sort_by is not None and sort_by not in METRIC_FIELDS:
+            raise KeyError(f"Unknown metric: {sort_by}")
+        self.sort_by = sort_by
+        self.descending = descending
+        self.limit = limit
+
+    @classmethod
+    def parse(cls, conditions, **options):
+        """Query from strings like 'risk<=Moderate', 'type=ETF', 'dividend>3%', 'er<=0.001'"""
+        types, risks, categories, ranges = set(), set(), [], []
+        for text in conditions:
+            field, op, value = parse_condition(text)
+            if field == 'risk' and op != '=':
+                risks.update(_risk_levels(text, op, value))
+            elif field in ('type', 'risk', 'category'):
+                if op != '=':
+                    raise ValueError(f"{text}: only '=' is supported for {field}")
+                values = [v.strip() for v in value.split(',') if v.strip()]
+                if field == 'type':
+                    types.update(values)
+                elif field == 'risk':
+                    risks.update(values)
+                else:
+                    categories.extend(values)
+            else:
+                ranges.append(_range(field, op, _number(text, value)))
+        if options.get('sort_by'):
+            options['sort_by'] = ALIASES.get(options['sort_by'], options['sort_by'])
+        return cls(types, risks, categories, ranges, **options)
+
+
+def parse_condition(text):
+    """(field, op, raw value) for 'field<op>value'"""
+    match = CONDITION.match(text)
+    if not match:
+        raise ValueError(f"Bad condition: {text!r} (expected e.g. dividend>3%)")
+    field, op, value = match.groups()
+    field = field.lower().replace('-', '_')
+    return ALIASES.get(field, field), op, value
+
+
+def _risk_levels(text, op, value):
+    """Risk labels on the requested side of a level, e.g. <=Moderate"""
+    levels = [label.lower() for label in RISK_LEVELS]
+    if value.lower() not in levels or op == '!=':
+        raise ValueError(f"{text}: expected one of {', '.join(RISK_LEVELS)} after =, <, <=, > or >=")
+    code = levels.index(value.lower())
+    test = {'<': code.__gt__, '<=': code.__ge__, '>': code.__lt__, '>=': code.__le__}[op]
+    return [label for i, label in enumerate(RISK_LEVELS) if test(i)]
+
+
+def _number(text, value):
+    try:
+        return float(value[:-1]) / 100 if value.endswith('%') else float(value)
+    except ValueError:
+        raise ValueError(f"{text}: expected a number or percentage") from None
+
+
+def _range(field, op, value):
+    if op == '=':
+        return Range(field, value, value)
+    if op in ('>', '>='):
+        return Range(field, lo=value, lo_inclusive=op == '>=')
+    if op in ('<', '<='):
+        return Range(field, hi=value, hi_inclusive=op == '<=')
+    raise ValueError(f"'{op}' is not supported for {field}")
+
+
+def _concat(lists):
+    return list(chain.from_iterable(lists))
+
+
+class ScreenIndex:
+    """Per-metric rows sorted by value, and row lists per type / risk level.
+
+    Built once per store (O(n log n)); queries bisect the indexes instead of
+    scanning, then either walk the sort index in order or heap-select top-k
+    from the smallest candidate set. Rebuild after metrics change in place.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.size = len(store)
+        self.order = {}         # field -> rows ascending by (value, row)
+        self.sorted_values = {} # field -> values in that order
+        for field in METRIC_FIELDS:
+            column = store.columns[field]
+            order = sorted(range(self.size), key=column.__getitem__)
+            self.order[field] = array('I', order)
+            self.sorted_values[field] = array('d', (column[row] for row in order))
+
+        self.by_type = {}
+        for row, fund_type in enumerate(store.types):
+            self.by_type.setdefault(fund_type, array('I')).append(row)
+        self.by_risk = {}
+        for row, code in enumerate(store.risk_codes):
+            self.by_risk.setdefault(code, array('I')).append(row)
+        self._type_lookup = {t.lower(): t for t in self.by_type}
+        self._risk_lookup = {label.lower(): code for code, label in enumerate(store.risk_labels)}
+
+    def resolve_types(self, names):
+        resolved = set()
+        for name in names:
+            fund_type = self._type_lookup.get(name.lower())
+            if fund_type is None:
+                raise KeyError(f"Unknown fund type: {name} (expected one of {', '.join(sorted(self.by_type))})")
+            resolved.add(fund_type)
+        return resolved
+
+    def resolve_risks(self, names):
+        codes = set()
+        for name in names:
+            code = self._risk_lookup.get(name.lower())
+            if code is None:
+                raise KeyError(f"Unknown risk level: {name}")
+            codes.add(code)
+        return codes
+
+    def span(self, r):
+        """(lo, hi) positions in the sort index of the rows inside a range"""
+        values = self.sorted_values[r.field]
+        lo, hi = 0, len(values)
+        if r.lo is not None:
+            lo = (bisect_left if r.lo_inclusive else bisect_right)(values, r.lo)
+        if r.hi is not None:
+            hi = (bisect_right if r.hi_inclusive else bisect_left)(values, r.hi)
+        return lo, max(lo, hi)
+
+    def predicates(self, query):
+        """[(count, name, rows(), test)] per predicate, most selective first.
+
+        Counts come from the indexes alone (list lengths, bisected spans); rows()
+        materializes the matching rows only for the predicate the plan picks.
+        """
+        store = self.store
+        predicates = []
+        if query.types is not None:
+            types, names = self.resolve_types(query.types), store.types
+            lists = [self.by_type[t] for t in types]
+            predicates.append((sum(map(len, lists)), 'type', partial(_concat, lists),
+                               lambda row: names[row] in types))
+        if query.risks is not None:
+            codes, risk_codes = self.resolve_risks(query.risks), store.risk_codes
+            lists = [self.by_risk[c] for c in codes if c in self.by_risk]
+            predicates.append((sum(map(len, lists)), 'risk', partial(_concat, lists),
+                               lambda row: risk_codes[row] in codes))
+        if query.categories is not None:
+            spans = [store.category_rows(key) for key in query.categories]
+            predicates.append((sum(map(len, spans)), 'category', partial(_concat, spans),
+                               lambda row: any(row in rows for rows in spans)))
+        for field, r in query.ranges.items():
+            lo, hi = self.span(r)
+            column = store.columns[field]
+            predicates.append((hi - lo, field, partial(self.order[field].__getitem__, slice(lo, hi)),
+                               lambda row, column=column, r=r: r.contains(column[row])))
+        predicates.sort(key=lambda p: p[0])
+        return predicates
+
+    def query(self, query):
+        """Matching rows, ordered by query.sort_by (catalog order otherwise), at most query.limit"""
+        n = self.size
+        limit = query.limit if query.limit is not None else n
+        if limit <= 0 or n == 0:
+            return []
+        predicates = self.predicates(query)
+
+        # Plan A walks an ordered index (the sort index, or catalog order) and
+        # stops after `limit` matches: about limit / selectivity rows, assuming
+        # independent predicates. Plan B filters the smallest candidate list and
+        # heap-selects the top k from it.
+        if query.sort_by is not None:
+            sort_range = query.ranges.get(query.sort_by)
+            lo, hi = self.span(sort_range) if sort_range else (0, n)
+            walked = [p for p in predicates if p[1] != query.sort_by]
+        else:
+            lo, hi = 0, n
+            walked = predicates
+        selectivity = 1.0
+        for count, *_ in walked:
+            selectivity *= count / n
+        walk_cost = min(hi - lo, limit / max(selectivity, 1.0 / n))
+        if not predicates or walk_cost <= predicates[0][0]:
+            return self._walk(query, lo, hi, limit, [p[3] for p in walked])
+
+        _, _, rows, _ = predicates[0]
+        rows = rows()
+        for _, _, _, test in predicates[1:]:
+            rows = [row for row in rows if test(row)]
+
+        if query.sort_by is None:
+            return heapq.nsmallest(limit, rows) if limit < len(rows) else sorted(rows)
+        column = self.store.columns[query.sort_by]
+        key = lambda row: (column[row], row)
+        if query.descending:
+            return heapq.nlargest(limit, rows, key=key) if limit < len(rows) else sorted(rows, key=key, reverse=True)
+        return heapq.nsmallest(limit, rows, key=key) if limit < len(rows) else sorted(rows, key=key)
+
+    def _walk(self, query, lo, hi, limit, tests):
+        if query.sort_by is not None:
+            order = self.order[query.sort_by]
+            positions = range(hi - 1, lo - 1, -1) if query.descending else range(lo, hi)
+            candidates = map(order.__getitem__, positions)
+        else:
+            candidates = iter(range(lo, hi))
+        for test in tests:
+            candidates = filter(test, candidates)
+        return list(islice(candidates, limit))
+
+    def records(self, rows):
+        """Fund dicts (with symbol and category) for result rows"""
+        store = self.store
+        return [{'symbol': store.symbols[row], 'category': store.category_of(row), **store.record(row)}
+                for row in rows]
+
+
+def screen(store, conditions=(), sort_by=None, descending=False, limit=None, index=None):
+    """One-shot helper: parse conditions, build (or reuse) the index and return records"""
+    index = index or ScreenIndex(store)
+    query = Query.parse(conditions, sort_by=sort_by, descending=descending, limit=limit)
+    return index.records(index.query(query))
@@ -0,0 +1,198 @@
+"""
+Batch Strategy Evaluation Engine
+N allocations → sparse weight matrix → blended metrics in one product
+"""
+
+from array import array
+from itertools import accumulate, chain, islice, repeat
+from operator import add, itemgetter, methodcaller, mul, sub
+
+# Horizon field → years the (annualized) return compounds over
+HORIZONS = {
+    'ytd': 1,
+    'one_yr': 1,
+    'three_yr': 3,
+}
+
+
+class WeightMatrix:
+    """CSR matrix: one row per allocation, one column per fund-store row"""
+
+    def __init__(self, n_columns):
+        self.n_columns = n_columns
+        self.keys = []
+        self.indptr = array('l', [0])
+        self.indices = array('l')
+        self.data = array('d')
+        self._plan = None
+
+    @classmethod
+    def from_allocations(cls, store, allocations):
+        """Build from {key: {symbol: weight}} or an iterable of {symbol: weight}.
+
+        All rows are laid out in bulk (chained symbol lookups, chained
+        weights, running row lengths) rather than appended one at a time.
+        """
+        matrix = cls(len(store))
+        if hasattr(allocations, 'items'):
+            keys, rows = list(allocations), list(allocations.values())
+        else:
+            rows = list(allocations)
+            keys = list(range(len(rows)))
+        # array() from a list is a bulk copy; from an iterator it appends item by item
+        try:
+            matrix.indices = array('l', list(map(store.index.__getitem__, chain.from_iterable(rows))))
+        except KeyError as e:
+            symbol = e.args[0]
+            key = next(key for key, allocation in zip(keys, rows) if symbol in allocation)
+            raise KeyError(f"Unknown symbol {symbol} in allocation {key!r}") from None
+        matrix.data = array('d', list(chain.from_iterable(map(methodcaller('values'), rows))))
+        matrix.indptr = array('l', list(accumulate(map(len, rows), initial=0)))
+        matrix.keys = keys
+        return matrix
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add_row(self, key, store, allocation):
+        """Append one {symbol: weight} allocation"""
+        try:
+            self.indices.extend(map(store.index.__getitem__, allocation))
+        except KeyError as e:
+            del self.indices[self.indptr[-1]:]
+            raise KeyError(f"Unknown symbol {e.args[0]} in allocation {key!r}") from None
+        self.data.extend(allocation.values())
+        self.indptr.append(len(self.indices))
+        self.keys.append(key)
+        self._plan = None
+
+    def row(self, i):
+        """(column indices, weights) for one allocation"""
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:stop], self.data[start:stop]
+
+    def _product_plan(self):
+        # Gather/multiply/segment-sum all run inside C builtins; the getter,
+        # unboxed weights and row lengths are reused for every column.
+        if self._plan is None:
+            indices = list(self.indices)
+            if len(indices) == 1:
+                index = indices[0]
+                getter = lambda column: (column[index],)
+            elif indices:
+                getter = itemgetter(*indices)
+            else:
+                getter = lambda column: ()
+            indptr = list(self.indptr)
+            self._plan = (getter, list(self.data), list(map(sub, indptr[1:], indptr[:-1])))
+        return self._plan
+
+    @staticmethod
+    def _segment_sums(values, lengths):
+        # Consecutive runs summed left to right (as sum(row) would), without
+        # materializing a slice per row
+        values = iter(values)
+        return array('d', list(map(sum, map(islice, repeat(values), lengths))))
+
+    def matvec(self, column):
+        """W · column for a dense per-fund column, one value per allocation"""
+        getter, data, lengths = self._product_plan()
+        # Gathering from a list shares its floats; from an array each read boxes a new one
+        gathered = getter(column if isinstance(column, list) else list(column))
+        return self._segment_sums(list(map(mul, data, gathered)), lengths)
+
+    def matmul(self, columns):
+        """W · [c1 c2 ...] for several per-fund columns"""
+        return [self.matvec(column) for column in columns]
+
+    def row_sums(self):
+        """Total weight of each allocation"""
+        _, data, lengths = self._product_plan()
+        return self._segment_sums(data, lengths)
+
+
+class BatchResult:
+    """Columnar per-allocation results keyed by allocation key"""
+
+    def __init__(self, keys, horizon, columns):
+        self.keys = keys
+        self.horizon = horizon
+        self.columns = columns
+        self._positions = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, key):
+        if self._positions is None:
+            self._positions = {k: i for i, k in enumerate(self.keys)}
+        return self.row(self._positions[key])
+
+    def row(self, i):
+        result = {'key': self.keys[i]}
+        for field, values in self.columns.items():
+            result[field] = values[i]
+        return result
+
+    def rows(self):
+        for i in range(len(self.keys)):
+            yield self.row(i)
+
+
+def growth_column(store, horizon):
+    """Per-fund growth factor (1 + r) ** years for a horizon"""
+    years = HORIZONS[horizon]
+    return array('d', [(1 + r) ** years for r in store.columns[horizon]])
+
+
+def evaluate(store, matrix, horizon='one_yr', amount=1000.0):
+    """Blended return, yield, expense ratio and $ projection for every allocation.
+
+    All metric columns go through the same sparse product, so the cost is
+    O(nonzeros) no matter how many allocations are screened.
+    """
+    if horizon not in HORIZONS:
+        raise ValueError(f"Unknown horizon: {horizon} (expected one of {', '.join(HORIZONS)})")
+
+    columns = store.columns
+    weight = matrix.row_sums()
+    blended, dividend, expense = matrix.matmul([
+        columns[horizon],
+        columns['dividend'],
+        columns['expense_ratio'],
+    ])
+    if HORIZONS[horizon] == 1:
+        # Σ w(1 + r) = Σ w + Σ wr, no extra product needed
+        growth = map(add, weight, blended)
+    else:
+        growth = matrix.matvec(growth_column(store, horizon))
+
+    invested = array('d', list(map(mul, weight, repeat(amount))))
+    ending_value = array('d', list(map(mul, growth, repeat(amount))))
+    gain = array('d', list(map(sub, ending_value, invested)))
+
+    return BatchResult(matrix.keys, horizon, {
+        'weight': weight,
+        'blended_return': blended,
+        'yield': dividend,
+        'expense_ratio': expense,
+        'invested': invested,
+        'ending_value': ending_value,
+        'gain': gain,
+    })
+
+
+def holding_values(store, allocation, horizon='one_yr', amount=1000.0):
+    """Per-holding (symbol, row, weight, invested, ending_value, gain), largest weight first"""
+    years = HORIZONS[horizon]
+    returns = store.columns[horizon]
+    holdings = []
+    for symbol, pct in sorted(allocation.items(), key=lambda x: x[1], reverse=True):
+        row = store.get(symbol)
+        if row is None:
+            continue
+        invested = amount * pct
+        ending_value = invested * (1 + returns[row]) ** years
+        holdings.append((symbol, row, pct, invested, ending_value, ending_value - invested))
+    return holdings
+
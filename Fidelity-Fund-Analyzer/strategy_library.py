@@ -0,0 +1,215 @@
+"""
+Strategy Library
+JSON/TOML strategy files → validated {key: strategy} → concurrent evaluation and ranking
+"""
+
+import heapq
+import json
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import tomllib
+except ImportError:     # Python < 3.11
+    tomllib = None
+
+from scenarios import HISTORICAL_SCENARIOS, StressTest
+from strategy_engine import WeightMatrix, evaluate
+
+EXTENSIONS = ('.json', '.toml')
+DISPLAY_FIELDS = ('subtitle', 'description', 'expected_return', 'max_drawdown', 'time_horizon', 'best_for')
+WEIGHT_TOLERANCE = 1e-6
+CHUNK_SIZE = 500
+
+# Ranking metrics: name -> (description, higher is better)
+METRICS = {
+    'one_yr': ('blended 1-year return', True),
+    'three_yr': ('blended 3-year annualized return', True),
+    'yield': ('weighted dividend yield', True),
+    'expense_ratio': ('weighted expense ratio', False),
+    'risk_score': ('weighted catalog risk tier (0 = Very Low … 6 = Extreme)', False),
+    'worst_case': ('return in the worst historical stress scenario', True),
+    'holdings': ('number of funds', True),
+}
+
+
+class StrategyError(ValueError):
+    """One or more strategy definitions failed validation"""
+
+    def __init__(self, source, problems):
+        self.source = source
+        self.problems = problems
+        super().__init__(f"{source}: {len(problems)} problem(s)\n" + '\n'.join(f"  - {p}" for p in problems))
+
+
+# ── Loading ────────────────────────────────────────────────────────
+
+
+def _pairs_hook(problems):
+    """json object_pairs_hook that records duplicate keys instead of silently keeping the last"""
+    def hook(pairs):
+        result = {}
+        for key, value in pairs:
+            if key in result:
+                problems.append(f"duplicate key {key!r}")
+            result[key] = value
+        return result
+    return hook
+
+
+def read_strategy_file(path):
+    """({key: strategy}, [problems]) from one JSON or TOML file"""
+    problems = []
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.toml':
+        if tomllib is None:
+            raise StrategyError(path, ["TOML strategy files need Python 3.11+ (tomllib); use JSON instead"])
+        with open(path, 'rb') as f:
+            try:
+                data = tomllib.load(f)      # rejects duplicate keys itself
+            except tomllib.TOMLDecodeError as e:
+                raise StrategyError(path, [str(e)]) from None
+    elif extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            try:
+                data = json.load(f, object_pairs_hook=_pairs_hook(problems))
+            except json.JSONDecodeError as e:
+                raise StrategyError(path, [str(e)]) from None
+    else:
+        raise StrategyError(path, [f"unsupported extension (expected {' or '.join(EXTENSIONS)})"])
+    if not isinstance(data, dict):
+        raise StrategyError(path, ["expected a table of {key: strategy}"])
+    return data, problems
+
+
+def validate(strategies, store=None, tolerance=WEIGHT_TOLERANCE):
+    """Problems with {key: strategy}: missing fields, bad weights, weights not summing to 100%, unknown funds"""
+    problems = []
+    for key, strategy in strategies.items():
+        if not isinstance(strategy, dict):
+            problems.append(f"{key}: expected a table, got {type(strategy).__name__}")
+            continue
+        if not strategy.get('name'):
+            problems.append(f"{key}: missing name")
+        allocation = strategy.get('allocation')
+        if not isinstance(allocation, dict) or not allocation:
+            problems.append(f"{key}: missing or empty allocation")
+            continue
+        total = 0.0
+        for symbol, weight in allocation.items():
+            if (isinstance(weight, bool) or not isinstance(weight, (int, float))
+                    or not math.isfinite(weight) or weight <= 0):
+                problems.append(f"{key}: {symbol} weight must be a positive finite number, got {weight!r}")
+                continue
+            total += weight
+            if store is not None and symbol not in store:
+                problems.append(f"{key}: unknown fund {symbol}")
+        if abs(total - 1.0) > tolerance:
+            problems.append(f"{key}: weights sum to {total * 100:.2f}%, not 100%")
+    return problems
+
+
+def load_strategies(path, store=None):
+    """Validated {key: strategy} from a JSON/TOML file or a directory of them.
+
+    Every problem across all files (duplicate keys within or between files,
+    bad weights, unknown funds) is reported together in one StrategyError.
+    Display fields missing from user-defined strategies default to ''.
+    """
+    if os.path.isdir(path):
+        sources = sorted(os.path.join(path, name) for name in os.listdir(path)
+                         if os.path.splitext(name)[1].lower() in EXTENSIONS)
+    else:
+        sources = [path]
+
+    strategies = {}
+    problems = []
+    for source in sources:
+        data, found = read_strategy_file(source)
+        problems.extend(f"{os.path.basename(source)}: {p}" for p in found)
+        for key, strategy in data.items():
+            if key in strategies:
+                problems.append(f"{os.path.basename(source)}: strategy {key!r} already defined")
+            strategies[key] = strategy
+    problems.extend(validate(strategies, store))
+    if problems:
+        raise StrategyError(path, problems)
+    for strategy in strategies.values():
+        for field in DISPLAY_FIELDS:
+            strategy.setdefault(field, '')
+    return strategies
+
+
+# ── Evaluation ─────────────────────────────────────────────────────
+
+
+def evaluate_chunk(store, allocations):
+    """[{'key', 'holdings', metric: value ...}] for {key: allocation}, one vectorized pass"""
+    matrix = WeightMatrix.from_allocations(store, allocations)
+    one_yr = evaluate(store, matrix, horizon='one_yr', amount=1.0).columns
+    three_yr = matrix.matvec(store.columns['three_yr'])
+    risk = matrix.matvec(array('d', store.risk_codes))
+    stress = StressTest(store, allocations).run(HISTORICAL_SCENARIOS).losses
+    worst = [min(column) for column in zip(*stress)] if stress else [0.0] * len(matrix)
+    return [
+        {
+            'key': key,
+            'holdings': matrix.indptr[i + 1] - matrix.indptr[i],
+            'one_yr': one_yr['blended_return'][i],
+            'three_yr': three_yr[i],
+            'yield': one_yr['yield'][i],
+            'expense_ratio': one_yr['expense_ratio'][i],
+            'risk_score': risk[i],
+            'worst_case': worst[i],
+        }
+        for i, key in enumerate(matrix.keys)
+    ]
+
+
+# Worker state: the store is shipped once per process
+_store = None
+
+
+def _init_worker(store):
+    global _store
+    _store = store
+
+
+def _evaluate_chunk(allocations):
+    return evaluate_chunk(_store, allocations)
+
+
+def _chunks(allocations, size):
+    iterator = iter(allocations.items())
+    while chunk := dict(islice(iterator, size)):
+        yield chunk
+
+
+def evaluate_all(store, strategies, workers=None, chunk_size=CHUNK_SIZE):
+    """Metric rows for every strategy, chunks evaluated concurrently in a process pool.
+
+    Small libraries (a single chunk) are evaluated inline: starting workers
+    costs more than the vectorized pass itself.
+    """
+    allocations = {key: s['allocation'] for key, s in strategies.items()}
+    chunks = list(_chunks(allocations, chunk_size))
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        return [row for chunk in chunks for row in evaluate_chunk(store, chunk)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store,)) as pool:
+        return [row for rows in pool.map(_evaluate_chunk, chunks) for row in rows]
+
+
+def rank(rows, sort_by='one_yr', descending=None, limit=None):
+    """Rows ordered by a metric (best first unless descending is given); heap top-k when limited"""
+    if sort_by not in METRICS:
+        raise ValueError(f"Unknown metric: {sort_by} (expected one of {', '.join(METRICS)})")
+    if descending is None:
+        descending = METRICS[sort_by][1]
+    key = lambda row: row[sort_by]
+    if limit:
+        return (heapq.nlargest if descending else heapq.nsmallest)(limit, rows, key=key)
+    return sorted(rows, key=key, reverse=descending)
@@ -0,0 +1,471 @@
+"""
+Tax Lots
+Columnar lot store → minimum-tax rebalancing, HIFO/FIFO/specific-ID lot selection and loss harvesting
+"""
+
+import csv
+import heapq
+import os
+from array import array
+from datetime import date
+
+# Substantially similar but not identical funds already in the catalog
+EQUIVALENTS = (('VTI', 'ITOT'), ('BND', 'AGG'))
+
+WASH_SALE_DAYS = 30
+LONG_TERM_DAYS = 365
+TAX_RATES = {'short': 0.35, 'long': 0.15}
+METHODS = ('min_tax', 'hifo', 'fifo', 'lifo', 'specific')
+
+SYMBOL_HEADERS = ('symbol', 'ticker')
+QUANTITY_HEADERS = ('quantity', 'shares', 'qty')
+UNIT_COST_HEADERS = ('cost_per_share', 'unit_cost', 'price_paid')
+TOTAL_COST_HEADERS = ('cost_basis', 'cost', 'basis')
+DATE_HEADERS = ('acquired', 'date_acquired', 'purchase_date', 'date')
+LOT_HEADERS = ('lot_id', 'lot', 'id')
+PRICE_HEADERS = ('price', 'close', 'last', 'nav')
+
+
+def _ordinal(when):
+    if when is None:
+        return date.today().toordinal()
+    if isinstance(when, int):
+        return when
+    if isinstance(when, str):
+        return date.fromisoformat(when).toordinal()
+    return when.toordinal()
+
+
+def partners(equivalents=EQUIVALENTS):
+    """{symbol: equivalent symbol} in both directions"""
+    mapping = {}
+    for a, b in equivalents:
+        mapping[a] = b
+        mapping[b] = a
+    return mapping
+
+
+# ── Lot store ──────────────────────────────────────────────────────
+
+
+class LotStore:
+    """Open tax lots stored column-wise, with per-symbol lot indexes.
+
+    Each symbol keeps its lot positions plus lazily cached orders (by cost and
+    by acquisition date), so lot selection walks a presorted index and stops
+    as soon as enough shares are found instead of sorting every lot per trade.
+    """
+
+    def __init__(self):
+        self.symbols = array('l')       # lot -> symbol id
+        self.quantity = array('d')
+        self.unit_cost = array('d')
+        self.acquired = array('l')      # date ordinal
+        self.lot_ids = []
+        self.names = []                 # symbol id -> symbol
+        self.symbol_index = {}
+        self.by_symbol = {}             # symbol -> array of lot positions
+        self.lot_index = {}             # lot id -> position
+        self.held = array('d')          # symbol id -> open shares
+        self.realized = []              # closed sales, see sell()
+        self.last_loss = {}             # symbol -> date ordinal of its latest loss sale
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def add(self, symbol, quantity, unit_cost, acquired, lot_id=None):
+        """Append one lot; returns its position"""
+        symbol = symbol.upper()
+        symbol_id = self.symbol_index.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.symbol_index[symbol] = len(self.names)
+            self.names.append(symbol)
+            self.by_symbol[symbol] = array('l')
+            self.held.append(0.0)
+        position = len(self.quantity)
+        lot_id = str(lot_id) if lot_id not in (None, '') else f"{symbol}-{position + 1}"
+        if lot_id in self.lot_index:
+            raise ValueError(f"Duplicate lot id: {lot_id}")
+        self.symbols.append(symbol_id)
+        self.quantity.append(quantity)
+        self.unit_cost.append(unit_cost)
+        self.acquired.append(_ordinal(acquired))
+        self.lot_ids.append(lot_id)
+        self.lot_index[lot_id] = position
+        self.by_symbol[symbol].append(position)
+        self.held[symbol_id] += quantity
+        for by in ('cost', 'date', 'term'):
+            self._orders.pop((symbol, by), None)
+        return position
+
+    def symbol(self, position):
+        return self.names[self.symbols[position]]
+
+    def order(self, symbol, by):
+        """Lot positions of a symbol sorted by 'cost' (highest first) or 'date' (oldest first)"""
+        cached = self._orders.get((symbol, by))
+        if cached is None:
+            positions = self.by_symbol.get(symbol, ())
+            if by == 'cost':
+                cost = self.unit_cost
+                cached = sorted(positions, key=lambda p: (-cost[p], p))
+            else:
+                acquired = self.acquired
+                cached = sorted(positions, key=lambda p: (acquired[p], p))
+            self._orders[symbol, by] = cached
+        return cached
+
+    def by_term(self, symbol, today):
+        """(short-term, long-term) lot positions of a symbol, each highest cost first"""
+        cached = self._orders.get((symbol, 'term'))
+        if cached is None or cached[0] != today:
+            cutoff = today - LONG_TERM_DAYS
+            acquired = self.acquired
+            order = self.order(symbol, 'cost')
+            cached = (today, [p for p in order if acquired[p] >= cutoff], [p for p in order if acquired[p] < cutoff])
+            self._orders[symbol, 'term'] = cached
+        return cached[1:]
+
+    def open_lots(self, symbol):
+        quantity = self.quantity
+        return [p for p in self.by_symbol.get(symbol, ()) if quantity[p] > 0]
+
+    def shares(self, symbol):
+        symbol_id = self.symbol_index.get(symbol)
+        return 0.0 if symbol_id is None else self.held[symbol_id]
+
+    def holdings(self):
+        """{symbol: shares} of every symbol with open lots"""
+        return {symbol: shares for symbol, shares in zip(self.names, self.held) if shares > 1e-9}
+
+    def term(self, position, today):
+        return 'long' if today - self.acquired[position] > LONG_TERM_DAYS else 'short'
+
+    def recent(self, symbol, today, window=WASH_SALE_DAYS):
+        """Open lots of symbol acquired in the window before today, newest first"""
+        acquired, quantity = self.acquired, self.quantity
+        positions = []
+        # Newest first, so the scan stops at the first lot outside the window
+        for p in reversed(self.order(symbol, 'date')):
+            if today - acquired[p] > window:
+                break
+            if quantity[p] > 0:
+                positions.append(p)
+        return positions
+
+    def bought_within(self, symbol, today, window=WASH_SALE_DAYS, exclude=()):
+        """Whether any other open lot of symbol was acquired in the window before today"""
+        return any(p not in exclude for p in self.recent(symbol, today, window))
+
+    def sold_at_loss_within(self, symbol, today, window=WASH_SALE_DAYS):
+        sold = self.last_loss.get(symbol)
+        return sold is not None and 0 <= today - sold <= window
+
+    def sell(self, position, quantity, price, when=None):
+        """Close (part of) a lot and record the realized sale"""
+        today = _ordinal(when)
+        quantity = min(quantity, self.quantity[position])
+        self.quantity[position] -= quantity
+        self.held[self.symbols[position]] -= quantity
+        basis = quantity * self.unit_cost[position]
+        sale = {
+            'lot_id': self.lot_ids[position],
+            'symbol': self.symbol(position),
+            'sold': today,
+            'quantity': quantity,
+            'proceeds': quantity * price,
+            'basis': basis,
+            'gain': quantity * price - basis,
+            'term': self.term(position, today),
+        }
+        self.realized.append(sale)
+        if sale['gain'] < 0:
+            self.last_loss[sale['symbol']] = max(today, self.last_loss.get(sale['symbol'], today))
+        return sale
+
+
+def read_lots(path):
+    """LotStore from a CSV with symbol, quantity, cost (per share or total) and acquired date columns"""
+    lots = LotStore()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        names = [name.strip().lower() for name in next(reader, [])]
+
+        def find(candidates, required=True):
+            for candidate in candidates:
+                if candidate in names:
+                    return names.index(candidate)
+            if required:
+                raise ValueError(f"{path}: missing one of columns {', '.join(candidates)}")
+            return None
+
+        symbol_idx = find(SYMBOL_HEADERS)
+        quantity_idx = find(QUANTITY_HEADERS)
+        date_idx = find(DATE_HEADERS)
+        lot_idx = find(LOT_HEADERS, required=False)
+        unit_idx = find(UNIT_COST_HEADERS, required=False)
+        total_idx = None if unit_idx is not None else find(TOTAL_COST_HEADERS)
+
+        for record in reader:
+            if not record or not record[symbol_idx].strip():
+                continue
+            quantity = float(record[quantity_idx])
+            if unit_idx is not None:
+                unit_cost = float(record[unit_idx])
+            else:
+                unit_cost = float(record[total_idx]) / quantity if quantity else 0.0
+            lots.add(record[symbol_idx].strip(), quantity, unit_cost, record[date_idx].strip(),
+                     record[lot_idx].strip() if lot_idx is not None else None)
+    return lots
+
+
+def read_prices(path):
+    """{symbol: price} from a symbol,price CSV"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        names = [name.strip().lower() for name in next(reader, [])]
+        symbol_idx = next((names.index(c) for c in SYMBOL_HEADERS if c in names), None)
+        price_idx = next((names.index(c) for c in PRICE_HEADERS if c in names), None)
+        if symbol_idx is None or price_idx is None:
+            raise ValueError(f"{path}: expected symbol and price columns")
+        return {r[symbol_idx].strip().upper(): float(r[price_idx]) for r in reader if r and r[symbol_idx].strip()}
+
+
+def load_prices(path, symbols=None):
+    """{symbol: price} from a symbol,price CSV or, for a directory, the latest close in a PriceCache"""
+    if not os.path.isdir(path):
+        return read_prices(path)
+    from price_history import PriceCache
+
+    cache = PriceCache(path)
+    prices = {}
+    for symbol in symbols if symbols is not None else cache.manifest:
+        if cache.rows(symbol):
+            prices[symbol] = cache.series(symbol).close[-1]
+    return prices
+
+
+# ── Lot selection ──────────────────────────────────────────────────
+
+
+def _tax_stream(lots, positions, price, rate, washed):
+    """(tax per dollar, position) over same-term lots sorted highest cost first, i.e. lowest tax first"""
+    cost = lots.unit_cost
+    for position in positions:
+        gain = price - cost[position]
+        yield (0.0 if gain < 0 and washed else gain * rate / price), position
+
+
+def ordered_lots(lots, symbols, prices, today, method='min_tax', rates=TAX_RATES, lot_ids=None):
+    """Yield open lot positions of one or more (equivalent) symbols in sale order.
+
+    hifo/fifo/lifo walk the cached per-symbol index. min_tax merges, per symbol
+    and holding term, the highest-cost-first streams: within one term the tax
+    per dollar rises as cost falls, so each stream is already sorted and the
+    merge only touches the lots actually sold.
+    """
+    quantity = lots.quantity
+    if method == 'specific':
+        for lot_id in lot_ids or ():
+            position = lots.lot_index[lot_id]
+            if lots.symbol(position) in symbols and quantity[position] > 0:
+                yield position
+        return
+    if method not in METHODS:
+        raise ValueError(f"Unknown lot method: {method} (expected one of {', '.join(METHODS)})")
+
+    streams = []
+    for symbol in symbols:
+        if method == 'fifo':
+            streams.append(((lots.acquired[p], p) for p in lots.order(symbol, 'date')))
+        elif method == 'lifo':
+            streams.append(((-lots.acquired[p], p) for p in reversed(lots.order(symbol, 'date'))))
+        elif method == 'hifo':
+            streams.append(((-lots.unit_cost[p], p) for p in lots.order(symbol, 'cost')))
+        else:
+            washed = lots.bought_within(symbol, today)
+            for term, positions in zip(('short', 'long'), lots.by_term(symbol, today)):
+                streams.append(_tax_stream(lots, positions, prices[symbol], rates[term], washed))
+    for _, position in heapq.merge(*streams):
+        if quantity[position] > 0:
+            yield position
+
+
+def select_lots(lots, symbols, value, prices, today, method='min_tax', rates=TAX_RATES, lot_ids=None):
+    """[(position, quantity)] selling `value` dollars from symbols' lots in method order"""
+    remaining = value
+    picks = []
+    for position in ordered_lots(lots, symbols, prices, today, method, rates, lot_ids):
+        if remaining <= 1e-9:
+            break
+        price = prices[lots.symbol(position)]
+        quantity = min(lots.quantity[position], remaining / price)
+        picks.append((position, quantity))
+        remaining -= quantity * price
+    return picks
+
+
+def _sale(lots, position, quantity, price, today, rates, recent):
+    """One lot sale; a loss is washed when another lot in `recent` (see LotStore.recent) was bought"""
+    symbol = lots.symbol(position)
+    term = lots.term(position, today)
+    basis = quantity * lots.unit_cost[position]
+    gain = quantity * price - basis
+    washed = gain < 0 and any(p != position for p in recent)
+    return {
+        'lot_id': lots.lot_ids[position],
+        'symbol': symbol,
+        'quantity': quantity,
+        'proceeds': quantity * price,
+        'basis': basis,
+        'gain': gain,
+        'term': term,
+        'wash_sale': washed,
+        'tax': 0.0 if washed else gain * rates[term],
+    }
+
+
+# ── Rebalancing ────────────────────────────────────────────────────
+
+
+def rebalance(lots, target, prices, today=None, method='min_tax', cash=0.0, band=0.0, min_trade=1.0,
+              rates=TAX_RATES, equivalents=EQUIVALENTS, lot_ids=None):
+    """Trades moving holdings toward target weights {symbol: weight}.
+
+    A held equivalent (ITOT for a VTI target) counts toward its partner's
+    target instead of being sold. Groups within `band` (relative, e.g. 0.2 =
+    ±20% of target) or less than `min_trade` dollars off are left alone.
+    Returns {'trades', 'sales', 'value', 'realized_gain', 'tax'}; the lot
+    store is not modified (see apply()).
+    """
+    today = _ordinal(today)
+    partner = partners(equivalents)
+    holdings = lots.holdings()
+    missing = sorted(s for s in set(holdings) | set(target) if s not in prices)
+    if missing:
+        raise KeyError(f"No price for: {', '.join(missing)}")
+
+    groups = {symbol: [symbol] for symbol in target}
+    for symbol in holdings:
+        if symbol in groups:
+            continue
+        equivalent = partner.get(symbol)
+        if equivalent in target and equivalent in groups:
+            groups[equivalent].append(symbol)
+        else:
+            groups[symbol] = [symbol]
+
+    values = {key: sum(holdings.get(s, 0.0) * prices[s] for s in members) for key, members in groups.items()}
+    total = sum(values.values()) + cash
+    trades, sales = [], []
+    available = cash
+    shortfalls = {}
+    for key, members in groups.items():
+        goal = target.get(key, 0.0) * total
+        drift = values[key] - goal
+        if abs(drift) < min_trade or (goal and abs(drift) <= band * goal):
+            continue
+        if drift > 0:
+            recent = {symbol: lots.recent(symbol, today) for symbol in members}
+            for position, quantity in select_lots(lots, members, drift, prices, today, method, rates, lot_ids):
+                symbol = lots.symbol(position)
+                sale = _sale(lots, position, quantity, prices[symbol], today, rates, recent[symbol])
+                sales.append(sale)
+                available += sale['proceeds']
+        else:
+            shortfalls[key] = -drift
+
+    for sale in sales:
+        trades.append({'action': 'sell', 'symbol': sale['symbol'], 'quantity': sale['quantity'],
+                       'value': sale['proceeds'], 'lot_id': sale['lot_id']})
+    # Buys are funded by the sells plus cash; scale down if a band left them short
+    needed = sum(shortfalls.values())
+    scale = min(1.0, available / needed) if needed else 0.0
+    for key, amount in shortfalls.items():
+        value = amount * scale
+        trades.append({
+            'action': 'buy', 'symbol': key, 'quantity': value / prices[key], 'value': value,
+            'wash_sale': lots.sold_at_loss_within(key, today),
+        })
+
+    return {
+        'trades': trades,
+        'sales': sales,
+        'value': total,
+        'realized_gain': sum(s['gain'] for s in sales),
+        'tax': sum(s['tax'] for s in sales),
+    }
+
+
+def apply(lots, plan, prices, today=None):
+    """Execute a rebalance() plan against the lot store"""
+    today = _ordinal(today)
+    for trade in plan['trades']:
+        if trade['action'] == 'sell':
+            lots.sell(lots.lot_index[trade['lot_id']], trade['quantity'], prices[trade['symbol']], today)
+        else:
+            lots.add(trade['symbol'], trade['quantity'], prices[trade['symbol']], today)
+
+
+# ── Loss harvesting ────────────────────────────────────────────────
+
+
+def harvest(lots, prices, today=None, min_loss=100.0, rates=TAX_RATES, equivalents=EQUIVALENTS,
+            window=WASH_SALE_DAYS):
+    """Loss-harvesting swaps into an equivalent fund, largest tax saving first.
+
+    Only lots below cost are sold (highest-cost-first index, so the scan stops
+    at the first lot in profit). A swap is marked blocked when selling would be
+    a wash sale (other shares bought within the window) or buying the partner
+    would wash a loss realized on it within the window.
+    """
+    today = _ordinal(today)
+    swaps = []
+    for symbol, equivalent in partners(equivalents).items():
+        if symbol not in lots.by_symbol or symbol not in prices or equivalent not in prices:
+            continue
+        price = prices[symbol]
+        picks = []
+        for position in lots.order(symbol, 'cost'):
+            if lots.unit_cost[position] <= price:
+                break
+            if lots.quantity[position] > 0:
+                picks.append(position)
+        if not picks:
+            continue
+        recent = lots.recent(symbol, today)
+        sales = [_sale(lots, p, lots.quantity[p], price, today, rates, recent) for p in picks]
+        loss = sum(s['gain'] for s in sales)
+        if -loss < min_loss:
+            continue
+
+        blocked = None
+        if lots.bought_within(symbol, today, window, exclude=set(picks)):
+            blocked = f"{symbol} bought within {window} days"
+        elif lots.sold_at_loss_within(equivalent, today, window):
+            blocked = f"{equivalent} sold at a loss within {window} days"
+        proceeds = sum(s['proceeds'] for s in sales)
+        swaps.append({
+            'sell': symbol,
+            'buy': equivalent,
+            'lots': [s['lot_id'] for s in sales],
+            'quantity': sum(s['quantity'] for s in sales),
+            'proceeds': proceeds,
+            'buy_quantity': proceeds / prices[equivalent],
+            'loss': loss,
+            'tax_saved': -sum(s['gain'] * rates[s['term']] for s in sales),
+            'repurchase_after': date.fromordinal(today + window + 1).isoformat(),
+            'blocked': blocked,
+        })
+    swaps.sort(key=lambda s: -s['tax_saved'])
+    # Both sides of a pair can be at a loss; only one can be the replacement
+    sold, bought = set(), set()
+    for swap in swaps:
+        if swap['blocked'] is None:
+            if swap['sell'] in bought or swap['buy'] in sold:
+                swap['blocked'] = f"{swap['sell']} is being swapped with {swap['buy']} already"
+            else:
+                sold.add(swap['sell'])
+                bought.add(swap['buy'])
+    return swaps